@@ -6,7 +6,7 @@ import os
 import asyncio  # 🔧 ADDED
 
 from db import users_collection
-from home import home_bp
+from home import home_bp, start_workers
 
 app = Flask(__name__)
 app.secret_key = os.getenv('SECRET_KEY') or 'dev-secret-key'
@@ -156,5 +156,14 @@ def home_redirect():
 app.register_blueprint(home_bp)
 
 
+# -------------------- Background Workers --------------------
+# `python app.py` runs under the debug reloader, which re-runs this file in a
+# serving child (WERKZEUG_RUN_MAIN=true). Only that child runs jobs, so their
+# events reach the streams it serves. Imported (gunicorn, ingest_batch.py),
+# the app always starts them.
+if __name__ != '__main__' or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+    start_workers()
+
+
 if __name__ == '__main__':
     app.run(debug=True)
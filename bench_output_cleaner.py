@@ -0,0 +1,185 @@
+"""
+Output cleaner equivalence check and microbenchmark.
+Compares services.output_cleaner against the original regex-chain
+implementation (kept below as the reference) on randomized markdown edge
+cases and on large synthetic LLM summaries, then times both. The reference
+and input generators are also used by tests/test_output_cleaner.py, which
+runs a smaller fixed-seed equivalence check with the other unit tests.
+
+Usage:
+    python bench_output_cleaner.py                 # 20000 fuzz cases, 200 large outputs
+    python bench_output_cleaner.py --cases 100000 --seed 7
+"""
+import re
+import sys
+import time
+import random
+import argparse
+from services.output_cleaner import clean_text, parse_summary_sections, summary_sections
+
+
+# -------------------- Reference implementation --------------------
+
+def reference_clean_text(text):
+    if not text:
+        return text
+    text = re.sub(r'\*{1,3}', '', text)
+    text = re.sub(r'^#{1,6}\s*', '', text, flags=re.MULTILINE)
+    text = re.sub(r'^-{3,}$', '', text, flags=re.MULTILINE)
+    text = re.sub(r'`+', '', text)
+    text = re.sub(r'^[\s]*[-*]\s+', '• ', text, flags=re.MULTILINE)
+    text = re.sub(r'\n{3,}', '\n\n', text)
+    lines = [line.strip() for line in text.split('\n')]
+    text = '\n'.join(lines)
+    return text.strip()
+
+
+def reference_parse_summary_sections(raw_text):
+    if not raw_text:
+        return {'summary': '', 'keypoints': [], 'raw_cleaned': ''}
+    cleaned = reference_clean_text(raw_text)
+    summary_part = ''
+    keypoints = []
+    summary_pattern = re.compile(
+        r'(?:Summary|सारांश|सारांश)\s*\n(.*?)(?=(?:Key Takeaways|मुख्य बिंदु|मुख्य मुद्दे|$))',
+        re.DOTALL | re.IGNORECASE
+    )
+    takeaways_pattern = re.compile(
+        r'(?:Key Takeaways|मुख्य बिंदु|मुख्य मुद्दे)\s*\n(.*)',
+        re.DOTALL | re.IGNORECASE
+    )
+    summary_match = summary_pattern.search(cleaned)
+    takeaways_match = takeaways_pattern.search(cleaned)
+    if summary_match:
+        summary_part = summary_match.group(1).strip()
+    elif not takeaways_match:
+        summary_part = cleaned
+    if takeaways_match:
+        for line in takeaways_match.group(1).strip().split('\n'):
+            line = line.strip()
+            if not line:
+                continue
+            line = re.sub(r'^[•\-*\d.]+\s*', '', line).strip()
+            if line and len(line) > 3:
+                keypoints.append(line)
+    return {'summary': summary_part, 'keypoints': keypoints, 'raw_cleaned': cleaned}
+
+
+def reference_summary_sections(summary):
+    """What generate_pdf computed from the stored summary on every download."""
+    summary_text = reference_clean_text(summary)
+    summary_part = summary_text
+    key_takeaways = []
+    if '### Summary' in summary_text or '### Key Takeaways' in summary_text or '### सारांश' in summary_text \
+            or '### मुख्य' in summary_text or 'Summary' in summary_text or 'Key Takeaways' in summary_text:
+        parsed = reference_parse_summary_sections(summary_text)
+        summary_part = parsed['summary']
+        key_takeaways = parsed['keypoints']
+    if not summary_part:
+        summary_part = summary_text
+    return {'summary': summary_part, 'keypoints': key_takeaways}
+
+
+# -------------------- Inputs --------------------
+
+# Line fragments chosen to hit every rule and the places where they interact
+FRAGMENTS = [
+    '', '', '', ' ', '  ', '\t', '\r', '\xa0', '#', '##', '### ', '#######', '# ', '#x', '## Title',
+    '-', '- ', '-\t', '--', '---', '----', '--- ', '- - -', '-x', '  - item', '\t- item', '• item',
+    '* item', '*', '**', '***', '**bold**', '*#*', '**# Heading**', '`', '```', '`code`', '`---`',
+    '`# x`', '`- x`', '1. point', '2) point', 'Summary', '### Summary', 'summary', 'Key Takeaways',
+    '### Key Takeaways', 'सारांश', 'मुख्य बिंदु', 'मुख्य मुद्दे', 'In summary', 'text', 'Plain words here.',
+    '  indented text', 'ends with dash -', 'trailing   ', '#\t-', '- #', '  #', '-\r', '#\r',
+]
+
+
+def random_case(rng):
+    parts = []
+    for _ in range(rng.randint(0, 14)):
+        fragment = rng.choice(FRAGMENTS)
+        if rng.random() < 0.2:
+            fragment += rng.choice(FRAGMENTS)
+        parts.append(fragment)
+    return rng.choice(['', '\n', ' ']) + '\n'.join(parts) + rng.choice(['', '\n', '\n\n', ' '])
+
+
+def synthetic_summary(rng, sections=40):
+    """A long LLM-style markdown summary (roughly 40 KB at the default size)."""
+    words = ('the guest explains how markets react to policy while the host asks about risk '
+             'growth data models sleep memory climate farming startups funding').split()
+
+    def sentence():
+        return ' '.join(rng.choice(words) for _ in range(rng.randint(8, 20))).capitalize() + '.'
+
+    out = ['### Summary', '']
+    for _ in range(sections):
+        out.append(' '.join(
+            f"**{sentence()}**" if rng.random() < 0.2 else sentence() for _ in range(rng.randint(2, 5))
+        ))
+        out.append('')
+        if rng.random() < 0.3:
+            out.extend(['---', ''])
+    out.extend(['### Key Takeaways', ''])
+    for i in range(sections):
+        bullet = rng.choice(['- ', '* ', f'{i + 1}. ', '  - '])
+        out.append(f"{bullet}**{rng.choice(words).title()}:** {sentence()} Use `{rng.choice(words)}`.")
+    return '\n'.join(out)
+
+
+# -------------------- Main --------------------
+
+def check(texts):
+    mismatches = 0
+    for text in texts:
+        if clean_text(text) != reference_clean_text(text) \
+                or parse_summary_sections(text) != reference_parse_summary_sections(text) \
+                or (text and summary_sections(text) != reference_summary_sections(text)):
+            mismatches += 1
+            if mismatches <= 5:
+                print(f"MISMATCH for {text!r}")
+                print(f"  expected {reference_clean_text(text)!r}")
+                print(f"  got      {clean_text(text)!r}")
+    return mismatches
+
+
+def bench(label, fn, texts, repeat=5):
+    best = min(_timed(fn, texts) for _ in range(repeat))
+    print(f"  {label:<34} {best * 1000:8.1f} ms")
+    return best
+
+
+def _timed(fn, texts):
+    started = time.perf_counter()
+    for text in texts:
+        fn(text)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check and benchmark services.output_cleaner.")
+    parser.add_argument('--cases', type=int, default=20000, help="random edge-case inputs")
+    parser.add_argument('--large', type=int, default=200, help="large synthetic summaries")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    cases = [random_case(rng) for _ in range(args.cases)]
+    large = [synthetic_summary(rng) for _ in range(args.large)]
+
+    mismatches = check(cases) + check(large)
+    total = len(cases) + len(large)
+    print(f"Equivalence: {total - mismatches}/{total} identical")
+
+    size = sum(len(t) for t in large) / 1e6
+    print(f"Benchmark: {len(large)} summaries, {size:.1f} MB")
+    before = bench("clean_text (reference)", reference_clean_text, large)
+    after = bench("clean_text", clean_text, large)
+    print(f"  speedup {before / after:.2f}x")
+    before = bench("parse_summary_sections (reference)", reference_parse_summary_sections, large)
+    after = bench("parse_summary_sections", parse_summary_sections, large)
+    print(f"  speedup {before / after:.2f}x")
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
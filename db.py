@@ -1,5 +1,7 @@
 # db.py
-from pymongo import MongoClient, ASCENDING
+import os
+from datetime import datetime
+from pymongo import MongoClient, ASCENDING, DESCENDING
 
 client = MongoClient('mongodb://localhost:27017/')
 db = client['Podcast_Summarizer_2']
@@ -8,6 +10,21 @@ summaries_collection = db['summaries']
 history_collection = db['history']
 comments_collection = db['comments']
 chat_history_collection = db['chat_history']
+jobs_collection = db['jobs']
+llm_cache_collection = db['llm_cache']
+# Full transcripts, keyed by video_id (_id), kept out of the hot summaries documents
+transcripts_collection = db['transcripts']
+# Raw caption segments per (video_id, language), independent of summaries
+transcript_cache_collection = db['transcript_cache']
+# Per-video transcript chunks + BM25 postings used by chat retrieval
+chat_index_collection = db['chat_index']
+# Library-wide search: per-(term, video) weights and per-term document frequencies
+search_postings_collection = db['search_postings']
+search_terms_collection = db['search_terms']
+# Bulk ingestion requests (video IDs + which were already summarized)
+batches_collection = db['batches']
+# Map-phase chunk summaries keyed by video_id + chunk hash, reused on retry
+chunk_summaries_collection = db['chunk_summaries']
 
 # -------------------- Indexes --------------------
 # Drop stale multilanguage index if it exists from prior runs
@@ -16,11 +33,24 @@ try:
 except Exception:
     pass
 
-# Simple index on video_id for fast lookups
-summaries_collection.create_index(
-    [('video_id', ASCENDING)],
-    name='idx_video_id'
-)
+# Unique index on video_id: makes the single-flight summary lease upsert atomic.
+# Falls back to a plain index if legacy duplicate records are still present.
+try:
+    summaries_collection.create_index(
+        [('video_id', ASCENDING)],
+        name='idx_video_id_unique',
+        unique=True
+    )
+    try:
+        summaries_collection.drop_index('idx_video_id')
+    except Exception:
+        pass
+except Exception as e:
+    print(f"[PodcastAI] Could not create unique video_id index (duplicate records?): {e}")
+    summaries_collection.create_index(
+        [('video_id', ASCENDING)],
+        name='idx_video_id'
+    )
 
 # Index for fast comment retrieval by video
 comments_collection.create_index(
@@ -32,4 +62,83 @@ comments_collection.create_index(
 chat_history_collection.create_index(
     [('user_id', ASCENDING), ('video_id', ASCENDING), ('timestamp', ASCENDING)],
     name='idx_chat_history'
-)
\ No newline at end of file
+)
+
+# Job queue: workers claim the highest-priority, oldest runnable job, and only one active
+# (queued/running) job may exist per dedupe key
+try:
+    jobs_collection.drop_index('idx_jobs_claim')
+except Exception:
+    pass
+
+jobs_collection.create_index(
+    [('status', ASCENDING), ('priority', DESCENDING), ('run_at', ASCENDING)],
+    name='idx_jobs_claim_priority'
+)
+
+jobs_collection.create_index(
+    [('key', ASCENDING)],
+    name='idx_jobs_active_key',
+    unique=True,
+    partialFilterExpression={'active': True}
+)
+
+# Transcript cache: fallback lookup of any cached language for a video
+transcript_cache_collection.create_index(
+    [('video_id', ASCENDING)],
+    name='idx_transcript_cache_video'
+)
+
+# Library search: best postings per term first; per-video lookup for re-indexing
+search_postings_collection.create_index(
+    [('term', ASCENDING), ('weight', DESCENDING)],
+    name='idx_search_term_weight'
+)
+
+search_postings_collection.create_index(
+    [('video_id', ASCENDING)],
+    name='idx_search_video'
+)
+
+# Chunk summaries are kept for re-runs of the reduce/final steps and expire
+# after CHUNK_SUMMARY_TTL_SECONDS
+chunk_summaries_collection.create_index(
+    [('created_at', ASCENDING)],
+    name='idx_chunk_summaries_ttl',
+    expireAfterSeconds=int(os.getenv('CHUNK_SUMMARY_TTL_SECONDS', str(7 * 24 * 3600)))
+)
+
+# LLM response cache: entries expire when unused for LLM_CACHE_TTL_SECONDS
+llm_cache_collection.create_index(
+    [('last_used', ASCENDING)],
+    name='idx_llm_cache_ttl',
+    expireAfterSeconds=int(os.getenv('LLM_CACHE_TTL_SECONDS', str(30 * 24 * 3600)))
+)
+
+
+# -------------------- Migrations --------------------
+
+def migrate_transcripts(batch_size=100):
+    """
+    Moves 'full_text' from legacy summaries documents into the transcripts
+    collection. Idempotent: the transcript is written before the field is
+    removed, so an interrupted run is simply picked up next time.
+    Returns: number of documents migrated
+    """
+    migrated = 0
+    while True:
+        batch = list(summaries_collection.find(
+            {'full_text': {'$exists': True}},
+            {'video_id': 1, 'full_text': 1}
+        ).limit(batch_size))
+        if not batch:
+            return migrated
+
+        for doc in batch:
+            transcripts_collection.update_one(
+                {'_id': doc['video_id']},
+                {'$setOnInsert': {'text': doc['full_text'], 'created_at': datetime.utcnow()}},
+                upsert=True
+            )
+            summaries_collection.update_one({'_id': doc['_id']}, {'$unset': {'full_text': ''}})
+            migrated += 1
@@ -1,36 +1,56 @@
-from flask import Blueprint, render_template, request, flash, session, redirect, url_for, send_file, make_response, jsonify
+from flask import Blueprint, render_template, request, flash, session, redirect, url_for, send_file, make_response, jsonify, Response, stream_with_context
 from flask_login import login_required, current_user
-from youtube_transcript_api import YouTubeTranscriptApi
-from youtube_transcript_api.formatters import TextFormatter
-from youtube_transcript_api.proxies import WebshareProxyConfig, GenericProxyConfig
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_core.documents import Document
-from langchain_ollama import ChatOllama
 from langchain_core.prompts import PromptTemplate
-from db import summaries_collection, history_collection, comments_collection, chat_history_collection
+from db import summaries_collection, history_collection, comments_collection, chat_history_collection, jobs_collection, llm_cache_collection, transcripts_collection, transcript_cache_collection, chat_index_collection, search_postings_collection, search_terms_collection, batches_collection, chunk_summaries_collection, migrate_transcripts
+from pymongo.errors import DuplicateKeyError
 from datetime import datetime, timedelta, timezone
 
 # IST timezone offset
 IST = timezone(timedelta(hours=5, minutes=30))
 import re
 import os
+import time
 import asyncio
-import json
 import threading
-from reportlab.lib.pagesizes import letter
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak, Table, TableStyle
-from reportlab.lib import colors
-from io import BytesIO
+import json
+from collections import Counter
 from services.chat_service import ChatService
-from services.output_cleaner import clean_text, parse_summary_sections, build_clean_response
+from services.embedding_index import EmbeddingStore
+from services.library_search import LibrarySearch
+from services.transcript_fetcher import TranscriptFetcher
+from services.batch_ingest import BatchIngest
+from services.chunk_store import ChunkSummaryStore
+from services.segments import SegmentIndex, format_timestamp
+from services.token_budget import token_counter, context_budget
+from services.extractive import extractive_summary
+from services.output_cleaner import clean_text, summary_sections, build_clean_response
+from services.pdf_report import PdfCache, REPORT_FIELDS
+from services.pdf_export import PdfExporter
+from services.job_queue import JobQueue, WorkerPool
+from services.single_flight import SingleFlight
+from services.llm_client import llm_client, llm_unavailable
+from services.llm_cache import LLMCache
+from services.adaptive_limiter import AdaptiveLimiter
+from services.event_broker import EventBroker, format_sse
+from services.progress_watcher import ProgressWatcher
+from services.task_graph import TaskGraph
 
 # Initialize Services
-chat_service = ChatService()
+chat_service = ChatService(chat_index_collection, EmbeddingStore())
+event_broker = EventBroker()
+llm_client.cache = LLMCache(llm_cache_collection)
+
+# Seconds between keep-alive frames on idle SSE streams
+SSE_HEARTBEAT_SECONDS = 5
 
 home_bp = Blueprint('home_bp', __name__)
 
+
+@home_bp.app_template_filter('timestamp')
+def timestamp_filter(seconds):
+    return format_timestamp(seconds)
+
+
 # -------------------- Helpers --------------------
 
 def get_video_id(url):
@@ -60,142 +80,259 @@ def get_video_id(url):
     return match.group(1) if match else None
 
 
+# Caption segments are cached per video + language; fetches are pooled and rate limited
+transcript_fetcher = TranscriptFetcher(transcript_cache_collection)
+
+
 def fetch_available_captions(video_url):
     video_id = get_video_id(video_url)
     if not video_id:
         return None
 
-    try:
-        proxy_config = None
-        if os.getenv("PROXY_USERNAME") and os.getenv("PROXY_PASSWORD"):
-            proxy_config = WebshareProxyConfig(
-                proxy_username=os.getenv("PROXY_USERNAME"),
-                proxy_password=os.getenv("PROXY_PASSWORD")
-            )
-        elif os.getenv("PROXY_URL"):
-            proxy_config = GenericProxyConfig(
-                http_url=os.getenv("PROXY_URL"),
-                https_url=os.getenv("PROXY_URL")
-            )
-
-        api = YouTubeTranscriptApi(proxy_config=proxy_config) if proxy_config else YouTubeTranscriptApi()
-        transcript_list = api.list(video_id)
-        transcripts = list(transcript_list)
-
-        preferred_langs = os.getenv("TRANSCRIPT_LANGS", "en")
-        preferred_langs = [l.strip() for l in preferred_langs.split(",") if l.strip()]
-
-        transcript = None
-
-        for lang in preferred_langs:
-            transcript = next(
-                (t for t in transcripts if (not t.is_generated) and t.language_code == lang),
-                None
-            )
-            if transcript:
-                break
+    transcript = transcript_fetcher.fetch(video_id)
+    if not transcript:
+        return None
 
-        if not transcript:
-            for lang in preferred_langs:
-                transcript = next(
-                    (t for t in transcripts if t.is_generated and t.language_code == lang),
-                    None
-                )
-                if transcript:
-                    break
+    # return dict to be consistent
+    return {
+        'text': transcript['text'],
+        'segments': transcript['segments'],
+        # Start time / duration / text offset arrays, for timestamped chunks
+        'timing': SegmentIndex.from_segments(transcript['segments']),
+        'chapters': []  # No semantic chapters for standard captions
+    }
 
-        if not transcript:
-            transcript = next((t for t in transcripts if not t.is_generated), None)
 
-        if not transcript and transcripts:
-            transcript = transcripts[0]
+# -------------------- Async summarization --------------------
 
-        if not transcript:
-            return None
+# Map-phase concurrency adapts to Ollama's observed latency and errors. Real
+# concurrency can't exceed LLM_MAX_CONCURRENCY, so that caps the limiter too
+map_limiter = AdaptiveLimiter(
+    maximum=min(int(os.getenv("MAP_CONCURRENCY_MAX", "16")), llm_client.max_concurrency)
+)
+MAP_CHUNK_RETRIES = int(os.getenv("MAP_CHUNK_RETRIES", "3"))
 
-        target_lang = os.getenv("TRANSCRIPT_TRANSLATE_TO", "").strip()
-        if (
-            target_lang
-            and getattr(transcript, "is_translatable", False)
-            and transcript.language_code != target_lang
-        ):
-            try:
-                transcript = transcript.translate(target_lang)
-            except Exception:
-                pass
+# Map-phase prompt; its template is part of the chunk store key
+MAP_PROMPT = PromptTemplate.from_template("""
+        Summarize this transcript chunk into 2-3 concise bullet points.
 
-        formatter = TextFormatter()
-        formatted_text = formatter.format_transcript(transcript.fetch())
-        
-        # return dict to be consistent
-        return {'text': formatted_text, 'chapters': []}  # No semantic chapters for standard captions
+        Chunk {num}:
+        {text}
+        """)
 
-    except Exception as e:
-        print("Caption error:", e)
-        return None
+# Finished chunk summaries outlive a failed run, so a retry only maps what's missing
+chunk_store = ChunkSummaryStore(chunk_summaries_collection, llm_client.model, MAP_PROMPT.template)
 
+# Map chunks and reduce batches are sized in tokens against the model's
+# context window, leaving room for the prompt and the generated output
+REDUCE_CONTEXT_TOKENS = int(os.getenv("REDUCE_CONTEXT_TOKENS", str(llm_client.context_tokens)))
+REDUCE_RESERVE_TOKENS = 1500
+MAP_RESERVE_TOKENS = 600
+MAP_CHUNK_TOKENS = min(
+    int(os.getenv("MAP_CHUNK_TOKENS", "2000")),
+    context_budget(llm_client.context_tokens, MAP_RESERVE_TOKENS)
+)
+MAP_OVERLAP_TOKENS = 50
 
-# -------------------- Async summarization --------------------
 
 async def summarize_chunk(chunk_text, index):
     try:
-        llm = ChatOllama(
-            model=os.getenv("OLLAMA_MODEL", "gpt-oss:latest"),
-            base_url=os.getenv("OLLAMA_BASE_URL", "http://localhost:11434"),
-            temperature=0.7
+        response = await llm_client.ainvoke(
+            MAP_PROMPT.format(
+                text=chunk_text,
+                num=index + 1
+            ),
+            temperature=0.7,
+            limiter=map_limiter
         )
 
+        return index, response.content
+
+    except Exception as e:
+        error_msg = str(e)
+        if "Connection" in error_msg or "refused" in error_msg:
+            print(f"⚠️ Ollama connection failed for chunk {index+1}. Is Ollama running?")
+        else:
+            print(f"Chunk {index+1} failed:", e)
+        return index, None
+
+
+async def summarize_notes_batch(notes_text, index):
+    """Intermediate reduce step: merges a batch of consecutive chunk notes."""
+    try:
         prompt = PromptTemplate.from_template("""
-        Summarize this transcript chunk into 2-3 concise bullet points.
+        Merge these notes from consecutive sections of a podcast transcript into
+        4-6 concise bullet points. Keep the most important facts, in order.
 
-        Chunk {num}:
+        Notes batch {num}:
         {text}
         """)
 
-        response = await llm.ainvoke(
+        response = await llm_client.ainvoke(
             prompt.format(
-                text=chunk_text,
+                text=notes_text,
                 num=index + 1
-            )
+            ),
+            temperature=0.7,
+            limiter=map_limiter
         )
 
         return index, response.content
 
     except Exception as e:
-        error_msg = str(e)
-        if "Connection" in error_msg or "refused" in error_msg:
-            print(f"⚠️ Ollama connection failed for chunk {index+1}. Is Ollama running?")
-        else:
-            print(f"Chunk {index+1} failed:", e)
+        print(f"Reduce batch {index+1} failed:", e)
         return index, None
 
 
-async def generate_distributed_summary_async(text):
-    try:
-        splitter = RecursiveCharacterTextSplitter(chunk_size=3000, chunk_overlap=200)
-        docs = splitter.split_documents([Document(page_content=text)])
+async def _gather_with_retries(fn, texts, on_result=None, done=None):
+    """
+    Runs fn over every text concurrently, retrying failures with backoff.
+    Items already in `done` ({index: content}) are reused instead of rerun.
+    on_result(index, content) is called as each item succeeds.
+    Returns the outputs in input order, or None if any item kept failing.
+    """
+    outputs = dict(done or {})
+    if on_result:
+        for i in sorted(outputs):
+            on_result(i, outputs[i])
+        inner = fn
+
+        async def fn(text, index):
+            result = await inner(text, index)
+            if result[1]:
+                on_result(*result)
+            return result
 
-        tasks = []
-        for i, doc in enumerate(docs):
-            tasks.append(
-                summarize_chunk(doc.page_content, i)
-            )
+    pending = [i for i in range(len(texts)) if i not in outputs]
+    results = await asyncio.gather(*[fn(texts[i], i) for i in pending])
+    outputs.update((i, content) for i, content in results if content)
+
+    # Retry failed items rather than dropping them
+    for attempt in range(MAP_CHUNK_RETRIES):
+        missing = [i for i in range(len(texts)) if i not in outputs]
+        if not missing:
+            break
+        print(f"[PodcastAI] Retrying {len(missing)} failed chunk(s), attempt {attempt + 1}...")
+        await asyncio.sleep(2 ** attempt)
+        results = await asyncio.gather(*[fn(texts[i], i) for i in missing])
+        outputs.update((i, content) for i, content in results if content)
+
+    if len(outputs) < len(texts):
+        print(f"⚠️ {len(texts) - len(outputs)} of {len(texts)} chunks failed after retries.")
+        return None
+
+    return [outputs[i] for i in range(len(texts))]
 
-        results = await asyncio.gather(*tasks)
 
-        summaries = [r for r in results if r[1]]
-        summaries.sort(key=lambda x: x[0])
+def _group_for_reduce(parts, budget):
+    """Greedily packs consecutive parts into batches of at most `budget` tokens."""
+    groups, current, size = [], [], 0
+    for part in parts:
+        tokens = token_counter.count(part) + 1
+        if current and size + tokens > budget:
+            groups.append(current)
+            current, size = [], 0
+        current.append(part)
+        size += tokens
+    if current:
+        groups.append(current)
+    return groups
 
-        if not summaries:
+
+async def _tree_reduce(parts, on_event=None):
+    """
+    Reduces chunk summaries level by level until they fit one reduce prompt.
+    Each level merges context-sized batches in parallel, so the number of
+    levels grows logarithmically with episode length.
+    Returns the combined notes for the final prompt, or None on failure.
+    """
+    budget = context_budget(REDUCE_CONTEXT_TOKENS, REDUCE_RESERVE_TOKENS)
+    level = 1
+    while True:
+        groups = _group_for_reduce(parts, budget)
+        if len(groups) == 1:
+            return "\n".join(groups[0])
+        if len(groups) == len(parts):
+            # Every part is too large to batch; pair them up to guarantee progress
+            groups = [parts[i:i + 2] for i in range(0, len(parts), 2)]
+
+        print(f"[PodcastAI] Reduce level {level}: {len(parts)} parts -> {len(groups)} batches")
+        if on_event:
+            on_event('status', {'stage': 'reducing', 'level': level, 'batches': len(groups)})
+        parts = await _gather_with_retries(summarize_notes_batch, ["\n".join(g) for g in groups])
+        if parts is None:
             return None
+        level += 1
 
-        combined = "\n".join(s[1] for s in summaries)
 
-        llm = ChatOllama(
-            model=os.getenv("OLLAMA_MODEL", "gpt-oss:latest"),
-            base_url=os.getenv("OLLAMA_BASE_URL", "http://localhost:11434"),
-            temperature=0.7
+def _split_for_map(text, timing=None):
+    """
+    Map-phase chunks of up to MAP_CHUNK_TOKENS, cut on caption boundaries when
+    segment timing is known (else on line and sentence breaks).
+    Returns: (chunk_texts, times) with times [[start, end], ...] or None
+    """
+    timed = timing is not None and len(timing) > 0
+    bounds = token_counter.chunk_bounds(
+        text, MAP_CHUNK_TOKENS, MAP_OVERLAP_TOKENS, boundaries=timing.offsets if timed else None
+    )
+    chunk_texts = [text[start:end] for start, end in bounds]
+    if not timed:
+        return chunk_texts, None
+    return chunk_texts, [list(timing.time_range(start, end)) for start, end in bounds]
+
+
+async def generate_distributed_summary_async(text, on_event=None, on_notes=None, video_id=None, timing=None):
+    """
+    Map-reduce summary of a transcript. If on_event(event, data) is given,
+    progress is reported as it happens: 'status' updates, a 'chunk' event per
+    finished chunk summary and 'token' events while the final summary streams.
+    on_notes(chunk_summaries, times) receives the map-phase notes in transcript
+    order, with each chunk's [start, end] seconds when `timing` (a
+    SegmentIndex) is given.
+    With a video_id, chunk summaries are persisted as they finish and reused
+    by later runs (see ChunkSummaryStore).
+    """
+    try:
+        chunk_texts, times = _split_for_map(text, timing)
+        if not chunk_texts:
+            return None
+
+        on_chunk = None
+        if on_event:
+            on_event('status', {'stage': 'summarizing', 'chunks': len(chunk_texts)})
+
+            def on_chunk(index, content):
+                data = {'index': index, 'total': len(chunk_texts), 'text': content}
+                if times:
+                    data['start'], data['end'] = times[index]
+                on_event('chunk', data)
+
+        map_chunk, done = summarize_chunk, None
+        if video_id:
+            loop = asyncio.get_running_loop()
+            hashes = [chunk_store.chunk_hash(t) for t in chunk_texts]
+            stored = await loop.run_in_executor(None, chunk_store.load, video_id, hashes)
+            done = {i: stored[h] for i, h in enumerate(hashes) if h in stored}
+            if done:
+                print(f"[PodcastAI] [{video_id}] Reusing {len(done)} of {len(chunk_texts)} chunk summaries.")
+
+            async def map_chunk(chunk_text, index):
+                index, content = await summarize_chunk(chunk_text, index)
+                if content:
+                    await loop.run_in_executor(None, chunk_store.save, video_id, hashes[index], index, content)
+                return index, content
+
+        chunk_summaries = await _gather_with_retries(
+            map_chunk, chunk_texts, on_result=on_chunk, done=done
         )
+        if not chunk_summaries:
+            return None
+        if on_notes:
+            on_notes(chunk_summaries, times)
+
+        combined = await _tree_reduce(chunk_summaries, on_event)
+        if not combined:
+            return None
 
         final_prompt = PromptTemplate.from_template("""
 You are an expert content summarizer.
@@ -211,7 +348,15 @@ Input text:
 {text}
         """)
 
-        final_response = await llm.ainvoke(final_prompt.format(text=combined))
+        if on_event:
+            on_event('status', {'stage': 'finalizing'})
+            parts = []
+            async for token in llm_client.astream(final_prompt.format(text=combined), temperature=0.7):
+                parts.append(token)
+                on_event('token', {'text': token})
+            return ''.join(parts)
+
+        final_response = await llm_client.ainvoke(final_prompt.format(text=combined), temperature=0.7)
         return final_response.content
     except Exception as e:
         error_msg = str(e).lower()
@@ -223,12 +368,128 @@ Input text:
         return None
 
 
-def generate_distributed_summary(text):
-    return asyncio.run(generate_distributed_summary_async(text))
+def generate_distributed_summary(text, on_event=None, on_notes=None, video_id=None, timing=None):
+    return llm_client.run(generate_distributed_summary_async(text, on_event, on_notes, video_id, timing))
+
+
+# -------------------- Episode Coverage --------------------
+
+# Whole-episode analysis reads the map-phase chunk notes, split into
+# consecutive segments; videos summarized before notes were kept use an
+# evenly spaced sample of the transcript instead
+ANALYSIS_SEGMENTS = int(os.getenv("ANALYSIS_SEGMENTS", "8"))
+ANALYSIS_CONTEXT_CHARS = int(os.getenv("ANALYSIS_CONTEXT_CHARS", "8000"))
+MIN_SEGMENT_CHARS = 2000
+
+
+def _analysis_segments(full_text, notes=None, note_times=None, timing=None):
+    """
+    Splits the episode into up to ANALYSIS_SEGMENTS consecutive segments.
+    Returns: [{'start': %, 'end': %, 'text': str, 'source': 'notes' | 'transcript'}],
+    start/end being how far through the episode (0-100) each segment runs.
+    Segments also get 'start_time'/'end_time' seconds when the chunk times
+    (`note_times`) or caption timing (`timing`) are known.
+    """
+    if notes:
+        count = min(ANALYSIS_SEGMENTS, len(notes))
+        bounds = [round(i * len(notes) / count) for i in range(count + 1)]
+        segments = []
+        for i in range(count):
+            segment = {
+                'start': round(100 * bounds[i] / len(notes)),
+                'end': round(100 * bounds[i + 1] / len(notes)),
+                'text': "\n".join(notes[bounds[i]:bounds[i + 1]]),
+                'source': 'notes'
+            }
+            if note_times and len(note_times) == len(notes):
+                segment['start_time'] = note_times[bounds[i]][0]
+                segment['end_time'] = note_times[bounds[i + 1] - 1][1]
+            segments.append(segment)
+        return segments
+
+    if not full_text:
+        return []
+    length = len(full_text)
+    count = max(1, min(ANALYSIS_SEGMENTS, length // MIN_SEGMENT_CHARS))
+    segments = []
+    for i in range(count):
+        lo, hi = i * length // count, (i + 1) * length // count
+        # Sample from the middle of each segment
+        take = min(hi - lo, ANALYSIS_CONTEXT_CHARS // count)
+        start = lo + (hi - lo - take) // 2
+        segment = {
+            'start': round(100 * lo / length),
+            'end': round(100 * hi / length),
+            'text': full_text[start:start + take],
+            'source': 'transcript'
+        }
+        if timing is not None and timing.length == length:
+            segment['start_time'], segment['end_time'] = timing.time_range(lo, hi)
+        segments.append(segment)
+    return segments
+
+
+def _segment_label(segment):
+    if 'start_time' in segment:
+        return f"[{format_timestamp(segment['start_time'])}-{format_timestamp(segment['end_time'])}]"
+    return f"[{segment['start']}%-{segment['end']}%]"
+
+
+def _coverage_text(segments):
+    """Joins segments into one prompt, each getting an equal share of ANALYSIS_CONTEXT_CHARS."""
+    if not segments:
+        return ''
+    share = ANALYSIS_CONTEXT_CHARS // len(segments)
+    return "\n\n".join(f"{_segment_label(s)}\n{s['text'][:share]}" for s in segments)
 
 
 # -------------------- Sentiment & Emotion Analysis --------------------
 
+def _json_response(text, pattern, kind):
+    """
+    Returns: the JSON value of type `kind` that `pattern` finds in an LLM
+    response, or None if there is none or it doesn't parse
+    """
+    match = re.search(pattern, text or '', re.DOTALL)
+    if not match:
+        return None
+    try:
+        value = json.loads(match.group())
+    except ValueError:
+        return None
+    return value if isinstance(value, kind) else None
+
+
+SENTIMENT_LABELS = ('Positive', 'Negative', 'Neutral')
+EMOTION_LABELS = ('Excited', 'Serious', 'Motivational', 'Sad', 'Informative', 'Angry', 'Neutral')
+
+SENTIMENT_FALLBACK = {
+    'sentiment': 'Neutral',
+    'sentiment_score': 50,
+    'emotion': 'Informative',
+    'emotion_confidence': 50
+}
+
+
+def _label(value, labels, default):
+    """Returns: the entry of `labels` matching `value` case-insensitively, else `default`"""
+    text = str(value).strip().lower()
+    return next((label for label in labels if label.lower() == text), default)
+
+
+def _normalize_sentiment(result):
+    """
+    Restricts an LLM sentiment answer to the known labels (else the fallback
+    ones) and integer 0-100 scores (50 if missing or invalid); other keys are dropped.
+    """
+    return {
+        'sentiment': _label(result.get('sentiment'), SENTIMENT_LABELS, SENTIMENT_FALLBACK['sentiment']),
+        'sentiment_score': _score(result.get('sentiment_score')),
+        'emotion': _label(result.get('emotion'), EMOTION_LABELS, SENTIMENT_FALLBACK['emotion']),
+        'emotion_confidence': _score(result.get('emotion_confidence'))
+    }
+
+
 async def analyze_sentiment_emotion_async(text, text_type="transcript"):
     """
     Analyzes sentiment and emotion of the given text using LLM.
@@ -238,19 +499,13 @@ async def analyze_sentiment_emotion_async(text, text_type="transcript"):
         'emotion': 'Excited|Serious|...',
         'emotion_confidence': 0-100
     }
+    Unparseable output gets neutral defaults; LLM call errors propagate.
     """
-    try:
-        llm = ChatOllama(
-            model=os.getenv("OLLAMA_MODEL", "gpt-oss:latest"),
-            base_url=os.getenv("OLLAMA_BASE_URL", "http://localhost:11434"),
-            temperature=0.7
-        )
-
-        # Truncate text if too long to save processing
-        if len(text) > 5000:
-            text = text[:5000]
+    # Truncate text if too long to save processing
+    if len(text) > 5000:
+        text = text[:5000]
 
-        prompt = PromptTemplate.from_template("""
+    prompt = PromptTemplate.from_template("""
 Analyze the sentiment and emotion of this {text_type} text. Respond ONLY with valid JSON, no other text.
 
 Expected JSON format:
@@ -258,50 +513,98 @@ Expected JSON format:
 
 Text:
 {text}
-        """)
+    """)
 
-        response = await llm.ainvoke(
-            prompt.format(text=text, text_type=text_type)
-        )
+    # Only well-formed answers are cached, so a retry can get a better one
+    response = await llm_client.ainvoke(
+        prompt.format(text=text, text_type=text_type),
+        temperature=0.7,
+        validate=lambda text: _json_response(text, r'\{.*\}', dict) is not None
+    )
 
-        # Parse JSON response
-        response_text = response.content.strip()
-        # Extract JSON from response (in case it has extra text)
-        json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
-        if json_match:
-            result = json.loads(json_match.group())
-            # Ensure sentiment_score is present and valid
-            if 'sentiment_score' not in result or not isinstance(result.get('sentiment_score'), (int, float)):
-                result['sentiment_score'] = 50
-            else:
-                result['sentiment_score'] = max(0, min(100, int(result['sentiment_score'])))
-            return result
-        else:
-            # Fallback if JSON parsing fails
-            return {
-                'sentiment': 'Neutral',
-                'sentiment_score': 50,
-                'emotion': 'Informative',
-                'emotion_confidence': 50
-            }
+    # Extract JSON from response (in case it has extra text)
+    result = _json_response(response.content.strip(), r'\{.*\}', dict)
+    if result is not None:
+        return _normalize_sentiment(result)
+    # Fallback if JSON parsing fails
+    return dict(SENTIMENT_FALLBACK)
 
-    except Exception as e:
-        print(f"Sentiment analysis error: {e}")
-        # Return default values if analysis fails
-        return {
-            'sentiment': 'Neutral',
-            'sentiment_score': 50,
-            'emotion': 'Informative',
-            'emotion_confidence': 50
+
+def analyze_sentiment_emotion(text, text_type="transcript"):
+    return llm_client.run(analyze_sentiment_emotion_async(text, text_type))
+
+
+def _score(value, default=50):
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return max(0, min(100, int(value)))
+    return default
+
+
+def _aggregate_sentiment(segments, results):
+    """
+    Combines per-segment results into one episode-level sentiment: the label
+    and emotion covering most of the episode, each scored by the mean of the
+    segments that agree with it.
+    Returns: (sentiment, timeline)
+    """
+    timeline = []
+    label_weights, emotion_weights = Counter(), Counter()
+    for segment, result in zip(segments, results):
+        entry = {
+            'start': segment['start'],
+            'end': segment['end'],
+            **{key: segment[key] for key in ('start_time', 'end_time') if key in segment},
+            # Labels end up in CSS class names, so only known ones are kept
+            **_normalize_sentiment(result)
         }
+        weight = max(entry['end'] - entry['start'], 1)
+        label_weights[entry['sentiment']] += weight
+        emotion_weights[entry['emotion']] += weight
+        timeline.append(entry)
+
+    def agreeing_mean(field, key, value):
+        scores = [
+            (t[field], max(t['end'] - t['start'], 1)) for t in timeline if t[key] == value
+        ]
+        return round(sum(score * w for score, w in scores) / sum(w for _, w in scores))
+
+    sentiment = label_weights.most_common(1)[0][0]
+    emotion = emotion_weights.most_common(1)[0][0]
+    return {
+        'sentiment': sentiment,
+        'sentiment_score': agreeing_mean('sentiment_score', 'sentiment', sentiment),
+        'emotion': emotion,
+        'emotion_confidence': agreeing_mean('emotion_confidence', 'emotion', emotion)
+    }, timeline
 
 
-def analyze_sentiment_emotion(text, text_type="transcript"):
-    return asyncio.run(analyze_sentiment_emotion_async(text, text_type))
+async def analyze_transcript_sentiment_async(segments):
+    """
+    Whole-episode sentiment: each segment (see _analysis_segments) is analyzed
+    concurrently and the results aggregated by how much of the episode they cover.
+    Returns: (sentiment, timeline) where timeline is a list of per-segment
+    {'start', 'end', ['start_time', 'end_time'], 'sentiment', 'sentiment_score',
+    'emotion', 'emotion_confidence'}
+    """
+    if not segments:
+        return dict(SENTIMENT_FALLBACK), []
+    text_type = "podcast section notes" if segments[0]['source'] == 'notes' else "transcript excerpt"
+    results = await asyncio.gather(*(
+        analyze_sentiment_emotion_async(segment['text'], text_type) for segment in segments
+    ))
+    return _aggregate_sentiment(segments, results)
 
 
 # -------------------- Accuracy Calculation --------------------
 
+def _parse_score(text):
+    """Returns: the 0-100 score a rating response starts with, or None"""
+    digits = ''.join(filter(str.isdigit, (text or '').strip()[:3]))
+    if not digits:
+        return None
+    return max(0, min(100, int(digits)))
+
+
 async def calculate_accuracy_scores_async(full_text, summary):
     """
     Calculates transcription and summary confidence scores using LLM.
@@ -309,99 +612,84 @@ async def calculate_accuracy_scores_async(full_text, summary):
         'transcription_confidence': 0-100,
         'summary_confidence': 0-100
     }
+    A rating without a number scores 50; LLM call errors propagate.
     """
-    try:
-        llm = ChatOllama(
-            model=os.getenv("OLLAMA_MODEL", "gpt-oss:latest"),
-            base_url=os.getenv("OLLAMA_BASE_URL", "http://localhost:11434"),
-            temperature=0.5
-        )
-
-        # Truncate text if too long
-        analysis_text = full_text if len(full_text) <= 3000 else full_text[:3000]
+    # Truncate text if too long
+    analysis_text = full_text if len(full_text) <= 3000 else full_text[:3000]
 
-        transcription_prompt = PromptTemplate.from_template("""
+    transcription_prompt = PromptTemplate.from_template("""
 Rate the quality and completeness of this transcript (0-100). Consider grammar, punctuation, sentence structure, and comprehensiveness.
 Respond with ONLY a number 0-100, nothing else.
 
 Transcript:
 {text}
-        """)
+    """)
 
-        trans_response = await llm.ainvoke(
-            transcription_prompt.format(text=analysis_text)
-        )
-
-        # Parse transcription confidence
-        trans_score = 50  # default
-        try:
-            trans_score = int(''.join(filter(str.isdigit, trans_response.content.strip()[:3])))
-            trans_score = max(0, min(100, trans_score))
-        except:
-            pass
-
-        # Summary confidence
-        summary_prompt = PromptTemplate.from_template("""
+    # Summary confidence
+    summary_prompt = PromptTemplate.from_template("""
 Rate how well this summary captures the original transcript content (0-100). Consider completeness, accuracy, and relevance.
 Respond with ONLY a number 0-100, nothing else.
 
 Summary:
 {summary}
-        """)
-
-        summary_response = await llm.ainvoke(
-            summary_prompt.format(summary=summary if len(summary) <= 2000 else summary[:2000])
+    """)
+
+    # The two ratings are independent, so ask for both at once
+    is_score = lambda text: _parse_score(text) is not None
+    trans_response, summary_response = await asyncio.gather(
+        llm_client.ainvoke(transcription_prompt.format(text=analysis_text), temperature=0.5, validate=is_score),
+        llm_client.ainvoke(
+            summary_prompt.format(summary=summary if len(summary) <= 2000 else summary[:2000]),
+            temperature=0.5,
+            validate=is_score
         )
+    )
 
-        # Parse summary confidence
-        summary_score = 50  # default
-        try:
-            summary_score = int(''.join(filter(str.isdigit, summary_response.content.strip()[:3])))
-            summary_score = max(0, min(100, summary_score))
-        except:
-            pass
-
-        return {
-            'transcription_confidence': trans_score,
-            'summary_confidence': summary_score
-        }
-
-    except Exception as e:
-        print(f"Accuracy calculation error: {e}")
-        # Return default values
-        return {
-            'transcription_confidence': 70,
-            'summary_confidence': 70
-        }
+    trans_score = _parse_score(trans_response.content)
+    summary_score = _parse_score(summary_response.content)
+    return {
+        'transcription_confidence': 50 if trans_score is None else trans_score,
+        'summary_confidence': 50 if summary_score is None else summary_score
+    }
 
 
 def calculate_accuracy_scores(full_text, summary):
-    return asyncio.run(calculate_accuracy_scores_async(full_text, summary))
+    return llm_client.run(calculate_accuracy_scores_async(full_text, summary))
 
 
 # -------------------- Topic Detection & Q&A Generation --------------------
 
-def generate_topics_qa(full_text):
+def _normalize_topics(topics):
+    """Keeps up to 5 well-formed topics with up to 2 Q&A pairs each."""
+    valid_topics = []
+    for t in topics[:5]:
+        if isinstance(t, dict) and 'topic' in t and 'questions' in t:
+            valid_qs = []
+            for q in t['questions'][:2]:
+                if isinstance(q, dict) and 'q' in q and 'a' in q:
+                    valid_qs.append({'q': str(q['q']), 'a': str(q['a'])})
+            if valid_qs:
+                valid_topics.append({'topic': str(t['topic']), 'questions': valid_qs})
+    return valid_topics
+
+
+async def generate_topics_qa_async(full_text, segments=None):
     """
-    Extracts key topics from the transcript and generates related Q&A pairs.
+    Extracts key topics from the whole episode (`segments`, see
+    _analysis_segments) and generates related Q&A pairs.
     Returns: list of { 'topic': str, 'questions': [{'q': str, 'a': str}] }
+    (empty if the output can't be parsed); LLM call errors propagate.
     """
-    try:
-        if not full_text or len(full_text) < 100:
-            return []
-
-        llm = ChatOllama(
-            model=os.getenv("OLLAMA_MODEL", "gpt-oss:latest"),
-            base_url=os.getenv("OLLAMA_BASE_URL", "http://localhost:11434"),
-            temperature=0.5
-        )
+    if not full_text or len(full_text) < 100:
+        return []
 
-        # Truncate for manageable processing
-        analysis_text = full_text if len(full_text) <= 5000 else full_text[:5000]
+    # Sections from across the episode, sized for one prompt
+    analysis_text = _coverage_text(segments or _analysis_segments(full_text))
 
-        prompt = PromptTemplate.from_template("""
+    prompt = PromptTemplate.from_template("""
 Analyze this podcast transcript and extract exactly 5 key topics discussed.
 For each topic, generate 2 relevant questions and their answers based ONLY on the transcript.
+The transcript is given as excerpts (or notes) from consecutive sections of the whole episode, each labelled with its position.
 
 Transcript:
 {text}
@@ -410,294 +698,773 @@ Respond ONLY with valid JSON in this EXACT format, no other text:
 [{{
     "topic": "Topic Name",
     "questions": [
-        {{"q": "Question 1?", "a": "Answer 1"}},
-        {{"q": "Question 2?", "a": "Answer 2"}}
+    {{"q": "Question 1?", "a": "Answer 1"}},
+    {{"q": "Question 2?", "a": "Answer 2"}}
     ]
 }}]
-        """)
+    """)
 
-        response = llm.invoke(prompt.format(text=analysis_text))
-        response_text = response.content.strip()
-
-        # Extract JSON array from response
-        json_match = re.search(r'\[.*\]', response_text, re.DOTALL)
-        if json_match:
-            topics = json.loads(json_match.group())
-            # Validate structure
-            valid_topics = []
-            for t in topics[:5]:
-                if isinstance(t, dict) and 'topic' in t and 'questions' in t:
-                    valid_qs = []
-                    for q in t['questions'][:2]:
-                        if isinstance(q, dict) and 'q' in q and 'a' in q:
-                            valid_qs.append({'q': str(q['q']), 'a': str(q['a'])})
-                    if valid_qs:
-                        valid_topics.append({'topic': str(t['topic']), 'questions': valid_qs})
-            return valid_topics
+    response = await llm_client.ainvoke(
+        prompt.format(text=analysis_text),
+        temperature=0.5,
+        validate=lambda text: bool(_normalize_topics(_json_response(text, r'\[.*\]', list) or []))
+    )
 
-        return []
+    # Extract JSON array from response and validate its structure
+    return _normalize_topics(_json_response(response.content.strip(), r'\[.*\]', list) or [])
+
+
+def generate_topics_qa(full_text, segments=None):
+    return llm_client.run(generate_topics_qa_async(full_text, segments))
+
+
+def _locate_topics(video_id, topics):
+    """Adds 'start' (seconds) to each topic from the best-matching transcript chunk, when timed."""
+    for topic in topics:
+        text = ' '.join([topic['topic']] + [q['q'] + ' ' + q['a'] for q in topic['questions']])
+        start = chat_service.locate(video_id, text)
+        if start is not None:
+            topic['start'] = start
+    return topics
+
+
+# -------------------- Fused Analysis --------------------
+
+# ANALYSIS_FUSED=1 asks for per-section and summary sentiment, accuracy and
+# topics in one schema-constrained call instead of a prompt per section plus
+# four more. The per-section sentiments build the sentiment timeline
+FUSED_ANALYSIS = os.getenv("ANALYSIS_FUSED", "0") == "1"
+
+_SENTIMENT_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'sentiment': {'type': 'string', 'enum': list(SENTIMENT_LABELS)},
+        'sentiment_score': {'type': 'integer', 'minimum': 0, 'maximum': 100},
+        'emotion': {'type': 'string', 'enum': list(EMOTION_LABELS)},
+        'emotion_confidence': {'type': 'integer', 'minimum': 0, 'maximum': 100}
+    },
+    'required': ['sentiment', 'sentiment_score', 'emotion', 'emotion_confidence']
+}
+
+FUSED_ANALYSIS_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'section_sentiments': {'type': 'array', 'items': _SENTIMENT_SCHEMA},
+        'summary_sentiment': _SENTIMENT_SCHEMA,
+        'transcription_confidence': {'type': 'integer', 'minimum': 0, 'maximum': 100},
+        'summary_confidence': {'type': 'integer', 'minimum': 0, 'maximum': 100},
+        'topics': {
+            'type': 'array',
+            'items': {
+                'type': 'object',
+                'properties': {
+                    'topic': {'type': 'string'},
+                    'questions': {
+                        'type': 'array',
+                        'items': {
+                            'type': 'object',
+                            'properties': {'q': {'type': 'string'}, 'a': {'type': 'string'}},
+                            'required': ['q', 'a']
+                        }
+                    }
+                },
+                'required': ['topic', 'questions']
+            }
+        }
+    },
+    'required': [
+        'section_sentiments', 'summary_sentiment',
+        'transcription_confidence', 'summary_confidence', 'topics'
+    ]
+}
+
+# Record fields a complete fused answer provides
+FUSED_ANALYSIS_FIELDS = {
+    'transcript_sentiment', 'sentiment_timeline', 'summary_sentiment',
+    'transcription_confidence', 'summary_confidence', 'topics'
+}
+
+FUSED_ANALYSIS_PROMPT = PromptTemplate.from_template("""
+Analyze this podcast transcript and its summary. Respond ONLY with JSON matching the requested schema.
+The transcript is given as excerpts (or notes) from consecutive sections of the whole episode, each labelled with its position.
+
+- section_sentiments: for each of the {sections} labelled transcript sections, in order, its sentiment (Positive|Negative|Neutral), sentiment_score (0-100), dominant emotion (Excited|Serious|Motivational|Sad|Informative|Angry|Neutral) and emotion_confidence (0-100).
+- summary_sentiment: the same four fields for the summary.
+- transcription_confidence: quality and completeness of the transcript (0-100), considering grammar, punctuation, sentence structure, and comprehensiveness.
+- summary_confidence: how well the summary captures the transcript content (0-100), considering completeness, accuracy, and relevance.
+- topics: exactly 5 key topics discussed, each with 2 relevant questions and their answers based ONLY on the transcript.
+
+Transcript:
+{text}
+
+Summary:
+{summary}
+""")
 
-    except Exception as e:
-        print(f"Topic detection error: {e}")
-        return []
 
-# -------------------- PDF Generation --------------------
+def _is_sentiment(value):
+    return isinstance(value, dict) and isinstance(value.get('sentiment'), str) and isinstance(value.get('emotion'), str)
 
-def generate_pdf(video_id, record):
+
+def _parse_fused_analysis(response_text, full_text, segments):
     """
-    Generates a PDF with summary, sentiment analysis, and accuracy scores.
-    Returns: BytesIO object containing the PDF
+    Validates each field of a fused analysis response independently.
+    Section sentiments only count with one per segment; they become the
+    transcript sentiment and timeline.
+    Returns: {field: value} for the fields that are usable; anything missing
+    or malformed is left out so the caller can fall back for just that field.
     """
+    json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
+    if not json_match:
+        return {}
     try:
-        pdf_buffer = BytesIO()
-        doc = SimpleDocTemplate(pdf_buffer, pagesize=letter,
-                                rightMargin=72, leftMargin=72,
-                                topMargin=72, bottomMargin=18)
-
-        # Container for PDF elements
-        elements = []
-        styles = getSampleStyleSheet()
-
-        # Custom styles
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=24,
-            textColor=colors.HexColor('#4E7FFF'),
-            spaceAfter=30,
-            alignment=1  # center
+        data = json.loads(json_match.group())
+    except ValueError:
+        return {}
+    if not isinstance(data, dict):
+        return {}
+
+    fields = {}
+    sections = data.get('section_sentiments')
+    if segments and isinstance(sections, list) and len(sections) == len(segments) \
+            and all(_is_sentiment(value) for value in sections):
+        fields['transcript_sentiment'], fields['sentiment_timeline'] = _aggregate_sentiment(segments, sections)
+
+    value = data.get('summary_sentiment')
+    if _is_sentiment(value):
+        fields['summary_sentiment'] = _normalize_sentiment(value)
+
+    for key in ('transcription_confidence', 'summary_confidence'):
+        value = data.get(key)
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            fields[key] = max(0, min(100, int(value)))
+
+    topics = data.get('topics')
+    if isinstance(topics, list):
+        topics = _normalize_topics(topics)
+        # Too-short transcripts legitimately have no topics
+        if topics or len(full_text or '') < 100:
+            fields['topics'] = topics
+    return fields
+
+
+async def fused_analysis_async(full_text, summary, segments=None):
+    """
+    Sentiment (per section and of the summary), accuracy and topics in a
+    single JSON-schema-constrained call.
+    Returns: the usable analysis fields ({} if the call was rejected, e.g. an
+    Ollama without structured output; the separate prompts then run instead).
+    Raises when Ollama is unreachable, so the job is retried.
+    """
+    segments = segments or _analysis_segments(full_text)
+    try:
+        response = await llm_client.ainvoke(
+            FUSED_ANALYSIS_PROMPT.format(
+                text=_coverage_text(segments),
+                sections=len(segments),
+                summary=summary if len(summary) <= 2000 else summary[:2000]
+            ),
+            temperature=0.5,
+            format=FUSED_ANALYSIS_SCHEMA,
+            # Partial answers aren't cached; a retry asks again for every field
+            validate=lambda text: _parse_fused_analysis(text, full_text, segments).keys() >= FUSED_ANALYSIS_FIELDS
         )
+        return _parse_fused_analysis(response.content.strip(), full_text, segments)
+    except Exception as e:
+        if llm_unavailable(e):
+            raise
+        print(f"Fused analysis error: {e}")
+        return {}
+
+# -------------------- Transcript Store --------------------
+
+# Summary fields for pages that render a record (everything but the transcript)
+SLIM_FIELDS = {'full_text': 0}
+
+
+def _save_transcript(video_id, text, timing=None):
+    fields = {'text': text, 'created_at': datetime.utcnow()}
+    if timing is not None:
+        fields['timing'] = timing.to_dict()
+    transcripts_collection.update_one({'_id': video_id}, {'$set': fields}, upsert=True)
+
+
+def _save_chunk_notes(video_id, notes, times=None):
+    """Keeps the map-phase chunk notes (and their time ranges) next to the transcript."""
+    fields = {'notes': notes}
+    if times:
+        fields['note_times'] = times
+    transcripts_collection.update_one({'_id': video_id}, {'$set': fields}, upsert=True)
 
-        heading_style = ParagraphStyle(
-            'CustomHeading',
-            parent=styles['Heading2'],
-            fontSize=14,
-            textColor=colors.HexColor('#1F2937'),
-            spaceAfter=12,
-            spaceBefore=12
-        )
 
-        # Title
-        title_text = "Podcast Summary Report"
-        elements.append(Paragraph(title_text, title_style))
-        elements.append(Spacer(1, 0.3*inch))
-
-        # Podcast Title (Video ID)
-        video_url = record.get('video_url', '')
-        if video_url:
-            url_para = Paragraph(f"<b>Podcast URL:</b> {video_url}", styles['Normal'])
-            elements.append(url_para)
-
-        # Date
-        date_str = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        date_para = Paragraph(f"<b>Generated:</b> {date_str}", styles['Normal'])
-        elements.append(date_para)
-        elements.append(Spacer(1, 0.3*inch))
-
-        # Summary Section - extract summary and key takeaways separately
-        summary_text = record.get('summary', 'N/A')
-        
-        # Clean the summary text first
-        summary_text = clean_text(summary_text)
-        
-        summary_part = summary_text
-        key_takeaways = []
-
-        # Try to parse out summary and key takeaways from the markdown-formatted text
-        if '### Summary' in summary_text or '### Key Takeaways' in summary_text or '### सारांश' in summary_text or '### मुख्य' in summary_text or 'Summary' in summary_text or 'Key Takeaways' in summary_text:
-            parsed = parse_summary_sections(summary_text)
-            summary_part = parsed['summary']
-            key_takeaways = parsed['keypoints']
-        
-        if not summary_part:
-            summary_part = summary_text
-
-        elements.append(Paragraph("Summary", heading_style))
-        # Clean HTML-unsafe characters for ReportLab
-        safe_summary = summary_part.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
-        summary_para = Paragraph(safe_summary, styles['BodyText'])
-        elements.append(summary_para)
-        elements.append(Spacer(1, 0.3*inch))
-
-        # Key Takeaways Section
-        if key_takeaways:
-            elements.append(Paragraph("Key Takeaways", heading_style))
-            bullet_style = ParagraphStyle(
-                'BulletStyle',
-                parent=styles['BodyText'],
-                bulletIndent=18,
-                leftIndent=36,
-                spaceBefore=4,
-                spaceAfter=4
-            )
-            for takeaway in key_takeaways:
-                safe_takeaway = takeaway.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
-                elements.append(Paragraph(f"• {safe_takeaway}", bullet_style))
-            elements.append(Spacer(1, 0.3*inch))
-
-        # Sentiment & Emotion Section
-        trans_sent = record.get('transcript_sentiment', {})
-        summary_sent = record.get('summary_sentiment', {})
-
-        if trans_sent or summary_sent:
-            elements.append(Paragraph("Sentiment &amp; Emotion Analysis", heading_style))
-
-            sentiment_data = []
-            sentiment_data.append(['Type', 'Sentiment', 'Score', 'Emotion'])
-
-            if trans_sent:
-                sentiment_data.append([
-                    'Transcript',
-                    trans_sent.get('sentiment', 'N/A'),
-                    f"{trans_sent.get('sentiment_score', 0)}%",
-                    trans_sent.get('emotion', 'N/A')
-                ])
-
-            if summary_sent:
-                sentiment_data.append([
-                    'Summary',
-                    summary_sent.get('sentiment', 'N/A'),
-                    f"{summary_sent.get('sentiment_score', 0)}%",
-                    summary_sent.get('emotion', 'N/A')
-                ])
-
-            # Use dynamic column widths based on available page width
-            avail_width = letter[0] - 144  # page width minus margins (72+72)
-            col_count = len(sentiment_data[0])
-            col_w = avail_width / col_count
-
-            # Wrap cell content in Paragraphs for text wrapping
-            cell_style = ParagraphStyle('CellStyle', parent=styles['Normal'], fontSize=9, alignment=1)
-            header_cell_style = ParagraphStyle('HeaderCellStyle', parent=styles['Normal'], fontSize=10,
-                                               alignment=1, textColor=colors.whitesmoke)
-            wrapped_data = []
-            for row_idx, row in enumerate(sentiment_data):
-                style = header_cell_style if row_idx == 0 else cell_style
-                wrapped_data.append([Paragraph(str(cell), style) for cell in row])
-
-            sentiment_table = Table(wrapped_data, colWidths=[col_w] * col_count)
-            sentiment_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#4E7FFF')),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('TOPPADDING', (0, 0), (-1, -1), 8),
-                ('BOTTOMPADDING', (0, 1), (-1, -1), 8),
-                ('LEFTPADDING', (0, 0), (-1, -1), 6),
-                ('RIGHTPADDING', (0, 0), (-1, -1), 6),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black)
-            ]))
-
-            elements.append(sentiment_table)
-            elements.append(Spacer(1, 0.3*inch))
-
-        # Accuracy Section
-        trans_acc = record.get('transcription_confidence', 0)
-        summary_acc = record.get('summary_confidence', 0)
-
-        if trans_acc or summary_acc:
-            elements.append(Paragraph("Analysis Accuracy", heading_style))
-
-            accuracy_data = []
-            accuracy_data.append(['Type', 'Confidence'])
-            accuracy_data.append(['Transcription', f"{trans_acc}%"])
-            accuracy_data.append(['Summary', f"{summary_acc}%"])
-
-            # Dynamic column widths for accuracy table
-            avail_width = letter[0] - 144
-            acc_col_count = len(accuracy_data[0])
-            acc_col_w = avail_width / acc_col_count
-
-            # Wrap cell content in Paragraphs
-            acc_cell_style = ParagraphStyle('AccCellStyle', parent=styles['Normal'], fontSize=9, alignment=1)
-            acc_header_style = ParagraphStyle('AccHeaderStyle', parent=styles['Normal'], fontSize=10,
-                                               alignment=1, textColor=colors.whitesmoke)
-            wrapped_acc = []
-            for row_idx, row in enumerate(accuracy_data):
-                style = acc_header_style if row_idx == 0 else acc_cell_style
-                wrapped_acc.append([Paragraph(str(cell), style) for cell in row])
-
-            accuracy_table = Table(wrapped_acc, colWidths=[acc_col_w] * acc_col_count)
-            accuracy_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#4E7FFF')),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('TOPPADDING', (0, 0), (-1, -1), 8),
-                ('BOTTOMPADDING', (0, 1), (-1, -1), 8),
-                ('LEFTPADDING', (0, 0), (-1, -1), 6),
-                ('RIGHTPADDING', (0, 0), (-1, -1), 6),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black)
-            ]))
-
-            elements.append(accuracy_table)
-
-        # Build PDF
-        doc.build(elements)
-        pdf_buffer.seek(0)
-        return pdf_buffer
+def _load_analysis_segments(video_id, full_text):
+    """Whole-episode analysis segments from the stored notes and timing (see _analysis_segments)."""
+    doc = transcripts_collection.find_one({'_id': video_id}, {'notes': 1, 'note_times': 1, 'timing': 1}) or {}
+    return _analysis_segments(
+        full_text,
+        doc.get('notes') or None,
+        doc.get('note_times'),
+        SegmentIndex.from_dict(doc.get('timing'))
+    )
+
+
+def _load_transcript(video_id):
+    """
+    Returns the full transcript text for a video ('' if unknown).
+    Falls back to the legacy inline 'full_text' field for records the
+    startup migration hasn't moved yet.
+    """
+    doc = transcripts_collection.find_one({'_id': video_id}, {'text': 1})
+    if doc:
+        return doc.get('text', '')
+    legacy = summaries_collection.find_one({'video_id': video_id}, {'full_text': 1})
+    return (legacy or {}).get('full_text', '')
+
+
+def _load_timed_transcript(video_id):
+    """Returns: (transcript text, SegmentIndex or None) for a video"""
+    doc = transcripts_collection.find_one({'_id': video_id}, {'text': 1, 'timing': 1})
+    if doc:
+        return doc.get('text', ''), SegmentIndex.from_dict(doc.get('timing'))
+    return _load_transcript(video_id), None
 
+
+# Videos indexed before chat retrieval existed (or under an older chunking)
+# are indexed on first question
+chat_service.transcript_loader = _load_timed_transcript
+
+
+def _run_transcript_migration():
+    try:
+        migrated = migrate_transcripts()
+        if migrated:
+            print(f"[PodcastAI] Moved {migrated} transcript(s) out of the summaries collection.")
     except Exception as e:
-        print(f"PDF generation error: {e}")
-        return None
+        print(f"[PodcastAI] Transcript migration error: {e}")
+
+
+# -------------------- Library Search --------------------
+
+library_search = LibrarySearch(search_postings_collection, search_terms_collection, summaries_collection)
+
+
+def _index_for_search(video_id):
+    record = summaries_collection.find_one({'video_id': video_id}, {'summary': 1, 'topics': 1})
+    if not record or 'summary' not in record:
+        return
+    library_search.index_video(
+        video_id,
+        record['summary'],
+        _load_transcript(video_id),
+        record.get('topics', [])
+    )
+
+
+def _backfill_search_index():
+    """
+    Queues indexing for videos analyzed before library search existed (or
+    an older index format). The search_index job is the only writer, so a
+    video is never indexed twice at once.
+    """
+    queued = 0
+    last = None
+    try:
+        while True:
+            stale = library_search.stale_video_ids(after=last)
+            if not stale:
+                break
+            for video_id in stale:
+                _enqueue_search_index(video_id, only_stale=True)
+                queued += 1
+            last = stale[-1]
+    except Exception as e:
+        print(f"[PodcastAI] Search backfill error: {e}")
+    if queued:
+        print(f"[PodcastAI] Search index: queued {queued} video(s) for backfill.")
+
+
+def _run_startup_maintenance():
+    _run_transcript_migration()
+    _backfill_search_index()
+
 
 # -------------------- Background Analysis --------------------
 
-def _run_background_analysis(video_id, full_text, summary):
+# Order in which background stages advance 'analysis_progress'
+ANALYSIS_STAGES = ['summary_done', 'sentiment_done', 'accuracy_done', 'complete']
+
+# Analysis steps; they run concurrently and each is recorded in 'analysis_done'
+ANALYSIS_STEPS = ['sentiment', 'accuracy', 'topics']
+
+
+def _analysis_stage(done):
+    """Maps the set of finished steps onto the 'analysis_progress' stages."""
+    if done.issuperset(ANALYSIS_STEPS):
+        return 'complete'
+    if {'sentiment', 'accuracy'} <= done:
+        return 'accuracy_done'
+    if 'sentiment' in done:
+        return 'sentiment_done'
+    return 'summary_done'
+
+
+def _analysis_steps_done(record):
+    """Finished steps for a record, including ones stored before 'analysis_done' existed."""
+    if 'analysis_done' in record:
+        return set(record['analysis_done'])
+    progress = record.get('analysis_progress', 'complete')
+    stage = ANALYSIS_STAGES.index(progress) if progress in ANALYSIS_STAGES else 0
+    return set(ANALYSIS_STEPS[:stage])
+
+
+def _analysis_channel(video_id):
+    return f"analysis:{video_id}"
+
+
+progress_watcher = ProgressWatcher(summaries_collection, event_broker, _analysis_channel)
+
+
+def _save_analysis(video_id, fields):
     """
-    Runs sentiment, accuracy, and topic analysis in a background thread.
-    Updates the DB record progressively as each step completes.
+    Stores analysis results and notifies /analysis-stream subscribers. With a
+    change stream open the watcher publishes the update (from any process);
+    otherwise it is published to this process's broker directly.
     """
+    summaries_collection.update_one({'video_id': video_id}, {'$set': fields})
+    if not progress_watcher.active:
+        progress_watcher.publish(video_id, fields)
+
+
+def _build_analysis_graph(video_id, full_text, summary, segments=None, fused=False):
+    """
+    Background analysis as a task graph. Sentiment, accuracy and topics are
+    independent, so their LLM calls overlap; search re-indexing waits for the
+    topics so they become searchable. With `fused`, one combined call runs
+    first and each step only makes its own calls for fields it didn't return.
+    Transcript sentiment (with its timeline) and topics cover the whole
+    episode via `segments`.
+    """
+    fused_fields = {}
+
+    async def fused_analysis():
+        fused_fields.update(await fused_analysis_async(full_text, summary, segments))
+
+    async def sentiment():
+        keys = ('transcript_sentiment', 'sentiment_timeline', 'summary_sentiment')
+        fields = {key: fused_fields[key] for key in keys if key in fused_fields}
+        calls = []
+        if 'transcript_sentiment' not in fields:
+            calls.append(analyze_transcript_sentiment_async(segments))
+        if 'summary_sentiment' not in fields:
+            calls.append(analyze_sentiment_emotion_async(summary, "summary"))
+        results = list(await asyncio.gather(*calls))
+        if 'transcript_sentiment' not in fields:
+            fields['transcript_sentiment'], fields['sentiment_timeline'] = results.pop(0)
+        if 'summary_sentiment' not in fields:
+            fields['summary_sentiment'] = results.pop(0)
+        return fields
+
+    async def accuracy():
+        keys = ('transcription_confidence', 'summary_confidence')
+        if all(key in fused_fields for key in keys):
+            return {key: fused_fields[key] for key in keys}
+        scores = await calculate_accuracy_scores_async(full_text, summary)
+        return {key: fused_fields.get(key, scores[key]) for key in keys}
+
+    async def topics():
+        if 'topics' in fused_fields:
+            found = fused_fields['topics']
+        else:
+            found = await generate_topics_qa_async(full_text, segments)
+        # Timestamp each topic for jumping to it in the video
+        found = await asyncio.get_running_loop().run_in_executor(None, _locate_topics, video_id, found)
+        return {'topics': found}
+
+    async def search_index():
+        await asyncio.get_running_loop().run_in_executor(None, _enqueue_search_index, video_id)
+
+    graph = TaskGraph()
+    steps_after = []
+    if fused:
+        graph.add('fused', fused_analysis)
+        steps_after = ['fused']
+    graph.add('sentiment', sentiment, after=steps_after)
+    graph.add('accuracy', accuracy, after=steps_after)
+    graph.add('topics', topics, after=steps_after)
+    graph.add('search_index', search_index, after=['topics'])
+    return graph
+
+
+def _run_background_analysis(payload):
+    """
+    Runs sentiment, accuracy, and topic analysis as a queued job.
+    The steps run concurrently on the shared LLM loop and each one's results
+    are stored (and streamed) as soon as it finishes. Steps already recorded in
+    'analysis_done' are skipped, so a job resumed after a crash picks up where
+    it left off. Errors propagate so the queue can retry.
+    """
+    video_id = payload['video_id']
+    record = summaries_collection.find_one(
+        {'video_id': video_id},
+        {'summary': 1, 'analysis_progress': 1, 'analysis_done': 1}
+    )
+    if not record:
+        print(f"[PodcastAI] [{video_id}] Background: record not found, skipping.")
+        return
+
+    full_text = _load_transcript(video_id)
+    segments = _load_analysis_segments(video_id, full_text)
+    summary = record.get('summary', '')
+    done = _analysis_steps_done(record)
+    if done.issuperset(ANALYSIS_STEPS):
+        return
+
+    def on_done(step, result, seconds):
+        if step not in ANALYSIS_STEPS:
+            return
+        done.add(step)
+        stage = _analysis_stage(done)
+        fields = dict(result)
+        fields.update({
+            'analysis_done': sorted(done),
+            'analysis_progress': stage,
+            'analysis_updated_at': datetime.utcnow(),
+            f'timings.{step}': round(seconds, 2)
+        })
+        if stage == 'complete':
+            fields['completed_at'] = datetime.utcnow()
+        _save_analysis(video_id, fields)
+        print(f"[PodcastAI] [{video_id}] Background: {step} complete ({seconds:.1f}s).")
+        if stage == 'complete':
+            # The report's sentiment and accuracy tables are final now
+            _enqueue_pdf(video_id)
+
+    pending = [step for step in ANALYSIS_STEPS if step not in done]
+    # A combined call only pays off when more than one step is left
+    fused = FUSED_ANALYSIS and len(pending) > 1
+    print(f"[PodcastAI] [{video_id}] Background: Running {', '.join(pending)}{' (fused)' if fused else ''}...")
+    graph = _build_analysis_graph(video_id, full_text, summary, segments, fused)
+    llm_client.run(graph.run(done=set(done), on_done=on_done))
+    print(f"[PodcastAI] [{video_id}] Background: \u2705 All analysis complete.")
+
+
+def _give_up_background_analysis(payload, error):
+    """Marks analysis complete once retries are exhausted so the UI stops waiting."""
+    video_id = payload['video_id']
+    print(f"[PodcastAI] [{video_id}] Background analysis error: {error}")
+    _save_analysis(video_id, {'analysis_progress': 'complete', 'completed_at': datetime.utcnow()})
+    _enqueue_pdf(video_id)
+
+
+def _enqueue_analysis(video_id):
+    job_queue.enqueue('analysis', {'video_id': video_id}, key=f"analysis:{video_id}")
+
+
+def _resume_incomplete_analyses():
+    """Re-queues analysis for records left unfinished by a previous process."""
     try:
-        # Step 1: Sentiment analysis
-        print(f"[PodcastAI] [{video_id}] Background: Starting sentiment analysis...")
-        transcript_sentiment = analyze_sentiment_emotion(full_text, "transcript")
-        summary_sentiment = analyze_sentiment_emotion(summary, "summary")
-        summaries_collection.update_one(
-            {'video_id': video_id},
-            {'$set': {
-                'transcript_sentiment': transcript_sentiment,
-                'summary_sentiment': summary_sentiment,
-                'analysis_progress': 'sentiment_done'
-            }}
+        pending = summaries_collection.find(
+            {'analysis_progress': {'$in': ANALYSIS_STAGES[:-1]}},
+            {'video_id': 1}
         )
-        print(f"[PodcastAI] [{video_id}] Background: Sentiment analysis complete.")
+        for record in pending:
+            _enqueue_analysis(record['video_id'])
+    except Exception as e:
+        print(f"[PodcastAI] Could not resume pending analyses: {e}")
 
-        # Step 2: Accuracy scores
-        print(f"[PodcastAI] [{video_id}] Background: Calculating accuracy scores...")
-        accuracy_scores = calculate_accuracy_scores(full_text, summary)
-        summaries_collection.update_one(
-            {'video_id': video_id},
-            {'$set': {
-                'transcription_confidence': accuracy_scores['transcription_confidence'],
-                'summary_confidence': accuracy_scores['summary_confidence'],
-                'analysis_progress': 'accuracy_done'
-            }}
-        )
-        print(f"[PodcastAI] [{video_id}] Background: Accuracy scores complete.")
 
-        # Step 3: Topic detection + Q&A
-        print(f"[PodcastAI] [{video_id}] Background: Generating topics...")
-        topics = generate_topics_qa(full_text)
-        summaries_collection.update_one(
-            {'video_id': video_id},
-            {'$set': {
-                'topics': topics,
-                'analysis_progress': 'complete'
-            }}
+job_queue = JobQueue(jobs_collection)
+worker_pool = WorkerPool(job_queue)
+worker_pool.register('analysis', _run_background_analysis, on_give_up=_give_up_background_analysis)
+
+
+_workers_started = False
+_workers_lock = threading.Lock()
+
+
+def start_workers():
+    """
+    Starts the job workers, progress watcher and startup maintenance in this
+    process (once). Called by the serving process, not on import, so e.g. the
+    debug reloader's watcher process doesn't run jobs nobody is streaming.
+    """
+    global _workers_started
+    with _workers_lock:
+        if _workers_started:
+            return
+        _workers_started = True
+    worker_pool.start()
+    progress_watcher.start()
+    threading.Thread(target=_run_startup_maintenance, name="startup-maintenance", daemon=True).start()
+    _resume_incomplete_analyses()
+
+
+class SummaryError(Exception):
+    """Raised when a summary can't be produced (no captions); the message is shown to the user."""
+
+
+class SummaryUnavailable(Exception):
+    """Raised when the LLM failed (Ollama down or unreachable); the job queue retries with backoff."""
+
+
+# Sentences in the extractive pre-summary shown while the LLM summary runs (0 disables)
+DRAFT_SUMMARY_SENTENCES = int(os.getenv("DRAFT_SUMMARY_SENTENCES", "5"))
+
+
+def _save_draft_summary(video_id, sentences):
+    """Stores the provisional summary on the in-progress record for page loads."""
+    summaries_collection.update_one(
+        {'video_id': video_id, 'summary': {'$exists': False}},
+        {'$set': {'draft_summary': sentences}}
+    )
+
+
+def _build_summary_record(video_id, youtube_url, on_event=None):
+    """
+    Fetches captions and runs the map-reduce summary for a new video.
+    Returns the fields stored on the summary record.
+    """
+    if on_event:
+        on_event('status', {'stage': 'fetching'})
+    started = time.monotonic()
+    content_data = fetch_available_captions(youtube_url)
+    if not content_data:
+        raise SummaryError("Could not fetch captions/audio. Check URL or try again.")
+
+    full_text = content_data['text']
+    timing = content_data.get('timing')
+    _save_transcript(video_id, full_text, timing)
+    if DRAFT_SUMMARY_SENTENCES:
+        draft = extractive_summary(full_text, DRAFT_SUMMARY_SENTENCES)
+        if draft:
+            _save_draft_summary(video_id, draft)
+            if on_event:
+                on_event('draft', {'sentences': draft})
+    chat_service.index_transcript(video_id, full_text, timing)
+    _enqueue_embedding(video_id)
+    timings = {'fetch': round(time.monotonic() - started, 2)}
+
+    # Generate summary ONLY (the user sees this immediately)
+    print(f"[PodcastAI] [{video_id}] Generating summary...")
+    started = time.monotonic()
+    map_notes = {}
+    raw_summary = generate_distributed_summary(
+        full_text, on_event,
+        on_notes=lambda notes, times: map_notes.update(notes=notes, times=times),
+        video_id=video_id, timing=timing
+    )
+    timings['summarize'] = round(time.monotonic() - started, 2)
+    if map_notes.get('notes'):
+        _save_chunk_notes(video_id, map_notes['notes'], map_notes['times'])
+
+    if not raw_summary:
+        raise SummaryUnavailable("Summary generation failed. Make sure Ollama is running (ollama serve).")
+
+    print(f"[PodcastAI] [{video_id}] Summary ready.")
+    summary = clean_text(raw_summary)
+    return {
+        'summary': summary,
+        'summary_sections': summary_sections(summary),
+        'analysis_progress': 'summary_done',
+        'timings': timings
+    }
+
+
+summary_flight = SingleFlight(summaries_collection)
+
+
+def _summary_channel(video_id):
+    return f"summary:{video_id}"
+
+
+def _run_summary_job(payload):
+    """
+    Produces the summary for a submitted video, streaming progress to any
+    /summary-stream subscribers. Only one pipeline runs per video even across
+    processes (see SingleFlight).
+    """
+    video_id = payload['video_id']
+    channel = _summary_channel(video_id)
+    # Events of an earlier, finished job for this video aren't replayed
+    event_broker.reopen(channel)
+
+    def publish(event, data):
+        event_broker.publish(channel, event, data)
+
+    try:
+        status, record = summary_flight.run(
+            video_id,
+            lambda: _build_summary_record(video_id, payload['video_url'], publish),
+            placeholder={'video_url': payload['video_url'], 'created_at': datetime.utcnow()}
         )
-        print(f"[PodcastAI] [{video_id}] Background: \u2705 All analysis complete.")
+    except SummaryError as e:
+        # Not retryable (no captions): report it and finish the job
+        publish('error', {'message': str(e)})
+        event_broker.close(channel)
+        return
+    except SummaryUnavailable:
+        # Transient: the queue retries with backoff, and gives up via _give_up_summary_job
+        publish('status', {'stage': 'retrying'})
+        raise
+
+    if status == 'failed':
+        publish('error', {'message': "\u274c Summary generation failed. Please try again."})
+        event_broker.close(channel)
+        return
+    publish('done', {'summary': record['summary']})
+    event_broker.close(channel)
+    _enqueue_search_index(video_id)
+
+    if record.get('analysis_progress') != 'complete':
+        _enqueue_analysis(video_id)
+
+
+def _give_up_summary_job(payload, error):
+    """Drops the reserved record so the video can be resubmitted."""
+    video_id = payload['video_id']
+    summaries_collection.delete_one({'video_id': video_id, 'summary': {'$exists': False}})
+    message = f"\u274c {error}" if isinstance(error, SummaryUnavailable) else "\u274c Summary generation failed. Please try again."
+    event_broker.publish(_summary_channel(video_id), 'error', {'message': message})
+    event_broker.close(_summary_channel(video_id))
+
+
+# Interactive submissions jump ahead of batch ingestion, which jumps ahead of
+# background analysis
+SUMMARY_PRIORITY = 10
+BATCH_SUMMARY_PRIORITY = 5
+
+
+def _enqueue_summary(video_id, youtube_url, priority=SUMMARY_PRIORITY):
+    job_queue.enqueue(
+        'summary',
+        {'video_id': video_id, 'video_url': youtube_url},
+        key=f"summary:{video_id}",
+        priority=priority
+    )
 
-    except Exception as e:
-        print(f"[PodcastAI] [{video_id}] Background analysis error: {e}")
+
+def _submit_video(video_id, youtube_url, priority=SUMMARY_PRIORITY):
+    """
+    Queues the summary for a video unless it already has one (in which case
+    any unfinished analysis is re-queued).
+    Returns: True if a summary was queued
+    """
+    record = summaries_collection.find_one(
+        {'video_id': video_id},
+        {'summary': 1, 'analysis_progress': 1}
+    )
+
+    if record and 'summary' in record:
+        # Queue background analysis if it hasn't finished (deduped per video)
+        if record.get('analysis_progress') != 'complete':
+            _enqueue_analysis(video_id)
+        return False
+
+    # Reserve the record so the results page can stream the summary
+    # while a worker produces it (one job per video)
+    try:
         summaries_collection.update_one(
             {'video_id': video_id},
-            {'$set': {'analysis_progress': 'complete'}}
+            {'$setOnInsert': {
+                'video_url': youtube_url,
+                'analysis_progress': 'queued',
+                'created_at': datetime.utcnow()
+            }},
+            upsert=True
         )
+    except DuplicateKeyError:
+        pass
+    # A stream opened before the job starts mustn't replay a previous failure
+    event_broker.reopen(_summary_channel(video_id))
+    _enqueue_summary(video_id, youtube_url, priority)
+    return True
+
+
+batch_ingest = BatchIngest(
+    batches_collection,
+    summaries_collection,
+    lambda video_id, url: _submit_video(video_id, url, BATCH_SUMMARY_PRIORITY)
+)
+
+
+worker_pool.register('summary', _run_summary_job, on_give_up=_give_up_summary_job)
+
+
+def _run_search_index_job(payload):
+    video_id = payload['video_id']
+    # Backfill jobs skip videos another job has already brought up to date
+    if payload.get('only_stale') and library_search.is_current(video_id):
+        return
+    _index_for_search(video_id)
+
+
+def _enqueue_search_index(video_id, only_stale=False):
+    payload = {'video_id': video_id}
+    if only_stale:
+        payload['only_stale'] = True
+    job_queue.enqueue('search_index', payload, key=f"search_index:{video_id}", priority=-5)
+
+
+worker_pool.register('search_index', _run_search_index_job)
+
+
+def _run_embedding_job(payload):
+    """Embeds a video's transcript chunks for semantic chat retrieval."""
+    video_id = payload['video_id']
+    if not chat_service.embed_transcript(video_id):
+        raise RuntimeError("chunk embedding failed")
+    print(f"[PodcastAI] [{video_id}] Chat embeddings ready.")
+
+
+def _enqueue_embedding(video_id):
+    if chat_service.has_embeddings(video_id):
+        return
+    # Chat falls back to BM25 until this runs, so it yields to everything else
+    job_queue.enqueue('embed', {'video_id': video_id}, key=f"embed:{video_id}", priority=-10)
+
+
+worker_pool.register('embed', _run_embedding_job)
+
+
+# Rendered PDF reports, keyed by video and the content of the fields they show
+pdf_cache = PdfCache()
+PDF_PROJECTION = dict.fromkeys(REPORT_FIELDS, 1)
+
+
+def _run_pdf_job(payload):
+    """Pre-renders a finished record's PDF report so its download is a file copy."""
+    video_id = payload['video_id']
+    record = summaries_collection.find_one({'video_id': video_id}, PDF_PROJECTION)
+    if not record or 'summary' not in record or pdf_cache.has(video_id, record):
+        return
+    pdf_cache.render(video_id, record)
+    print(f"[PodcastAI] [{video_id}] PDF report ready.")
+
+
+def _enqueue_pdf(video_id):
+    job_queue.enqueue('pdf', {'video_id': video_id}, key=f"pdf:{video_id}", priority=-5)
+
+
+worker_pool.register('pdf', _run_pdf_job)
+
+# Bulk exports render missing reports in a thread pool and stream a ZIP
+pdf_exporter = PdfExporter(pdf_cache)
+PDF_EXPORT_MAX = int(os.getenv("PDF_EXPORT_MAX", "500"))
+
+
+def _load_report_records(video_ids):
+    """Returns: {video_id: record with the PDF report fields}"""
+    projection = dict(PDF_PROJECTION, video_id=1)
+    return {r['video_id']: r for r in summaries_collection.find({'video_id': {'$in': video_ids}}, projection)}
+
+
+def _export_response(video_ids, name):
+    """Streams a ZIP of the PDF reports for `video_ids` as an attachment."""
+    return Response(
+        stream_with_context(pdf_exporter.stream_zip(video_ids, _load_report_records)),
+        mimetype='application/zip',
+        headers={'Content-Disposition': f'attachment; filename="{name}.zip"', 'X-Accel-Buffering': 'no'}
+    )
 
 
 # -------------------- Routes --------------------
@@ -713,57 +1480,7 @@ def dashboard():
             flash("Invalid YouTube URL", "error")
             return redirect(url_for('home_bp.dashboard'))
 
-        # Check cache first
-        cached = summaries_collection.find_one({'video_id': video_id})
-
-        if cached:
-            # If cached but missing background analysis, kick it off
-            if cached.get('analysis_progress') != 'complete':
-                full_text = cached.get('full_text', '')
-                summary = cached.get('summary', '')
-                if full_text and summary:
-                    thread = threading.Thread(
-                        target=_run_background_analysis,
-                        args=(video_id, full_text, summary),
-                        daemon=True
-                    )
-                    thread.start()
-        else:
-            content_data = fetch_available_captions(youtube_url)
-            if not content_data:
-                flash("Could not fetch captions/audio. Check URL or try again.", "error")
-                return redirect(url_for('home_bp.dashboard'))
-
-            full_text = content_data['text']
-
-            # Generate summary ONLY (the user sees this immediately)
-            print(f"[PodcastAI] [{video_id}] Generating summary...")
-            raw_summary = generate_distributed_summary(full_text)
-
-            if not raw_summary:
-                flash("\u274c Summary generation failed. Make sure Ollama is running (ollama serve).", "error")
-                return redirect(url_for('home_bp.dashboard'))
-
-            summary = clean_text(raw_summary)
-            print(f"[PodcastAI] [{video_id}] Summary ready. Redirecting to results...")
-
-            # Save summary immediately with progress marker
-            summaries_collection.insert_one({
-                'video_id': video_id,
-                'video_url': youtube_url,
-                'summary': summary,
-                'full_text': full_text,
-                'analysis_progress': 'summary_done',
-                'created_at': datetime.utcnow()
-            })
-
-            # Kick off background analysis in a separate thread
-            thread = threading.Thread(
-                target=_run_background_analysis,
-                args=(video_id, full_text, summary),
-                daemon=True
-            )
-            thread.start()
+        _submit_video(video_id, youtube_url)
 
         history_collection.update_one(
             {'user_id': current_user.id, 'video_id': video_id},
@@ -771,7 +1488,7 @@ def dashboard():
             upsert=True
         )
 
-        # Redirect to the results page IMMEDIATELY (summary is ready)
+        # Redirect to the results page IMMEDIATELY (it streams the summary if still running)
         return redirect(url_for('home_bp.results', video_id=video_id))
 
     # --- GET request ---
@@ -794,17 +1511,19 @@ def dashboard():
 @login_required
 def results(video_id):
     """Display analysis results for a specific video."""
-    record = summaries_collection.find_one({'video_id': video_id})
+    record = summaries_collection.find_one({'video_id': video_id}, SLIM_FIELDS)
 
-    if not record or 'summary' not in record:
+    if not record:
         flash("No summary found for this video. Please analyze it first.", "error")
         return redirect(url_for('home_bp.dashboard'))
 
-    summary = record['summary']
+    # Summary still being generated: the page streams it from /summary-stream
+    summary = record.get('summary')
     progress = record.get('analysis_progress', 'complete')
     sentiment_data = {
         'transcript': record.get('transcript_sentiment', {}),
-        'summary': record.get('summary_sentiment', {})
+        'summary': record.get('summary_sentiment', {}),
+        'timeline': record.get('sentiment_timeline', [])
     }
     accuracy_data = {
         'transcription_confidence': record.get('transcription_confidence', 0),
@@ -820,7 +1539,142 @@ def results(video_id):
         sentiment_data=sentiment_data,
         accuracy_data=accuracy_data,
         topics=topics,
-        analysis_progress=progress
+        analysis_progress=progress,
+        streaming=summary is None,
+        draft_summary=record.get('draft_summary', []) if summary is None else []
+    )
+
+
+@home_bp.route('/summary-stream/<video_id>')
+@login_required
+def summary_stream(video_id):
+    """
+    Server-Sent Events stream of summary generation: 'status', 'draft',
+    'chunk' and 'token' events while the pipeline runs, then 'done' (or 'error').
+    """
+    def fetch_state():
+        return summaries_collection.find_one({'video_id': video_id}, {'summary': 1})
+
+    # EventSource sends the last id it saw when reconnecting; resume after it
+    last_seq = request.headers.get('Last-Event-ID', type=int) or 0
+
+    def generate():
+        record = fetch_state()
+        if record and 'summary' in record:
+            yield format_sse('done', {'summary': record['summary']})
+            return
+
+        for item in event_broker.listen(_summary_channel(video_id), last_seq, timeout=SSE_HEARTBEAT_SECONDS):
+            if item is None:
+                # No local events: the pipeline may be running in another
+                # process, so fall back to the stored record
+                record = fetch_state()
+                if not record:
+                    yield format_sse('error', {'message': "\u274c Summary generation failed. Please try again."})
+                    return
+                if 'summary' in record:
+                    yield format_sse('done', {'summary': record['summary']})
+                    return
+                yield ": keep-alive\n\n"
+                continue
+
+            seq, event, data = item
+            yield format_sse(event, data, seq)
+            if event in ('done', 'error'):
+                return
+
+        # Channel closed without a final event reaching us; report stored state
+        record = fetch_state()
+        if record and 'summary' in record:
+            yield format_sse('done', {'summary': record['summary']})
+        else:
+            yield format_sse('error', {'message': "\u274c Summary generation failed. Please try again."})
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
+# Fields needed to report analysis progress (never the transcript)
+ANALYSIS_FIELDS = {
+    '_id': 0, 'analysis_progress': 1, 'analysis_done': 1, 'transcript_sentiment': 1, 'summary_sentiment': 1,
+    'transcription_confidence': 1, 'summary_confidence': 1, 'topics': 1, 'sentiment_timeline': 1
+}
+
+
+def _analysis_payload(fields):
+    """
+    Converts stored analysis fields (a full record or one update) into the
+    shape the results page renders. Only sections present in `fields` are set.
+    """
+    data = {'progress': fields.get('analysis_progress')}
+    if 'transcript_sentiment' in fields or 'summary_sentiment' in fields:
+        data['sentiment'] = {
+            'transcript': fields.get('transcript_sentiment', {}),
+            'summary': fields.get('summary_sentiment', {}),
+            'timeline': fields.get('sentiment_timeline', [])
+        }
+    if 'transcription_confidence' in fields or 'summary_confidence' in fields:
+        data['accuracy'] = {
+            'transcription_confidence': fields.get('transcription_confidence', 0),
+            'summary_confidence': fields.get('summary_confidence', 0)
+        }
+    if 'topics' in fields:
+        data['topics'] = fields['topics']
+    return data
+
+
+@home_bp.route('/analysis-stream/<video_id>')
+@login_required
+def analysis_stream(video_id):
+    """
+    Server-Sent Events stream of background analysis. Sends the current state,
+    then a 'progress' event each time an analysis step finishes, and ends once
+    analysis is complete.
+    """
+    def generate():
+        record = summaries_collection.find_one({'video_id': video_id}, ANALYSIS_FIELDS)
+        if not record:
+            yield format_sse('progress', {'progress': 'not_found'})
+            return
+
+        progress = record.get('analysis_progress', 'complete')
+        steps = record.get('analysis_done')
+        yield format_sse('progress', _analysis_payload(record))
+        if progress == 'complete':
+            return
+
+        # Replays anything published since the snapshot, so no update is missed
+        for item in event_broker.listen(_analysis_channel(video_id), timeout=SSE_HEARTBEAT_SECONDS):
+            if item is None:
+                if not progress_watcher.active:
+                    # Without a change stream, stages finished by another
+                    # process are only visible in the stored record
+                    record = summaries_collection.find_one({'video_id': video_id}, ANALYSIS_FIELDS)
+                    if not record:
+                        return
+                    if record.get('analysis_progress') != progress or record.get('analysis_done') != steps:
+                        progress = record.get('analysis_progress', 'complete')
+                        steps = record.get('analysis_done')
+                        yield format_sse('progress', _analysis_payload(record))
+                        if progress == 'complete':
+                            return
+                        continue
+                yield ": keep-alive\n\n"
+                continue
+
+            seq, event, fields = item
+            progress = fields.get('analysis_progress', progress)
+            yield format_sse(event, _analysis_payload(fields), seq)
+            if progress == 'complete':
+                return
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
     )
 
 
@@ -828,37 +1682,194 @@ def results(video_id):
 @login_required
 def analysis_status(video_id):
     """API endpoint for frontend to poll background analysis progress."""
-    record = summaries_collection.find_one({'video_id': video_id})
+    record = summaries_collection.find_one({'video_id': video_id}, ANALYSIS_FIELDS)
     if not record:
         return jsonify({'progress': 'not_found'}), 404
 
-    progress = record.get('analysis_progress', 'complete')
-    data = {'progress': progress}
+    # Steps can finish in any order, so include whichever sections are stored
+    data = _analysis_payload(record)
+    data['progress'] = record.get('analysis_progress', 'complete')
+    if data['progress'] == 'complete':
+        data.setdefault('topics', [])
+    return jsonify(data)
 
-    # Include completed data sections so the frontend can render them
-    if progress in ('sentiment_done', 'accuracy_done', 'complete'):
-        data['sentiment'] = {
-            'transcript': record.get('transcript_sentiment', {}),
-            'summary': record.get('summary_sentiment', {})
-        }
 
-    if progress in ('accuracy_done', 'complete'):
-        data['accuracy'] = {
-            'transcription_confidence': record.get('transcription_confidence', 0),
-            'summary_confidence': record.get('summary_confidence', 0)
-        }
+@home_bp.route('/search')
+@login_required
+def search():
+    """
+    Library-wide search over every analyzed video's summary, key takeaways,
+    topics and transcript. Query params: q, page (1-based), per_page (max 100).
+    """
+    query = request.args.get('q', '').strip()
+    page = request.args.get('page', 1, type=int)
+    per_page = request.args.get('per_page', 20, type=int)
+    if not query:
+        return jsonify({'error': 'Missing search query (q).'}), 400
+    return jsonify(library_search.search(query, page, per_page))
 
-    if progress == 'complete':
-        data['topics'] = record.get('topics', [])
 
-    return jsonify(data)
+TRANSCRIPT_PREFETCH_MAX = int(os.getenv("TRANSCRIPT_PREFETCH_MAX", "200"))
+
+
+def _run_prefetch_job(payload):
+    """Caches a video's captions ahead of its summary."""
+    if transcript_fetcher.warm(payload['video_id']) == 'error':
+        # Network or rate-limit trouble: the queue retries with backoff
+        raise RuntimeError("transcript fetch failed")
+
+
+def _enqueue_prefetch(video_id):
+    job_queue.enqueue('prefetch', {'video_id': video_id}, key=f"prefetch:{video_id}", priority=-5)
+
+
+worker_pool.register('prefetch', _run_prefetch_job)
+
+
+def _prefetch_ids(videos):
+    """Returns: ({video_id: url or ID}, [unparseable entries])"""
+    video_ids = {}
+    invalid = []
+    for video in videos:
+        video_id = get_video_id(str(video))
+        if video_id:
+            video_ids[video_id] = video
+        else:
+            invalid.append(video)
+    return video_ids, invalid
+
+
+@home_bp.route('/transcripts/prefetch', methods=['POST'])
+@login_required
+def prefetch_transcripts():
+    """
+    Warms the transcript cache for many videos at once. Fetches run as queued
+    jobs; poll status_url for progress.
+    Body: {"videos": [url or video ID, ...]} (at most TRANSCRIPT_PREFETCH_MAX)
+    """
+    data = request.get_json(silent=True) or {}
+    videos = data.get('videos') or []
+    if not isinstance(videos, list) or not videos:
+        return jsonify({'error': 'Provide a non-empty "videos" list.'}), 400
+    if len(videos) > TRANSCRIPT_PREFETCH_MAX:
+        return jsonify({'error': f'At most {TRANSCRIPT_PREFETCH_MAX} videos per request.'}), 400
+
+    video_ids, invalid = _prefetch_ids(videos)
+    for video_id in video_ids:
+        _enqueue_prefetch(video_id)
+    return jsonify({
+        'video_ids': list(video_ids),
+        'invalid': invalid,
+        'status_url': url_for('home_bp.prefetch_status', ids=','.join(video_ids))
+    }), 202
+
+
+@home_bp.route('/transcripts/prefetch/status')
+@login_required
+def prefetch_status():
+    """
+    Prefetch progress. Query param: ids (comma-separated video IDs).
+    Each video is 'cached', 'pending' (its job is queued or running) or
+    'missing' (no captions, or the fetch gave up).
+    """
+    video_ids, invalid = _prefetch_ids([v for v in request.args.get('ids', '').split(',') if v.strip()])
+    if not video_ids:
+        return jsonify({'error': 'Provide video IDs as ?ids=<id>,<id>.'}), 400
+    if len(video_ids) > TRANSCRIPT_PREFETCH_MAX:
+        return jsonify({'error': f'At most {TRANSCRIPT_PREFETCH_MAX} videos per request.'}), 400
+
+    results = {}
+    for video_id in video_ids:
+        if transcript_fetcher.is_cached(video_id):
+            results[video_id] = 'cached'
+        elif job_queue.is_active(f"prefetch:{video_id}"):
+            results[video_id] = 'pending'
+        else:
+            results[video_id] = 'missing'
+    return jsonify({
+        'results': results,
+        'invalid': invalid,
+        'done': 'pending' not in results.values()
+    })
+
+
+@home_bp.route('/batches', methods=['POST'])
+@login_required
+def create_batch():
+    """
+    Batch ingestion: queues summaries for many videos at once.
+    Body: {"videos": [url or video ID, ...]}. Already-summarized videos are skipped.
+    """
+    data = request.get_json(silent=True) or {}
+    videos = data.get('videos') or []
+    if not isinstance(videos, list) or not videos:
+        return jsonify({'error': 'Provide a non-empty "videos" list.'}), 400
+
+    result = batch_ingest.create(videos, get_video_id, user_id=current_user.id)
+    result['status_url'] = url_for('home_bp.batch_status', batch_id=result['batch_id'])
+    return jsonify(result), 202
+
+
+@home_bp.route('/batches/<batch_id>')
+@login_required
+def batch_status(batch_id):
+    """Progress, per-stage timings and throughput for a batch."""
+    report = batch_ingest.progress(batch_id, user_id=current_user.id)
+    if not report:
+        return jsonify({'error': 'Batch not found.'}), 404
+    return jsonify(report)
+
+
+@home_bp.route('/batches/<batch_id>/export')
+@login_required
+def export_batch(batch_id):
+    """ZIP of the PDF reports for every video in a batch."""
+    batch = batch_ingest.get(batch_id, user_id=current_user.id)
+    if not batch:
+        return jsonify({'error': 'Batch not found.'}), 404
+    return _export_response(batch['video_ids'], f"podcast_summaries_{batch_id}")
+
+
+@home_bp.route('/export', methods=['POST'])
+@login_required
+def export_reports():
+    """
+    Bulk PDF export: streams a ZIP with one report per video.
+    Body: {"videos": [url or video ID, ...]} (at most PDF_EXPORT_MAX)
+    """
+    data = request.get_json(silent=True) or {}
+    videos = data.get('videos') or []
+    if not isinstance(videos, list) or not videos:
+        return jsonify({'error': 'Provide a non-empty "videos" list.'}), 400
+    if len(videos) > PDF_EXPORT_MAX:
+        return jsonify({'error': f'At most {PDF_EXPORT_MAX} videos per request.'}), 400
+
+    video_ids = list(dict.fromkeys(filter(None, (get_video_id(str(video)) for video in videos))))
+    if not video_ids:
+        return jsonify({'error': 'No valid video URLs or IDs.'}), 400
+    return _export_response(video_ids, f"podcast_summaries_{datetime.now():%Y%m%d_%H%M%S}")
+
+
+@home_bp.route('/metrics')
+@login_required
+def metrics():
+    """Operational metrics: LLM pool utilisation and background job queue."""
+    return jsonify({
+        'llm': llm_client.stats(),
+        'map_limiter': map_limiter.stats(),
+        'jobs': worker_pool.stats(),
+        'transcripts': transcript_fetcher.stats(),
+        'chunk_store': chunk_store.stats(),
+        'tokenizer': token_counter.stats(),
+        'pdf_cache': pdf_cache.stats()
+    })
 
 
 @home_bp.route('/chat-page/<video_id>')
 @login_required
 def chat_page(video_id):
     """Dedicated interactive Q&A page for a video."""
-    record = summaries_collection.find_one({'video_id': video_id})
+    record = summaries_collection.find_one({'video_id': video_id}, {'summary': 1, 'topics': 1})
 
     if not record or 'summary' not in record:
         flash("No summary found for this video. Please analyze it first.", "error")
@@ -892,16 +1903,16 @@ def chat():
         return {'response': 'Error: Video context missing.'}, 400
 
     # Retrieve full transcript and summary from DB
-    record = summaries_collection.find_one({'video_id': video_id})
+    record = summaries_collection.find_one({'video_id': video_id}, {'summary': 1})
 
     if not record or 'summary' not in record:
         return {'response': 'Error: No summary found for this video. Please generate it first.'}, 404
 
-    full_text = record.get('full_text', '')
     summary = record.get('summary', '')
+    _enqueue_embedding(video_id)
 
-    # Get response with confidence score using full transcript
-    result = chat_service.get_chat_response(full_text, summary, message)
+    # Get response with confidence score using the transcript's chunk index
+    result = chat_service.get_chat_response(None, summary, message, video_id=video_id)
 
     # Store chat history in DB
     try:
@@ -911,6 +1922,7 @@ def chat():
             'question': message,
             'answer': result['answer'],
             'confidence_score': result['confidence_score'],
+            'sources': result.get('sources', []),
             'timestamp': datetime.now(IST)
         })
     except Exception as e:
@@ -918,10 +1930,68 @@ def chat():
 
     return {
         'response': result['answer'],
-        'confidence_score': result['confidence_score']
+        'confidence_score': result['confidence_score'],
+        'sources': result.get('sources', [])
     }
 
 
+@home_bp.route('/chat-stream', methods=['POST'])
+@login_required
+def chat_stream():
+    """
+    Streaming variant of /chat. Returns Server-Sent Events: 'token' frames
+    with answer text as it is generated, then one 'done' frame with the final
+    answer and confidence score. The exchange is saved once complete.
+    """
+    data = request.get_json()
+    message = data.get('message')
+    video_id = data.get('video_id')
+
+    if not video_id:
+        return {'response': 'Error: Video context missing.'}, 400
+
+    record = summaries_collection.find_one({'video_id': video_id}, {'summary': 1})
+
+    if not record or 'summary' not in record:
+        return {'response': 'Error: No summary found for this video. Please generate it first.'}, 404
+
+    summary = record.get('summary', '')
+    user_id = current_user.id
+    _enqueue_embedding(video_id)
+
+    def generate():
+        for event, payload in chat_service.stream_chat_response(None, summary, message, video_id=video_id):
+            if event == 'token':
+                yield format_sse('token', {'text': payload})
+                continue
+
+            # Store chat history in DB
+            try:
+                chat_history_collection.insert_one({
+                    'user_id': user_id,
+                    'video_id': video_id,
+                    'question': message,
+                    'answer': payload['answer'],
+                    'confidence_score': payload['confidence_score'],
+                    'sources': payload.get('sources', []),
+                    'timestamp': datetime.now(IST)
+                })
+            except Exception as e:
+                print(f"Chat history save error: {e}")
+
+            yield format_sse('done', {
+                'response': payload['answer'],
+                'confidence_score': payload['confidence_score'],
+                'sources': payload.get('sources', [])
+            })
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
 @home_bp.route('/chat-history/<video_id>', methods=['GET'])
 @login_required
 def get_chat_history(video_id):
@@ -938,6 +2008,7 @@ def get_chat_history(video_id):
             'question': r.get('question', ''),
             'answer': r.get('answer', ''),
             'confidence_score': r.get('confidence_score', 0),
+            'sources': r.get('sources', []),
             'timestamp': r.get('timestamp', datetime.utcnow()).strftime('%b %d, %Y at %H:%M')
         })
 
@@ -1019,20 +2090,22 @@ def history():
 def download_pdf(video_id):
     """Download podcast summary as PDF"""
     try:
-        record = summaries_collection.find_one({'video_id': video_id})
+        record = summaries_collection.find_one({'video_id': video_id}, PDF_PROJECTION)
 
         if not record or 'summary' not in record:
             flash("Summary not found.", "error")
             return redirect(url_for('home_bp.dashboard'))
 
-        pdf_buffer = generate_pdf(video_id, record)
-
-        if not pdf_buffer:
+        # Served from the cache; rendered first if the record changed since
+        try:
+            pdf_file = pdf_cache.open(video_id, record)
+        except Exception as e:
+            print(f"PDF generation error: {e}")
             flash("Error generating PDF.", "error")
             return redirect(url_for('home_bp.dashboard'))
 
         return send_file(
-            pdf_buffer,
+            pdf_file,
             mimetype='application/pdf',
             as_attachment=True,
             download_name=f'podcast_summary_{video_id}.pdf'
@@ -0,0 +1,97 @@
+"""
+Batch ingestion CLI.
+Queues summaries for many YouTube videos and reports progress until they are
+done, followed by per-stage timings and throughput.
+
+Usage:
+    python ingest_batch.py urls.txt            # one URL or video ID per line
+    python ingest_batch.py URL_OR_ID [...]
+    python ingest_batch.py --status BATCH_ID   # report on an existing batch
+
+Runs its own worker pool (JOB_WORKERS) against the shared MongoDB job queue,
+so it can run alongside the web app or on a separate machine.
+"""
+import os
+import sys
+import time
+import argparse
+
+
+def _read_videos(args):
+    videos = []
+    for item in args:
+        if os.path.isfile(item):
+            with open(item, encoding='utf-8') as f:
+                videos.extend(
+                    line.strip() for line in f
+                    if line.strip() and not line.lstrip().startswith('#')
+                )
+        else:
+            videos.append(item)
+    return videos
+
+
+def _print_report(report):
+    counts = ", ".join(f"{state} {n}" for state, n in report['counts'].items() if n)
+    print(f"[PodcastAI] Batch {report['batch_id']}: {report['done']}/{report['total']} done ({counts})")
+
+
+def _print_summary(report):
+    print("\n==================== Batch Report ====================")
+    print(f"Videos:           {report['total']}")
+    for state, n in report['counts'].items():
+        print(f"  {state:<15} {n}")
+    if report['invalid']:
+        print(f"Invalid inputs:   {', '.join(report['invalid'])}")
+    print("Avg seconds per stage:")
+    for stage, seconds in report['stage_seconds'].items():
+        print(f"  {stage:<15} {seconds}")
+    print(f"Elapsed:          {report['elapsed_seconds']}s")
+    print(f"Throughput:       {report['videos_per_hour']} videos/hour")
+    failed = [vid for vid, state in report['videos'].items() if state == 'failed']
+    if failed:
+        print(f"Failed:           {', '.join(failed)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize many YouTube videos in one batch.")
+    parser.add_argument('videos', nargs='*', help="URLs, video IDs, or files with one per line")
+    parser.add_argument('--status', metavar='BATCH_ID', help="report on an existing batch")
+    parser.add_argument('--poll', type=float, default=10.0, help="seconds between progress lines")
+    args = parser.parse_args()
+
+    # Importing the app starts the job workers
+    from app import app  # noqa: F401
+    from home import batch_ingest, get_video_id
+
+    if args.status:
+        batch_id = args.status
+    else:
+        videos = _read_videos(args.videos)
+        if not videos:
+            parser.error("no videos given")
+        created = batch_ingest.create(videos, get_video_id)
+        batch_id = created['batch_id']
+        print(f"[PodcastAI] Batch {batch_id}: queued {created['submitted']}, "
+              f"skipped {created['skipped']} already summarized, {len(created['invalid'])} invalid.")
+
+    try:
+        while True:
+            report = batch_ingest.progress(batch_id)
+            if report is None:
+                print(f"[PodcastAI] Batch {batch_id} not found.")
+                return 1
+            _print_report(report)
+            if report['finished']:
+                break
+            time.sleep(args.poll)
+    except KeyboardInterrupt:
+        print(f"\n[PodcastAI] Stopped watching; queued jobs keep running. Resume with --status {batch_id}")
+        return 130
+
+    _print_summary(report)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
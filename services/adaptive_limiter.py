@@ -0,0 +1,89 @@
+"""
+Adaptive Limiter Service
+AIMD (additive-increase / multiplicative-decrease) concurrency limiter for
+async LLM work. The allowed concurrency grows while calls succeed at normal
+latency and is cut back on errors, timeouts or latency spikes. "Normal" is the
+fastest call among the recent ones, so it follows a server that has become
+slower for good instead of treating every later call as a spike.
+"""
+import os
+import time
+import asyncio
+from collections import deque
+
+
+class AdaptiveLimiter:
+    """
+    Async concurrency limiter whose limit adapts to observed latency and errors.
+    Usage:
+        await limiter.acquire()
+        ...call...
+        limiter.release(latency_seconds, ok)
+    """
+
+    def __init__(self, initial=None, minimum=1, maximum=None, latency_factor=2.0, backoff=0.5, window=20):
+        self.minimum = minimum
+        self.maximum = maximum or int(os.getenv("MAP_CONCURRENCY_MAX", "16"))
+        self.limit = float(min(self.maximum, initial or int(os.getenv("MAP_CONCURRENCY_START", "2"))))
+        self.latency_factor = latency_factor
+        self.backoff = backoff
+
+        self._active = 0
+        self._cond = None
+        # Latencies of the last `window` successful calls
+        self._samples = deque(maxlen=window)
+        self._last_decrease = 0.0
+
+    @property
+    def baseline(self):
+        """Minimum latency over the recent window, or None before any success."""
+        return min(self._samples) if self._samples else None
+
+    def _condition(self):
+        if self._cond is None:
+            self._cond = asyncio.Condition()
+        return self._cond
+
+    async def acquire(self):
+        cond = self._condition()
+        async with cond:
+            while self._active >= int(self.limit):
+                await cond.wait()
+            self._active += 1
+
+    def release(self, latency, ok):
+        """`latency` should cover only the server call, not time spent queued for it."""
+        self._active -= 1
+        if ok:
+            baseline = self.baseline
+            # Every success is a sample, so a lasting slowdown raises the baseline
+            self._samples.append(latency)
+            if baseline is not None and latency > baseline * self.latency_factor:
+                # Successful but far slower than usual: the server is queueing
+                self._decrease()
+            else:
+                self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+        else:
+            self._decrease()
+        asyncio.get_running_loop().create_task(self._notify())
+
+    def _decrease(self):
+        # Only back off once per round-trip so a burst of failures from the
+        # same window doesn't collapse the limit to the minimum
+        now = time.monotonic()
+        if now - self._last_decrease < (self.baseline or 1.0):
+            return
+        self._last_decrease = now
+        self.limit = max(self.minimum, self.limit * self.backoff)
+
+    async def _notify(self):
+        cond = self._condition()
+        async with cond:
+            cond.notify_all()
+
+    def stats(self):
+        return {
+            'limit': round(self.limit, 2),
+            'active': self._active,
+            'baseline_latency_seconds': round(self.baseline, 3) if self.baseline else None
+        }
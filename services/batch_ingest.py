@@ -0,0 +1,145 @@
+"""
+Batch Ingest Service
+Tracks bulk submissions of many videos (e.g. a channel or playlist export).
+Videos already summarized are skipped; the rest are handed to the app's job
+queue and progress is derived from the summary records themselves, including
+per-stage timings and overall throughput in videos/hour.
+"""
+import uuid
+from datetime import datetime
+
+
+# Per-video states reported for a batch, in pipeline order
+BATCH_STATES = ['queued', 'summarizing', 'analyzing', 'complete', 'failed', 'skipped']
+STAGES = ['fetch', 'summarize', 'sentiment', 'accuracy', 'topics']
+
+
+class BatchIngest:
+    """
+    Creates batches and reports on them.
+    `submit(video_id, video_url)` is the app's enqueue hook; it returns True
+    if the video was queued, False if it already had a summary.
+    """
+
+    def __init__(self, batches_collection, summaries_collection, submit):
+        self.batches = batches_collection
+        self.summaries = summaries_collection
+        self.submit = submit
+
+    def create(self, videos, parse_id, user_id=None):
+        """
+        Submits a list of URLs / IDs as one batch.
+        Returns: {'batch_id', 'submitted', 'skipped', 'invalid'}
+        """
+        video_ids = {}
+        invalid = []
+        for video in videos:
+            video = str(video).strip()
+            if not video:
+                continue
+            video_id = parse_id(video)
+            if video_id:
+                video_ids.setdefault(video_id, video)
+            else:
+                invalid.append(video)
+
+        submitted, skipped = [], []
+        for video_id, url in video_ids.items():
+            url = url if '/' in url else f"https://www.youtube.com/watch?v={video_id}"
+            (submitted if self.submit(video_id, url) else skipped).append(video_id)
+
+        batch_id = uuid.uuid4().hex
+        self.batches.insert_one({
+            '_id': batch_id,
+            'user_id': user_id,
+            'video_ids': list(video_ids),
+            'skipped': skipped,
+            'invalid': invalid,
+            'created_at': datetime.utcnow()
+        })
+        return {
+            'batch_id': batch_id,
+            'submitted': len(submitted),
+            'skipped': len(skipped),
+            'invalid': invalid
+        }
+
+    @staticmethod
+    def _state(record, skipped):
+        if record is None:
+            # Reserved records are dropped when their summary fails
+            return 'failed'
+        progress = record.get('analysis_progress', 'complete')
+        if progress in ('queued', 'summarizing'):
+            return progress
+        if progress != 'complete':
+            return 'analyzing'
+        return 'skipped' if skipped else 'complete'
+
+    def get(self, batch_id, user_id=None):
+        """
+        Returns the batch document, or None if unknown. With a `user_id`, only
+        that user's batches are found (the CLI, trusted, passes none).
+        """
+        query = {'_id': batch_id}
+        if user_id is not None:
+            query['user_id'] = user_id
+        return self.batches.find_one(query)
+
+    def progress(self, batch_id, user_id=None):
+        """
+        Returns the batch report, or None for an unknown batch (or, with a
+        `user_id`, one that user didn't create):
+        {'batch_id', 'total', 'done', 'finished', 'counts', 'stage_seconds',
+         'elapsed_seconds', 'videos_per_hour', 'videos': {video_id: state}}
+        """
+        batch = self.get(batch_id, user_id)
+        if not batch:
+            return None
+
+        skipped = set(batch.get('skipped', []))
+        records = {
+            r['video_id']: r for r in self.summaries.find(
+                {'video_id': {'$in': batch['video_ids']}},
+                {'_id': 0, 'video_id': 1, 'analysis_progress': 1, 'timings': 1, 'completed_at': 1}
+            )
+        }
+        states = {vid: self._state(records.get(vid), vid in skipped) for vid in batch['video_ids']}
+
+        counts = {state: 0 for state in BATCH_STATES}
+        for state in states.values():
+            counts[state] += 1
+
+        # Average seconds per stage over videos processed by this batch
+        totals = {stage: [0.0, 0] for stage in STAGES}
+        last_completed = None
+        for vid, record in records.items():
+            if vid in skipped:
+                continue
+            for stage, seconds in (record.get('timings') or {}).items():
+                if stage in totals:
+                    totals[stage][0] += seconds
+                    totals[stage][1] += 1
+            completed_at = record.get('completed_at')
+            if completed_at and (last_completed is None or completed_at > last_completed):
+                last_completed = completed_at
+
+        done = counts['complete'] + counts['failed'] + counts['skipped']
+        finished = done == len(states)
+        end = last_completed if finished and last_completed else datetime.utcnow()
+        elapsed = max((end - batch['created_at']).total_seconds(), 0.001)
+
+        return {
+            'batch_id': batch_id,
+            'total': len(states),
+            'done': done,
+            'finished': finished,
+            'counts': counts,
+            'stage_seconds': {
+                stage: round(total / n, 2) for stage, (total, n) in totals.items() if n
+            },
+            'elapsed_seconds': round(elapsed, 1),
+            'videos_per_hour': round(counts['complete'] * 3600 / elapsed, 1),
+            'invalid': batch.get('invalid', []),
+            'videos': states
+        }
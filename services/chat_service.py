@@ -2,139 +2,383 @@
 import os
 import re
 import json
-from langchain_ollama import ChatOllama
+import threading
+from collections import OrderedDict
+from datetime import datetime
+import numpy as np
+from pymongo.errors import PyMongoError
 from langchain_core.prompts import PromptTemplate
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+from services.llm_client import llm_client
+from services.text_index import BM25Index
+from services.segments import format_timestamp
+from services.token_budget import token_counter, context_budget
+
+
+CHAT_PROMPT = PromptTemplate.from_template("""You are PodcastAI, an assistant that answers questions ONLY using the provided podcast transcript excerpts.
+
+PODCAST TRANSCRIPT EXCERPTS:
+{context}
+
+PODCAST SUMMARY (for additional context):
+{summary}
+
+USER QUESTION:
+{question}
+
+STRICT RULES:
+1. Answer ONLY based on the transcript excerpts and summary provided above.
+2. Do NOT use any external knowledge, assumptions, or information not found in the transcript.
+3. If the question cannot be answered from the provided content, respond with EXACTLY: "I don't know based on this podcast."
+4. Keep your answer clear, concise, and directly relevant.
+5. If the user greets you (e.g., "hi", "hello"), respond politely and briefly.
+6. Always respond in English.
+
+After your answer, on a new line, provide a confidence rating in this EXACT format:
+CONFIDENCE: [number from 0 to 100]
+
+The confidence score should reflect how well the transcript content supports your answer:
+- 90-100: Answer is directly and clearly stated in the transcript
+- 70-89: Answer is strongly supported by the transcript
+- 50-69: Answer is partially supported, some inference needed
+- 0-49: Answer is weakly supported or not found in transcript""")
+
+
+# The confidence rating the prompt asks for; an answer ends where it starts
+CONFIDENCE_RE = re.compile(r'CONFIDENCE:\s*(\d+)', re.IGNORECASE)
+
+
+class ConfidenceStripper:
+    """
+    Incrementally filters streamed answer text so the trailing
+    "CONFIDENCE: NN" line is never shown. Text that could be the start of the
+    marker (and whitespace before it) is held back until it is disambiguated;
+    "confidence:" followed by anything but a number is part of the answer,
+    as in ChatService._parse_response.
+    """
+
+    MARKER = 'CONFIDENCE:'
+    # Marker plus whatever follows it so far: digits confirm it, other text rules it out
+    CANDIDATE_RE = re.compile(r'CONFIDENCE:\s*(\d?)', re.IGNORECASE)
+
+    def __init__(self):
+        self.pending = ''
+        self.done = False
+
+    def feed(self, token):
+        """Returns the text from this token that is safe to display."""
+        if self.done:
+            return ''
+        self.pending += token
+
+        released = ''
+        while True:
+            match = self.CANDIDATE_RE.search(self.pending)
+            if match is None or (not match.group(1) and match.end() == len(self.pending)):
+                break
+            if match.group(1):
+                self.done = True
+                text = released + self.pending[:match.start()]
+                self.pending = ''
+                return text.rstrip()
+            # A mention of "confidence:" in the answer itself
+            released += self.pending[:match.end()]
+            self.pending = self.pending[match.end():]
+
+        if match is not None:
+            # Only whitespace after the marker so far
+            held = len(self.pending) - match.start()
+        else:
+            # Hold back a partial marker at the end of the buffer
+            held = 0
+            upper = self.pending.upper()
+            for k in range(min(len(self.MARKER) - 1, len(upper)), 0, -1):
+                if upper.endswith(self.MARKER[:k]):
+                    held = k
+                    break
+        safe = released + self.pending[:len(self.pending) - held]
+
+        # ...and any whitespace that may precede the marker
+        visible = safe.rstrip()
+        self.pending = safe[len(visible):] + self.pending[len(self.pending) - held:]
+        return visible
 
 
 class ChatService:
     """
     Chat service that answers user questions using the full podcast transcript.
-    Uses keyword-based chunk retrieval for long transcripts and LLM self-evaluation
-    for confidence scoring.
+    Transcripts that fit the model's context (after the summary, question and
+    answer reserve) are sent whole; longer ones are split into token-budgeted
+    chunks, MAX_CHUNKS of which fill that space, and indexed with BM25 once per video
+    (at ingest, or lazily on first question); the index is persisted and kept
+    in an in-memory LRU so each question is an index lookup, not a rescan.
+    When chunk embeddings exist, chunks are ranked by a hybrid of cosine
+    similarity and BM25, and fewer of them are sent.
+    Confidence comes from LLM self-evaluation.
     """
 
-    def __init__(self):
-        self.splitter = RecursiveCharacterTextSplitter(
-            chunk_size=2000,
-            chunk_overlap=200
+    # Chunks sent per question
+    MAX_CHUNKS = 4
+    # Context kept free for the instructions, summary, question and answer
+    RESERVE_TOKENS = 2500
+    OVERLAP_TOKENS = 50
+
+    def __init__(self, index_collection=None, embeddings=None):
+        self.context_tokens = context_budget(llm_client.context_tokens, self.RESERVE_TOKENS)
+        self.chunk_tokens = self.context_tokens // self.MAX_CHUNKS
+        self.index_collection = index_collection
+        # Set by the app: video_id -> (transcript text, SegmentIndex or None), used to index lazily
+        self.transcript_loader = None
+        self.cache_items = int(os.getenv("CHAT_INDEX_CACHE_ITEMS", "64"))
+        # Optional EmbeddingStore for semantic ranking
+        self.embeddings = embeddings
+        self.semantic_chunks = int(os.getenv("CHAT_SEMANTIC_CHUNKS", "3"))
+        self.hybrid_alpha = float(os.getenv("CHAT_HYBRID_ALPHA", "0.7"))
+        self._indexes = OrderedDict()
+        self._lock = threading.Lock()
+
+    # -------------------- Chunk index --------------------
+
+    def build_index(self, full_text, timing=None):
+        """
+        Splits a transcript into chunks and indexes them. With a SegmentIndex
+        chunks end on caption boundaries and carry their time ranges.
+        Returns a BM25Index.
+        """
+        if not full_text:
+            return BM25Index.build([])
+        whole = [[0.0, timing.duration]] if timing is not None else None
+        if token_counter.count(full_text) <= self.context_tokens:
+            # Short enough to send whole; keep it as a single chunk
+            return BM25Index.build([full_text], whole)
+
+        timed = timing is not None and len(timing) > 0
+        bounds = token_counter.chunk_bounds(
+            full_text, self.chunk_tokens, self.OVERLAP_TOKENS, boundaries=timing.offsets if timed else None
         )
+        chunks = [full_text[start:end] for start, end in bounds]
+        times = [list(timing.time_range(start, end)) for start, end in bounds] if timed else None
+        return BM25Index.build(chunks, times)
+
+    def index_transcript(self, video_id, full_text, timing=None):
+        """Builds, persists and caches the chunk index for a video. Returns it."""
+        index = self.build_index(full_text, timing)
+        if self.index_collection is not None:
+            try:
+                self.index_collection.replace_one(
+                    {'_id': video_id},
+                    dict(index.to_dict(), built_at=datetime.utcnow()),
+                    upsert=True
+                )
+            except PyMongoError as e:
+                print(f"[PodcastAI] [{video_id}] Could not store chat index: {e}")
+        self._remember(video_id, index)
+        return index
+
+    def get_index(self, video_id):
+        """Returns the chunk index for a video from memory, MongoDB, or by building it."""
+        with self._lock:
+            index = self._indexes.get(video_id)
+            if index is not None:
+                self._indexes.move_to_end(video_id)
+                return index
+
+        if self.index_collection is not None:
+            try:
+                index = BM25Index.from_dict(self.index_collection.find_one({'_id': video_id}))
+            except PyMongoError as e:
+                print(f"[PodcastAI] [{video_id}] Could not load chat index: {e}")
+            if index is not None:
+                self._remember(video_id, index)
+                return index
+
+        if self.transcript_loader is None:
+            return None
+        return self.index_transcript(video_id, *self.transcript_loader(video_id))
+
+    def has_embeddings(self, video_id):
+        """True when semantic ranking is ready, or not applicable, for a video."""
+        if self.embeddings is None or not self.embeddings.enabled:
+            return True
+        index = self.get_index(video_id)
+        if index is None or len(index.chunks) <= self.MAX_CHUNKS:
+            return True
+        # Embeddings of an older chunking no longer line up with the index
+        return self.embeddings.has(video_id, index.chunks)
 
-    def _get_relevant_chunks(self, full_text, query, max_chunks=4):
+    def embed_transcript(self, video_id):
         """
-        Split transcript into chunks and rank by keyword relevance to the query.
-        Returns the top-N most relevant chunks concatenated.
+        Builds the chunk embedding matrix for a video.
+        Returns: True if embeddings are stored (or not applicable)
         """
-        if not full_text or len(full_text) < 3000:
-            # Short transcript — return entire text
-            return full_text or ""
+        if self.embeddings is None or not self.embeddings.enabled:
+            return True
+        index = self.get_index(video_id)
+        if index is None or len(index.chunks) <= self.MAX_CHUNKS:
+            # Short transcripts are always sent whole; nothing to rank
+            return True
+        return self.embeddings.build(video_id, index.chunks) is not None
 
-        # Split into chunks
-        chunks = self.splitter.split_text(full_text)
+    def _remember(self, video_id, index):
+        with self._lock:
+            self._indexes[video_id] = index
+            self._indexes.move_to_end(video_id)
+            while len(self._indexes) > self.cache_items:
+                self._indexes.popitem(last=False)
 
+    def _select_chunks(self, index, query, max_chunks=MAX_CHUNKS, video_id=None):
+        """
+        Ranks the indexed chunks by relevance to the query: hybrid semantic +
+        BM25 when the video has embeddings, BM25 alone otherwise.
+        Returns the indices of the top-N most relevant chunks in transcript order.
+        """
+        chunks = index.chunks
         if len(chunks) <= max_chunks:
-            return full_text
+            return list(range(len(chunks)))
 
-        # Simple keyword relevance scoring
-        query_words = set(re.findall(r'\w+', query.lower()))
-        # Remove very short / stop words
-        query_words = {w for w in query_words if len(w) > 2}
+        similarity = None
+        if video_id and self.embeddings is not None and self.embeddings.available():
+            similarity = self.embeddings.similarities(video_id, query, chunks)
 
-        scored = []
-        for i, chunk in enumerate(chunks):
-            chunk_lower = chunk.lower()
-            score = sum(1 for word in query_words if word in chunk_lower)
-            scored.append((score, i, chunk))
+        if similarity is not None:
+            # Cosine similarity blended with max-normalised BM25 scores
+            keyword = np.zeros(len(chunks), dtype=np.float32)
+            for score, i in index.search(query, len(chunks)):
+                keyword[i] = score
+            if keyword.max() > 0:
+                keyword /= keyword.max()
+            combined = self.hybrid_alpha * similarity + (1 - self.hybrid_alpha) * keyword
+            k = min(self.semantic_chunks, len(chunks))
+            top = np.argpartition(-combined, k - 1)[:k]
+            return sorted(top.tolist())
 
-        # Sort by score descending, then by position (to preserve context flow)
-        scored.sort(key=lambda x: (-x[0], x[1]))
+        # Chunks with no query terms rank after matches, in transcript order
+        ranked = [i for _, i in index.search(query, max_chunks)]
+        for i in range(len(chunks)):
+            if len(ranked) >= max_chunks:
+                break
+            if i not in ranked:
+                ranked.append(i)
 
-        # Pick top chunks, then re-sort by position for coherent context
-        selected = scored[:max_chunks]
-        selected.sort(key=lambda x: x[1])
+        # Re-sort the picks by position for coherent context
+        return sorted(ranked)
 
-        return "\n\n---\n\n".join(s[2] for s in selected)
+    @staticmethod
+    def _label(index, i):
+        """Chunk text, prefixed with its time range when the index has timing."""
+        if not index.times or len(index.chunks) == 1:
+            return index.chunks[i]
+        start, end = index.times[i]
+        return f"[{format_timestamp(start)}-{format_timestamp(end)}]\n{index.chunks[i]}"
+
+    def _build_prompt(self, full_text, summary, user_query, video_id=None):
+        """Returns: (prompt, sources) where sources are the chunks' time ranges, if known."""
+        # Retrieve the most relevant chunks from the transcript
+        index = self.get_index(video_id) if video_id else None
+        if index is None or not index.chunks:
+            index = self.build_index(full_text or summary)
+        picked = self._select_chunks(index, user_query, video_id=video_id)
+        sources = []
+        if index.times and len(index.chunks) > 1:
+            sources = [{'start': index.times[i][0], 'end': index.times[i][1]} for i in picked]
+        prompt = CHAT_PROMPT.format(
+            context="\n\n---\n\n".join(self._label(index, i) for i in picked),
+            summary=summary or "No summary available.",
+            question=user_query
+        )
+        return prompt, sources
 
-    def get_chat_response(self, full_text, summary, user_query):
+    def locate(self, video_id, text):
+        """
+        Returns: start time in seconds of the transcript chunk that best
+        matches `text`, or None if the video has no timing or no match.
+        """
+        index = self.get_index(video_id)
+        if index is None or not index.times:
+            return None
+        best = index.search(text, 1)
+        return index.times[best[0][1]][0] if best else None
+
+    def _parse_response(self, response_text):
+        """Splits the trailing CONFIDENCE line off the model output."""
+        response_text = response_text.strip()
+
+        # Parse confidence score from response
+        confidence_score = 70  # default
+        confidence_match = CONFIDENCE_RE.search(response_text)
+        if confidence_match:
+            confidence_score = int(confidence_match.group(1))
+            confidence_score = max(0, min(100, confidence_score))
+            # The answer ends at the confidence rating, as when streamed
+            answer = response_text[:confidence_match.start()].strip()
+        else:
+            answer = response_text
+
+        # If the answer indicates no knowledge, set low confidence
+        if "i don't know based on this podcast" in answer.lower():
+            confidence_score = min(confidence_score, 20)
+
+        return {
+            'answer': answer,
+            'confidence_score': confidence_score
+        }
+
+    def get_chat_response(self, full_text, summary, user_query, video_id=None):
         """
         Generates a response using the full transcript context and user query.
-        Returns a dict: { 'answer': str, 'confidence_score': int }
+        With a video_id the transcript comes from that video's chunk index and
+        full_text may be None.
+        Returns a dict: { 'answer': str, 'confidence_score': int, 'sources': [{'start', 'end'}] }
         """
         try:
-            if not full_text and not summary:
+            if not full_text and not video_id and not summary:
                 return {
                     'answer': "I don't have enough information to answer that.",
                     'confidence_score': 0
                 }
 
-            # Retrieve the most relevant chunks from the transcript
-            context = self._get_relevant_chunks(full_text or summary, user_query)
-
-            llm = ChatOllama(
-                model=os.getenv("OLLAMA_MODEL", "gpt-oss:latest"),
-                base_url=os.getenv("OLLAMA_BASE_URL", "http://localhost:11434"),
+            prompt, sources = self._build_prompt(full_text, summary, user_query, video_id)
+            response = llm_client.invoke(
+                prompt,
                 temperature=0.3  # Lower temperature for more factual answers
             )
+            return dict(self._parse_response(response.content), sources=sources)
 
-            prompt = PromptTemplate.from_template("""You are PodcastAI, an assistant that answers questions ONLY using the provided podcast transcript excerpts.
-
-PODCAST TRANSCRIPT EXCERPTS:
-{context}
-
-PODCAST SUMMARY (for additional context):
-{summary}
-
-USER QUESTION:
-{question}
-
-STRICT RULES:
-1. Answer ONLY based on the transcript excerpts and summary provided above.
-2. Do NOT use any external knowledge, assumptions, or information not found in the transcript.
-3. If the question cannot be answered from the provided content, respond with EXACTLY: "I don't know based on this podcast."
-4. Keep your answer clear, concise, and directly relevant.
-5. If the user greets you (e.g., "hi", "hello"), respond politely and briefly.
-6. Always respond in English.
-
-After your answer, on a new line, provide a confidence rating in this EXACT format:
-CONFIDENCE: [number from 0 to 100]
-
-The confidence score should reflect how well the transcript content supports your answer:
-- 90-100: Answer is directly and clearly stated in the transcript
-- 70-89: Answer is strongly supported by the transcript
-- 50-69: Answer is partially supported, some inference needed
-- 0-49: Answer is weakly supported or not found in transcript""")
-
-            response = llm.invoke(prompt.format(
-                context=context,
-                summary=summary or "No summary available.",
-                question=user_query
-            ))
-
-            response_text = response.content.strip()
-
-            # Parse confidence score from response
-            confidence_score = 70  # default
-            confidence_match = re.search(r'CONFIDENCE:\s*(\d+)', response_text, re.IGNORECASE)
-            if confidence_match:
-                confidence_score = int(confidence_match.group(1))
-                confidence_score = max(0, min(100, confidence_score))
-                # Remove the confidence line from the answer
-                answer = re.sub(r'\n*CONFIDENCE:\s*\d+.*$', '', response_text, flags=re.IGNORECASE).strip()
-            else:
-                answer = response_text
-
-            # If the answer indicates no knowledge, set low confidence
-            if "i don't know based on this podcast" in answer.lower():
-                confidence_score = min(confidence_score, 20)
-
+        except Exception as e:
+            print(f"Chat error: {e}")
             return {
-                'answer': answer,
-                'confidence_score': confidence_score
+                'answer': "Sorry, I encountered an error processing your request.",
+                'confidence_score': 0
             }
 
+    def stream_chat_response(self, full_text, summary, user_query, video_id=None):
+        """
+        Streaming variant of get_chat_response.
+        Yields ('token', str) while the answer is generated, with the trailing
+        CONFIDENCE line held back, then a final ('done', result) where result
+        matches get_chat_response's return value.
+        """
+        if not full_text and not video_id and not summary:
+            yield 'done', {
+                'answer': "I don't have enough information to answer that.",
+                'confidence_score': 0
+            }
+            return
+
+        stripper = ConfidenceStripper()
+        parts = []
+        try:
+            prompt, sources = self._build_prompt(full_text, summary, user_query, video_id)
+            for token in llm_client.stream(prompt, temperature=0.3):
+                parts.append(token)
+                visible = stripper.feed(token)
+                if visible:
+                    yield 'token', visible
         except Exception as e:
             print(f"Chat error: {e}")
-            return {
+            yield 'done', {
                 'answer': "Sorry, I encountered an error processing your request.",
                 'confidence_score': 0
             }
+            return
+
+        yield 'done', dict(self._parse_response(''.join(parts)), sources=sources)
@@ -0,0 +1,67 @@
+"""
+Chunk Store Service
+Persists map-phase chunk summaries as they complete, keyed by video_id and a
+hash of the model, map prompt and chunk text. A summary retried after a crash
+or an Ollama outage only maps the chunks that are missing, and the stored
+notes survive changes to the reduce and final prompts. Rows expire by TTL
+(see db.py).
+"""
+import hashlib
+from datetime import datetime
+from pymongo.errors import PyMongoError
+
+
+class ChunkSummaryStore:
+    """
+    One document per summarized chunk:
+    {_id: '<video_id>:<chunk_hash>', video_id, chunk_hash, index, notes, created_at}
+    """
+
+    def __init__(self, collection=None, model='', prompt=''):
+        self.collection = collection
+        self.model = model
+        # Map prompt template: notes from another prompt are never reused
+        self.prompt = prompt
+        self.reused = 0
+        self.saved = 0
+
+    def chunk_hash(self, text):
+        return hashlib.sha1(f"{self.model}\n{self.prompt}\n{text}".encode('utf-8')).hexdigest()
+
+    def load(self, video_id, hashes):
+        """Returns: {chunk_hash: notes} for the chunks already summarized"""
+        if self.collection is None or not hashes:
+            return {}
+        try:
+            docs = self.collection.find(
+                {'_id': {'$in': [f"{video_id}:{h}" for h in set(hashes)]}},
+                {'chunk_hash': 1, 'notes': 1}
+            )
+            found = {doc['chunk_hash']: doc['notes'] for doc in docs if doc.get('notes')}
+        except PyMongoError as e:
+            print(f"[PodcastAI] Chunk store read error: {e}")
+            return {}
+        self.reused += len(found)
+        return found
+
+    def save(self, video_id, chunk_hash, index, notes):
+        if self.collection is None:
+            return
+        try:
+            self.collection.replace_one(
+                {'_id': f"{video_id}:{chunk_hash}"},
+                {
+                    'video_id': video_id,
+                    'chunk_hash': chunk_hash,
+                    'index': index,
+                    'notes': notes,
+                    'created_at': datetime.utcnow()
+                },
+                upsert=True
+            )
+            self.saved += 1
+        except PyMongoError as e:
+            print(f"[PodcastAI] Chunk store write error: {e}")
+
+    def stats(self):
+        return {'reused': self.reused, 'saved': self.saved}
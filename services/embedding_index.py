@@ -0,0 +1,157 @@
+"""
+Embedding Index Service
+Per-video chunk embeddings from the local Ollama embedding endpoint, stored on
+disk as L2-normalised float32 NumPy matrices (one .npy file per video) and
+loaded memory-mapped, so cosine similarity is a single matrix-vector product.
+Each matrix is stored with a hash of the chunk texts it embeds, so a video
+re-chunked since is re-embedded instead of ranked against the wrong rows.
+"""
+import os
+import re
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+from langchain_ollama import OllamaEmbeddings
+
+
+def chunks_hash(chunks):
+    """Returns: hex digest identifying a list of chunk texts"""
+    digest = hashlib.sha1()
+    for chunk in chunks:
+        data = chunk.encode('utf-8')
+        digest.update(len(data).to_bytes(8, 'little'))
+        digest.update(data)
+    return digest.hexdigest()
+
+
+class EmbeddingStore:
+    """
+    Builds and serves chunk embedding matrices.
+    Row i of a video's matrix embeds chunk i of its chat index. Files live in
+    EMBEDDING_INDEX_DIR/<model>/<video_id>.npy, with the hash of the embedded
+    chunks in <video_id>.sha1 beside it.
+    """
+
+    def __init__(self, directory=None, model=None):
+        self.model = model or os.getenv("OLLAMA_EMBED_MODEL", "nomic-embed-text")
+        self.base_url = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+        self.enabled = os.getenv("CHAT_EMBEDDINGS", "1") != "0"
+        root = directory or os.getenv("EMBEDDING_INDEX_DIR", os.path.join("data", "embeddings"))
+        self.directory = os.path.join(root, re.sub(r'[^A-Za-z0-9._-]', '_', self.model))
+        self.cache_items = int(os.getenv("CHAT_INDEX_CACHE_ITEMS", "64"))
+        self.retry_seconds = 60
+
+        self._client = None
+        self._matrices = OrderedDict()
+        self._lock = threading.Lock()
+        self._down_until = 0.0
+
+    def _embeddings(self):
+        if self._client is None:
+            self._client = OllamaEmbeddings(model=self.model, base_url=self.base_url)
+        return self._client
+
+    def available(self):
+        return self.enabled and time.monotonic() >= self._down_until
+
+    def _path(self, video_id):
+        return os.path.join(self.directory, f"{video_id}.npy")
+
+    def _hash_path(self, video_id):
+        return os.path.join(self.directory, f"{video_id}.sha1")
+
+    def _write(self, path, write):
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            write(f)
+        os.replace(tmp_path, path)
+
+    # -------------------- Embedding --------------------
+
+    def embed(self, texts):
+        """
+        Embeds texts into an (n, dim) float32 matrix with unit-length rows.
+        Returns None (and pauses embedding for a while) if Ollama can't embed.
+        """
+        if not self.available():
+            return None
+        try:
+            vectors = np.asarray(self._embeddings().embed_documents(list(texts)), dtype=np.float32)
+        except Exception as e:
+            print(f"[PodcastAI] Embedding error ({self.model}): {e}")
+            self._down_until = time.monotonic() + self.retry_seconds
+            return None
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def build(self, video_id, chunks):
+        """Embeds and stores a video's chunks. Returns the matrix, or None on failure."""
+        if not chunks:
+            return None
+        matrix = self.embed(chunks)
+        if matrix is None:
+            return None
+
+        os.makedirs(self.directory, exist_ok=True)
+        # The hash goes last: a crash in between leaves a mismatch, not a stale match
+        self._write(self._path(video_id), lambda f: np.save(f, matrix))
+        self._write(self._hash_path(video_id), lambda f: f.write(chunks_hash(chunks).encode('ascii')))
+
+        with self._lock:
+            self._matrices.pop(video_id, None)
+        return matrix
+
+    # -------------------- Lookup --------------------
+
+    def _load(self, video_id):
+        """Returns (memory-mapped matrix, chunks hash) for a video, or None if not built."""
+        with self._lock:
+            entry = self._matrices.get(video_id)
+            if entry is not None:
+                self._matrices.move_to_end(video_id)
+                return entry
+
+        try:
+            matrix = np.load(self._path(video_id), mmap_mode='r')
+            with open(self._hash_path(video_id), 'r', encoding='ascii') as f:
+                digest = f.read().strip()
+        except (OSError, ValueError):
+            # Matrices stored before the hash was kept count as not built
+            return None
+
+        entry = (matrix, digest)
+        with self._lock:
+            self._matrices[video_id] = entry
+            while len(self._matrices) > self.cache_items:
+                self._matrices.popitem(last=False)
+        return entry
+
+    def load(self, video_id, chunks):
+        """
+        Returns the memory-mapped matrix for a video, or None if not built or
+        built from chunks other than `chunks`.
+        """
+        entry = self._load(video_id)
+        if entry is None or entry[1] != chunks_hash(chunks):
+            return None
+        return entry[0]
+
+    def has(self, video_id, chunks):
+        return self.load(video_id, chunks) is not None
+
+    def similarities(self, video_id, query, chunks):
+        """
+        Cosine similarity of the query to each of a video's chunks.
+        Returns a float32 array of length len(chunks), or None if unavailable
+        or the stored matrix wasn't built from these chunks.
+        """
+        matrix = self.load(video_id, chunks)
+        if matrix is None:
+            return None
+        query_vector = self.embed([query])
+        if query_vector is None or query_vector.shape[1] != matrix.shape[1]:
+            return None
+        return matrix @ query_vector[0]
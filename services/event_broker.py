@@ -0,0 +1,102 @@
+"""
+Event Broker Service
+In-process pub/sub used to push pipeline progress to Server-Sent Event
+streams. Each channel keeps a bounded replay buffer so subscribers that
+connect late still receive everything published so far.
+"""
+import time
+import json
+import threading
+
+
+class EventBroker:
+    """
+    Thread-safe channel -> events broker.
+    Producers call publish()/close(); each subscriber iterates listen().
+    """
+
+    def __init__(self, history=1000, retain_seconds=300):
+        self.history = history
+        self.retain_seconds = retain_seconds
+        self._channels = {}
+        self._cond = threading.Condition()
+
+    def _channel(self, name):
+        channel = self._channels.get(name)
+        if channel is None:
+            channel = {'events': [], 'seq': 0, 'closed': False, 'updated': time.monotonic()}
+            self._channels[name] = channel
+        return channel
+
+    def publish(self, name, event, data=None):
+        with self._cond:
+            channel = self._channel(name)
+            channel['seq'] += 1
+            channel['events'].append((channel['seq'], event, data))
+            if len(channel['events']) > self.history:
+                del channel['events'][:len(channel['events']) - self.history]
+            channel['closed'] = False
+            channel['updated'] = time.monotonic()
+            self._prune()
+            self._cond.notify_all()
+
+    def close(self, name):
+        """Marks a channel finished; its replay buffer is kept for late subscribers."""
+        with self._cond:
+            channel = self._channel(name)
+            channel['closed'] = True
+            channel['updated'] = time.monotonic()
+            self._cond.notify_all()
+
+    def reopen(self, name):
+        """
+        Starts a new run on a finished channel: its buffered events are dropped
+        so new subscribers don't replay the previous run's final event.
+        Sequence numbers keep counting up. A channel still open is left as is.
+        """
+        with self._cond:
+            channel = self._channels.get(name)
+            if channel is not None and channel['closed']:
+                channel['events'] = []
+                channel['closed'] = False
+                channel['updated'] = time.monotonic()
+                self._cond.notify_all()
+
+    def _prune(self):
+        cutoff = time.monotonic() - self.retain_seconds
+        stale = [n for n, c in self._channels.items() if c['closed'] and c['updated'] < cutoff]
+        for name in stale:
+            del self._channels[name]
+
+    def listen(self, name, last_seq=0, timeout=15):
+        """
+        Yields (seq, event, data) tuples as they are published, replaying any
+        buffered events after last_seq first. Yields None whenever `timeout`
+        seconds pass without events so callers can send heartbeats or check
+        other sources. Stops once the channel is closed and drained.
+        """
+        while True:
+            with self._cond:
+                channel = self._channels.get(name)
+                pending = [e for e in channel['events'] if e[0] > last_seq] if channel else []
+                if not pending and not (channel and channel['closed']):
+                    self._cond.wait(timeout)
+                    channel = self._channels.get(name)
+                    pending = [e for e in channel['events'] if e[0] > last_seq] if channel else []
+                closed = bool(channel and channel['closed'])
+
+            if not pending:
+                if closed:
+                    return
+                yield None
+                continue
+
+            for item in pending:
+                last_seq = item[0]
+                yield item
+
+
+def format_sse(event, data, event_id=None):
+    """Formats one Server-Sent Events frame."""
+    frame = f"id: {event_id}\n" if event_id is not None else ""
+    return frame + f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
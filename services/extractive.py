@@ -0,0 +1,115 @@
+"""
+Extractive Summary Service
+Picks the most central sentences of a transcript with TextRank over TF-IDF
+sentence vectors, in NumPy only (no LLM). It runs in milliseconds, so the
+results page can show a provisional summary while the map-reduce summary is
+still being generated.
+"""
+import re
+import numpy as np
+from services.text_index import tokenize
+
+
+_SENTENCE_END = re.compile(r"(?<=[.!?।])\s+")
+_WORD = re.compile(r"\w+")
+
+# Auto-generated captions rarely have punctuation: longer runs are cut into
+# windows of this many words so each "sentence" is readable on its own
+WINDOW_WORDS = 30
+MIN_WORDS = 6
+# Candidates and vocabulary are capped so a multi-hour episode stays fast
+MAX_SENTENCES = 4000
+MAX_TERMS = 3000
+
+
+def split_sentences(text):
+    """Returns: candidate sentences, with unpunctuated runs cut into word windows"""
+    sentences = []
+    for part in _SENTENCE_END.split(text or ''):
+        words = part.split()
+        if len(words) < MIN_WORDS:
+            continue
+        for i in range(0, len(words), WINDOW_WORDS):
+            window = words[i:i + WINDOW_WORDS]
+            if len(window) >= MIN_WORDS:
+                sentences.append(' '.join(window))
+    if len(sentences) > MAX_SENTENCES:
+        # Evenly spaced sample keeps the whole episode represented
+        step = len(sentences) / MAX_SENTENCES
+        sentences = [sentences[int(i * step)] for i in range(MAX_SENTENCES)]
+    return sentences
+
+
+def _tfidf(sentences):
+    """Returns: (n_sentences, n_terms) float32 TF-IDF matrix with unit-length rows."""
+    # Non-English transcripts have no stemmed terms; fall back to raw words
+    docs = [tokenize(s) or _WORD.findall(s.lower()) for s in sentences]
+    df = {}
+    for terms in docs:
+        for term in set(terms):
+            df[term] = df.get(term, 0) + 1
+
+    n = len(sentences)
+    # Terms in one sentence or in most of them don't help tell sentences apart
+    vocab = [t for t, count in df.items() if 1 < count <= 0.5 * n] or list(df)
+    vocab = sorted(vocab, key=lambda t: (-df[t], t))[:MAX_TERMS]
+    column = {term: j for j, term in enumerate(vocab)}
+
+    matrix = np.zeros((n, len(vocab)), dtype=np.float32)
+    for i, terms in enumerate(docs):
+        for term in terms:
+            j = column.get(term)
+            if j is not None:
+                matrix[i, j] += 1.0
+    idf = np.log((1 + n) / (1 + np.array([df[t] for t in vocab], dtype=np.float32))) + 1
+    matrix = np.log1p(matrix) * idf
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def textrank(matrix, damping=0.85, iterations=50, tolerance=1e-6):
+    """
+    PageRank over the cosine-similarity graph of the rows of `matrix`.
+    The n x n similarity matrix is never built: S @ v is computed as
+    X @ (X.T @ v), minus the self-similarity on the diagonal.
+    Returns: float32 score per row
+    """
+    n = matrix.shape[0]
+    self_similarity = np.einsum('ij,ij->i', matrix, matrix)
+    degree = matrix @ matrix.sum(axis=0) - self_similarity
+    # Sentences sharing no terms with any other just keep the teleport score
+    degree[degree <= 0] = 1.0
+
+    scores = np.full(n, 1.0 / n, dtype=np.float32)
+    for _ in range(iterations):
+        weighted = scores / degree
+        spread = matrix @ (matrix.T @ weighted) - self_similarity * weighted
+        updated = (1 - damping) / n + damping * spread
+        if np.abs(updated - scores).sum() < tolerance:
+            return updated
+        scores = updated
+    return scores
+
+
+def extractive_summary(text, max_sentences=5, redundancy=0.6):
+    """
+    The `max_sentences` highest-ranked sentences, skipping any too similar
+    (cosine above `redundancy`) to one already picked.
+    Returns: sentences in transcript order ([] if the text is too short)
+    """
+    sentences = split_sentences(text)
+    if len(sentences) <= max_sentences:
+        return sentences
+
+    matrix = _tfidf(sentences)
+    scores = textrank(matrix)
+
+    picked = []
+    for i in np.argsort(-scores, kind='stable'):
+        if len(picked) >= max_sentences:
+            break
+        if picked and float(np.max(matrix[picked] @ matrix[i])) > redundancy:
+            continue
+        picked.append(int(i))
+    return [sentences[i] for i in sorted(picked)]
@@ -0,0 +1,392 @@
+"""
+Job Queue Service
+Durable background job queue backed by MongoDB (with an in-process fallback)
+and a bounded worker pool that executes registered job handlers.
+"""
+import os
+import time
+import uuid
+import threading
+from datetime import datetime, timedelta
+from pymongo import ReturnDocument
+from pymongo.errors import PyMongoError, DuplicateKeyError
+
+
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_DONE = 'done'
+JOB_FAILED = 'failed'
+
+
+def _now():
+    return datetime.utcnow()
+
+
+class _LocalJobStore:
+    """
+    In-process job store used when MongoDB is unavailable.
+    Mirrors the Mongo document layout so workers don't care where a job lives.
+    Jobs held here do not survive a restart.
+    """
+
+    def __init__(self):
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def insert(self, job):
+        with self._lock:
+            for existing in self._jobs.values():
+                if existing.get('active') and existing['key'] == job['key']:
+                    return existing['_id'], False
+            self._jobs[job['_id']] = job
+            return job['_id'], True
+
+    def is_active(self, key):
+        with self._lock:
+            return any(j.get('active') and j['key'] == key for j in self._jobs.values())
+
+    def claim(self, lease_seconds):
+        now = _now()
+        with self._lock:
+            runnable = [
+                j for j in self._jobs.values()
+                if (j['status'] == JOB_QUEUED and j['run_at'] <= now)
+                or (j['status'] == JOB_RUNNING and j['locked_until'] < now)
+            ]
+            if not runnable:
+                return None
+            job = min(runnable, key=lambda j: (-j.get('priority', 0), j['run_at']))
+            job['status'] = JOB_RUNNING
+            job['started_at'] = now
+            job['locked_until'] = now + timedelta(seconds=lease_seconds)
+            job['attempts'] += 1
+            return dict(job)
+
+    def extend(self, job_id, attempts, locked_until):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if not job or job['status'] != JOB_RUNNING or job['attempts'] != attempts:
+                return False
+            job['locked_until'] = locked_until
+            return True
+
+    def update(self, job_id, fields, unset=()):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if not job:
+                return
+            job.update(fields)
+            for name in unset:
+                job.pop(name, None)
+            # Finished jobs are only kept for stats; drop their payloads
+            if job['status'] in (JOB_DONE, JOB_FAILED):
+                job['payload'] = {}
+
+    def counts(self):
+        with self._lock:
+            counts = {}
+            for job in self._jobs.values():
+                counts[job['status']] = counts.get(job['status'], 0) + 1
+            return counts
+
+
+class JobQueue:
+    """
+    Durable job queue.
+    Jobs are stored in MongoDB so they survive restarts; a job whose worker died
+    is reclaimed once its lease expires (running workers keep renewing theirs).
+    If MongoDB is unreachable the queue falls back to an in-process store for a
+    cooldown period.
+    """
+
+    def __init__(self, collection=None):
+        self.collection = collection
+        self.local = _LocalJobStore()
+        self.lease_seconds = int(os.getenv("JOB_LEASE_SECONDS", "900"))
+        self.max_attempts = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+        self.backoff_seconds = float(os.getenv("JOB_BACKOFF_SECONDS", "10"))
+        self.mongo_retry_seconds = 30
+        self._mongo_down_until = 0.0
+        self.wakeup = threading.Event()
+
+        if os.getenv("JOB_QUEUE_BACKEND", "mongo").lower() == "local":
+            self.collection = None
+
+    # -------------------- Backend selection --------------------
+
+    def _use_mongo(self):
+        return self.collection is not None and time.monotonic() >= self._mongo_down_until
+
+    def _mongo_failed(self, e):
+        print(f"[PodcastAI] Job queue: MongoDB unavailable ({e}), using local queue.")
+        self._mongo_down_until = time.monotonic() + self.mongo_retry_seconds
+
+    # -------------------- Producer API --------------------
+
+    def enqueue(self, kind, payload, key=None, max_attempts=None, priority=0):
+        """
+        Queue a job unless an active job with the same key already exists.
+        Higher-priority jobs are claimed first.
+        Returns: (job_id, created)
+        """
+        now = _now()
+        job = {
+            '_id': uuid.uuid4().hex,
+            'key': key or uuid.uuid4().hex,
+            'kind': kind,
+            'payload': payload,
+            'priority': priority,
+            'status': JOB_QUEUED,
+            'active': True,
+            'attempts': 0,
+            'max_attempts': max_attempts or self.max_attempts,
+            'run_at': now,
+            'locked_until': now,
+            'created_at': now,
+            'last_error': None
+        }
+
+        result = None
+        if self._use_mongo():
+            try:
+                result = self._mongo_enqueue(job)
+            except PyMongoError as e:
+                self._mongo_failed(e)
+
+        if result is None:
+            result = self.local.insert(job)
+
+        self.wakeup.set()
+        return result
+
+    def _mongo_enqueue(self, job):
+        fields = {k: v for k, v in job.items() if k not in ('key', 'active')}
+        try:
+            res = self.collection.update_one(
+                {'key': job['key'], 'active': True},
+                {'$setOnInsert': fields},
+                upsert=True
+            )
+        except DuplicateKeyError:
+            # Lost an insert race against another producer for the same key
+            res = None
+
+        if res is not None and res.upserted_id is not None:
+            return res.upserted_id, True
+
+        existing = self.collection.find_one({'key': job['key'], 'active': True}, {'_id': 1})
+        return (existing['_id'] if existing else None), False
+
+    def is_active(self, key):
+        """True while a job with this key is queued or running."""
+        if self.local.is_active(key):
+            return True
+        if self._use_mongo():
+            try:
+                return self.collection.find_one({'key': key, 'active': True}, {'_id': 1}) is not None
+            except PyMongoError as e:
+                self._mongo_failed(e)
+        return False
+
+    # -------------------- Worker API --------------------
+
+    def claim(self):
+        """
+        Atomically claim the next runnable job (queued and due, or running with
+        an expired lease). A reclaimed job past its last attempt comes back
+        with attempts > max_attempts and is failed without running.
+        Returns the job dict or None.
+        """
+        if self._use_mongo():
+            try:
+                now = _now()
+                job = self.collection.find_one_and_update(
+                    {'$or': [
+                        {'status': JOB_QUEUED, 'run_at': {'$lte': now}},
+                        {'status': JOB_RUNNING, 'locked_until': {'$lt': now}}
+                    ]},
+                    {
+                        '$set': {
+                            'status': JOB_RUNNING,
+                            'started_at': now,
+                            'locked_until': now + timedelta(seconds=self.lease_seconds)
+                        },
+                        '$inc': {'attempts': 1}
+                    },
+                    sort=[('priority', -1), ('run_at', 1)],
+                    return_document=ReturnDocument.AFTER
+                )
+                if job:
+                    job['_backend'] = 'mongo'
+                    return job
+            except PyMongoError as e:
+                self._mongo_failed(e)
+
+        job = self.local.claim(self.lease_seconds)
+        if job:
+            job['_backend'] = 'local'
+        return job
+
+    def extend_lease(self, job):
+        """
+        Pushes a running job's lease forward by another lease period.
+        Returns: False if the job was meanwhile reclaimed or finished
+        """
+        locked_until = _now() + timedelta(seconds=self.lease_seconds)
+        if job.get('_backend') == 'mongo':
+            try:
+                res = self.collection.update_one(
+                    {'_id': job['_id'], 'status': JOB_RUNNING, 'attempts': job['attempts']},
+                    {'$set': {'locked_until': locked_until}}
+                )
+                return res.matched_count > 0
+            except PyMongoError as e:
+                print(f"[PodcastAI] Job queue: failed to extend lease of job {job['_id']}: {e}")
+                return True
+        return self.local.extend(job['_id'], job['attempts'], locked_until)
+
+    def _update(self, job, fields, unset=()):
+        if job.get('_backend') == 'mongo':
+            update = {'$set': fields}
+            if unset:
+                update['$unset'] = {name: '' for name in unset}
+            try:
+                self.collection.update_one({'_id': job['_id']}, update)
+            except PyMongoError as e:
+                print(f"[PodcastAI] Job queue: failed to update job {job['_id']}: {e}")
+        else:
+            self.local.update(job['_id'], fields, unset)
+
+    def complete(self, job):
+        self._update(job, {'status': JOB_DONE, 'finished_at': _now()}, unset=('active',))
+
+    def fail(self, job, error):
+        """
+        Record a failed attempt. Reschedules with exponential backoff while
+        attempts remain. Returns True if the job was given up on.
+        """
+        if job['attempts'] < job.get('max_attempts', self.max_attempts):
+            delay = self.backoff_seconds * (2 ** (job['attempts'] - 1))
+            self._update(job, {
+                'status': JOB_QUEUED,
+                'run_at': _now() + timedelta(seconds=delay),
+                'last_error': str(error)
+            })
+            return False
+
+        self._update(job, {
+            'status': JOB_FAILED,
+            'finished_at': _now(),
+            'last_error': str(error)
+        }, unset=('active',))
+        return True
+
+    def stats(self):
+        """Returns job counts per status for both backends."""
+        stats = {'local': self.local.counts(), 'mongo': {}}
+        if self._use_mongo():
+            try:
+                for row in self.collection.aggregate([
+                    {'$group': {'_id': '$status', 'count': {'$sum': 1}}}
+                ]):
+                    stats['mongo'][row['_id']] = row['count']
+            except PyMongoError as e:
+                self._mongo_failed(e)
+        return stats
+
+
+class WorkerPool:
+    """
+    Fixed-size pool of daemon threads pulling jobs from a JobQueue.
+    Concurrency is bounded by JOB_WORKERS no matter how many jobs are queued.
+    """
+
+    def __init__(self, queue, concurrency=None, poll_interval=2.0):
+        self.queue = queue
+        self.concurrency = concurrency or int(os.getenv("JOB_WORKERS", "2"))
+        self.poll_interval = poll_interval
+        self.handlers = {}
+        self.threads = []
+        self._lock = threading.Lock()
+        self._busy = 0
+
+    def register(self, kind, handler, on_give_up=None):
+        """
+        Register handler(payload) for a job kind. on_give_up(payload, error) is
+        called once a job has exhausted its retries.
+        """
+        self.handlers[kind] = (handler, on_give_up)
+
+    def start(self):
+        with self._lock:
+            if self.threads:
+                return
+            for i in range(self.concurrency):
+                t = threading.Thread(target=self._run, name=f"job-worker-{i}", daemon=True)
+                t.start()
+                self.threads.append(t)
+        print(f"[PodcastAI] Job queue: started {self.concurrency} worker(s).")
+
+    def stats(self):
+        return {
+            'workers': self.concurrency,
+            'busy': self._busy,
+            'jobs': self.queue.stats()
+        }
+
+    def _run(self):
+        while True:
+            job = self.queue.claim()
+            if not job:
+                self.queue.wakeup.wait(self.poll_interval)
+                self.queue.wakeup.clear()
+                continue
+
+            with self._lock:
+                self._busy += 1
+            try:
+                self._execute(job)
+            finally:
+                with self._lock:
+                    self._busy -= 1
+
+    def _heartbeat(self, job, stop):
+        """Renews the job's lease every third of a lease period until `stop` is set."""
+        interval = max(self.queue.lease_seconds / 3, 0.1)
+        while not stop.wait(interval):
+            if not self.queue.extend_lease(job):
+                print(f"[PodcastAI] Job {job['kind']} {job['_id']}: lease lost while running.")
+                return
+
+    def _execute(self, job):
+        handler, on_give_up = self.handlers.get(job['kind'], (None, None))
+        if not handler:
+            self.queue.fail(job, f"No handler registered for job kind '{job['kind']}'")
+            return
+
+        if job['attempts'] > job.get('max_attempts', self.queue.max_attempts):
+            # Reclaimed after its worker died on the last attempt: don't run it again
+            self._fail(job, on_give_up, RuntimeError("lease expired on the final attempt"))
+            return
+
+        stop = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(job, stop), name="job-heartbeat", daemon=True)
+        heartbeat.start()
+        try:
+            try:
+                handler(job['payload'])
+            finally:
+                stop.set()
+            self.queue.complete(job)
+        except Exception as e:
+            print(f"[PodcastAI] Job {job['kind']} attempt {job['attempts']} failed: {e}")
+            self._fail(job, on_give_up, e)
+
+    def _fail(self, job, on_give_up, error):
+        """Records a failed attempt, calling on_give_up once retries are exhausted."""
+        gave_up = self.queue.fail(job, error)
+        if gave_up and on_give_up:
+            try:
+                on_give_up(job['payload'], error)
+            except Exception as hook_error:
+                print(f"[PodcastAI] Job give-up hook error: {hook_error}")
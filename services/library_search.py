@@ -0,0 +1,180 @@
+"""
+Library Search Service
+Ranked keyword search across every analyzed video. Each video's summary, key
+takeaways, topics and (most frequent) transcript terms are folded into one
+weight per term and stored as postings in MongoDB, indexed by (term, weight)
+so a query reads only the best postings for each of its terms. Videos are
+(re)indexed one at a time as they are analyzed.
+"""
+import os
+import re
+import math
+from collections import Counter
+from pymongo import UpdateOne
+from services.text_index import tokenize
+from services.output_cleaner import parse_summary_sections
+
+
+# Relative importance of each field a term can appear in
+FIELD_BOOSTS = {
+    'takeaways': 3.0,
+    'summary': 2.0,
+    'topics': 2.0,
+    'transcript': 1.0
+}
+
+
+class LibrarySearch:
+    """
+    Persistent inverted index over the summary library.
+    postings: {term, video_id, weight}   terms: {_id: term, df}
+    """
+
+    # Bump to have the startup backfill rebuild every video's postings
+    VERSION = 2
+
+    def __init__(self, postings_collection, terms_collection, summaries_collection):
+        self.postings = postings_collection
+        self.terms = terms_collection
+        self.summaries = summaries_collection
+        self.transcript_terms = int(os.getenv("SEARCH_TRANSCRIPT_TERMS", "300"))
+        self.candidates = int(os.getenv("SEARCH_CANDIDATES", "2000"))
+        self.k1 = 1.2
+
+    # -------------------- Indexing --------------------
+
+    def _term_weights(self, summary, transcript, topics):
+        sections = parse_summary_sections(summary)
+        topic_text = ' '.join(
+            ' '.join([t.get('topic', '')] + [q.get('q', '') for q in t.get('questions', [])])
+            for t in topics or [] if isinstance(t, dict)
+        )
+        fields = {
+            'summary': sections['summary'] or sections['raw_cleaned'],
+            'takeaways': ' '.join(sections['keypoints']),
+            'topics': topic_text,
+            'transcript': transcript or ''
+        }
+
+        weights = Counter()
+        for field, text in fields.items():
+            counts = Counter(tokenize(text))
+            if field == 'transcript':
+                # Only a transcript's most frequent terms are worth a posting
+                counts = dict(counts.most_common(self.transcript_terms))
+            for term, tf in counts.items():
+                # Saturating term frequency, as in BM25
+                weights[term] += FIELD_BOOSTS[field] * tf * (self.k1 + 1) / (tf + self.k1)
+        return weights
+
+    def index_video(self, video_id, summary, transcript='', topics=None):
+        """
+        Replaces a video's postings and adjusts document frequencies.
+        Returns: number of terms indexed
+        """
+        weights = self._term_weights(summary, transcript, topics)
+        old_terms = {p['term'] for p in self.postings.find({'video_id': video_id}, {'term': 1})}
+
+        self.postings.delete_many({'video_id': video_id})
+        if weights:
+            self.postings.insert_many([
+                {'term': term, 'video_id': video_id, 'weight': round(weight, 4)}
+                for term, weight in weights.items()
+            ], ordered=False)
+
+        new_terms = set(weights)
+        df_updates = [
+            UpdateOne({'_id': term}, {'$inc': {'df': 1}}, upsert=True)
+            for term in new_terms - old_terms
+        ] + [
+            UpdateOne({'_id': term}, {'$inc': {'df': -1}})
+            for term in old_terms - new_terms
+        ]
+        if df_updates:
+            self.terms.bulk_write(df_updates, ordered=False)
+
+        # Legacy duplicate records share the postings, so all of them are stamped
+        self.summaries.update_many({'video_id': video_id}, {'$set': {'search_version': self.VERSION}})
+        return len(weights)
+
+    def is_current(self, video_id):
+        """True when a video's postings are at the current index format."""
+        return self.summaries.find_one(
+            {'video_id': video_id, 'search_version': {'$ne': self.VERSION}}, {'_id': 1}
+        ) is None
+
+    def stale_video_ids(self, limit=100, after=None):
+        """
+        Video IDs with a summary whose postings are missing or outdated, in
+        video_id order. Pass the last ID of a page as `after` for the next one.
+        """
+        query = {'summary': {'$exists': True}, 'search_version': {'$ne': self.VERSION}}
+        if after is not None:
+            query['video_id'] = {'$gt': after}
+        cursor = self.summaries.find(query, {'video_id': 1}).sort('video_id', 1).limit(limit)
+        return list(dict.fromkeys(doc['video_id'] for doc in cursor))
+
+    # -------------------- Querying --------------------
+
+    def search(self, query, page=1, per_page=20):
+        """
+        Ranks videos for a free-text query.
+        Returns: {'query', 'page', 'per_page', 'total', 'results': [...]}
+        """
+        page = max(1, page)
+        per_page = max(1, min(per_page, 100))
+        terms = sorted(set(tokenize(query or '')))
+        response = {'query': query, 'page': page, 'per_page': per_page, 'total': 0, 'results': []}
+        if not terms:
+            return response
+
+        dfs = {doc['_id']: doc['df'] for doc in self.terms.find({'_id': {'$in': terms}, 'df': {'$gt': 0}})}
+        if not dfs:
+            return response
+
+        n = max(self.summaries.estimated_document_count(), 1)
+        scores = Counter()
+        matched = Counter()
+        for term, df in dfs.items():
+            idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+            best = self.postings.find(
+                {'term': term}, {'_id': 0, 'video_id': 1, 'weight': 1}
+            ).sort('weight', -1).limit(self.candidates)
+            for posting in best:
+                scores[posting['video_id']] += idf * posting['weight']
+                matched[posting['video_id']] += 1
+
+        # Videos matching more of the query's terms rank higher
+        ranked = sorted(
+            scores,
+            key=lambda vid: (-scores[vid] * matched[vid] / len(terms), vid)
+        )
+        response['total'] = len(ranked)
+
+        page_ids = ranked[(page - 1) * per_page:page * per_page]
+        records = {
+            doc['video_id']: doc for doc in self.summaries.find(
+                {'video_id': {'$in': page_ids}},
+                {'_id': 0, 'video_id': 1, 'video_url': 1, 'summary': 1, 'created_at': 1}
+            )
+        }
+        for vid in page_ids:
+            record = records.get(vid, {})
+            response['results'].append({
+                'video_id': vid,
+                'video_url': record.get('video_url', ''),
+                'score': round(scores[vid] * matched[vid] / len(terms), 4),
+                'matched_terms': matched[vid],
+                'snippet': self._snippet(record.get('summary', ''), set(terms)),
+                'created_at': record.get('created_at')
+            })
+        return response
+
+    @staticmethod
+    def _snippet(summary, terms, length=200):
+        """First summary sentence containing a query term (else the opening)."""
+        sentences = [s.strip() for s in re.split(r'(?<=[.!?।])\s+|\n+', summary or '') if s.strip()]
+        for sentence in sentences:
+            if terms & set(tokenize(sentence)):
+                return sentence[:length]
+        return sentences[0][:length] if sentences else ''
@@ -0,0 +1,136 @@
+"""
+LLM Cache Service
+Content-addressed cache for LLM responses. Entries are keyed by a hash of the
+model, temperature, options and the fully formatted prompt (template + input),
+with an in-memory LRU tier in front of an optional MongoDB tier that expires
+entries by TTL and caps the total number of stored responses.
+"""
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from pymongo.errors import PyMongoError
+
+
+class LLMCache:
+    """
+    Two-tier LLM response cache.
+    Memory tier: LRU bounded by LLM_CACHE_MEMORY_ITEMS.
+    Mongo tier: TTL index on last_used (see db.py) plus size-based eviction
+    down to LLM_CACHE_MAX_ENTRIES.
+    """
+
+    def __init__(self, collection=None):
+        self.collection = collection
+        self.enabled = os.getenv("LLM_CACHE_ENABLED", "1") != "0"
+        self.memory_items = int(os.getenv("LLM_CACHE_MEMORY_ITEMS", "512"))
+        self.max_entries = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "50000"))
+        self.evict_every = 100
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.memory_hits = 0
+        self.store_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(model, temperature, prompt, options=None):
+        payload = json.dumps(
+            [model, temperature, sorted((options or {}).items()), prompt],
+            ensure_ascii=False, default=str
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """Returns the cached response text or None."""
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return self._memory[key]
+
+        if self.collection is not None:
+            try:
+                doc = self.collection.find_one_and_update(
+                    {'_id': key},
+                    {'$set': {'last_used': datetime.utcnow()}, '$inc': {'hits': 1}},
+                    projection={'response': 1}
+                )
+            except PyMongoError as e:
+                print(f"[PodcastAI] LLM cache read error: {e}")
+                doc = None
+            if doc:
+                with self._lock:
+                    self.store_hits += 1
+                self._remember(key, doc['response'])
+                return doc['response']
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key, response, model=None):
+        if not self.enabled or not response:
+            return
+
+        self._remember(key, response)
+        if self.collection is None:
+            return
+
+        now = datetime.utcnow()
+        try:
+            self.collection.update_one(
+                {'_id': key},
+                {
+                    '$set': {'response': response, 'model': model, 'last_used': now},
+                    '$setOnInsert': {'created_at': now, 'hits': 0}
+                },
+                upsert=True
+            )
+        except PyMongoError as e:
+            print(f"[PodcastAI] LLM cache write error: {e}")
+            return
+
+        with self._lock:
+            self._writes += 1
+            due = self._writes % self.evict_every == 0
+        if due:
+            self._evict()
+
+    def _remember(self, key, response):
+        with self._lock:
+            self._memory[key] = response
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_items:
+                self._memory.popitem(last=False)
+
+    def _evict(self):
+        """Deletes the least recently used entries beyond max_entries."""
+        try:
+            excess = self.collection.estimated_document_count() - self.max_entries
+            if excess <= 0:
+                return
+            stale = self.collection.find({}, {'_id': 1}).sort('last_used', 1).limit(excess)
+            ids = [doc['_id'] for doc in stale]
+            if ids:
+                self.collection.delete_many({'_id': {'$in': ids}})
+                print(f"[PodcastAI] LLM cache: evicted {len(ids)} entries.")
+        except PyMongoError as e:
+            print(f"[PodcastAI] LLM cache eviction error: {e}")
+
+    def stats(self):
+        lookups = self.memory_hits + self.store_hits + self.misses
+        return {
+            'enabled': self.enabled,
+            'memory_entries': len(self._memory),
+            'memory_hits': self.memory_hits,
+            'store_hits': self.store_hits,
+            'misses': self.misses,
+            'hit_rate': round((self.memory_hits + self.store_hits) / lookups, 3) if lookups else 0
+        }
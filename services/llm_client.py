@@ -0,0 +1,275 @@
+"""
+LLM Client Service
+Shared Ollama client layer. Owns one ChatOllama per (temperature, options)
+backed by a keep-alive HTTP connection pool, a dedicated event loop that all
+LLM calls run on, a global concurrency limit and request timeouts.
+"""
+import os
+import time
+import queue
+import asyncio
+import threading
+import httpx
+from langchain_core.messages import AIMessage
+from langchain_ollama import ChatOllama
+from services.llm_cache import LLMCache
+
+
+def llm_unavailable(error):
+    """True if an LLM call failed because Ollama couldn't be reached or didn't answer in time."""
+    if isinstance(error, (httpx.TransportError, asyncio.TimeoutError, ConnectionError)):
+        return True
+    # Ollama reports overload and server faults as 5xx responses
+    status = getattr(error, 'status_code', None)
+    return isinstance(status, int) and status >= 500
+
+
+class LLMClient:
+    """
+    Process-wide gateway for every Ollama call.
+    Async calls are executed on a single background event loop so the pooled
+    async HTTP connections are reused across requests instead of being torn
+    down with each asyncio.run().
+    """
+
+    def __init__(self):
+        self.model = os.getenv("OLLAMA_MODEL", "gpt-oss:latest")
+        self.base_url = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+        self.timeout = float(os.getenv("LLM_TIMEOUT_SECONDS", "300"))
+        self.max_concurrency = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+        # Context window requested from Ollama; chunking is budgeted against it
+        self.context_tokens = int(os.getenv("LLM_CONTEXT_TOKENS", "8192"))
+        self.pool_size = int(os.getenv("LLM_POOL_CONNECTIONS", str(self.max_concurrency * 2)))
+
+        self._models = {}
+        self._lock = threading.Lock()
+        # Memory-only until home.py attaches the MongoDB-backed cache
+        self.cache = LLMCache()
+        self._loop = None
+        self._semaphore = None
+
+        # Metrics
+        self._in_flight = 0
+        self._waiting = 0
+        self._calls = 0
+        self._errors = 0
+        self._timeouts = 0
+        self._total_latency = 0.0
+
+    # -------------------- Clients --------------------
+
+    def chat_model(self, temperature=0.7, **options):
+        """Returns the shared ChatOllama for this temperature and option set."""
+        key = (temperature, tuple(sorted((k, repr(v)) for k, v in options.items())))
+        with self._lock:
+            llm = self._models.get(key)
+            if llm is None:
+                llm = ChatOllama(
+                    model=self.model,
+                    base_url=self.base_url,
+                    temperature=temperature,
+                    num_ctx=options.pop('num_ctx', self.context_tokens),
+                    client_kwargs={
+                        'timeout': self.timeout,
+                        'limits': httpx.Limits(
+                            max_connections=self.pool_size,
+                            max_keepalive_connections=self.pool_size,
+                            keepalive_expiry=60
+                        )
+                    },
+                    **options
+                )
+                self._models[key] = llm
+            return llm
+
+    # -------------------- Event loop --------------------
+
+    def _ensure_loop(self):
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name="llm-loop", daemon=True)
+                thread.start()
+                self._semaphore = asyncio.Semaphore(self.max_concurrency)
+                self._loop = loop
+            return self._loop
+
+    def run(self, coro):
+        """
+        Runs a coroutine on the shared LLM event loop and blocks for its result.
+        Use this instead of asyncio.run() for anything that calls the LLM.
+        """
+        loop = self._ensure_loop()
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            raise RuntimeError("LLMClient.run() called from the LLM loop; await the coroutine instead")
+        return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+    # -------------------- Calls --------------------
+
+    async def ainvoke(self, prompt, temperature=0.7, use_cache=True, limiter=None, validate=None, **options):
+        """
+        Invoke the LLM under the global concurrency limit and timeout.
+        Identical (model, temperature, options, prompt) calls are answered from
+        the response cache unless use_cache is False. With `validate(text)`,
+        only responses it accepts are cached or served from the cache, so a
+        caller retrying after a malformed answer gets a fresh one. An optional
+        AdaptiveLimiter additionally gates (and learns from) real LLM calls;
+        cache hits bypass it.
+        """
+        loop = self._ensure_loop()
+        if asyncio.get_running_loop() is not loop:
+            # Called from some other loop: hop onto the shared one
+            return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(
+                self.ainvoke(prompt, temperature, use_cache, limiter, validate, **options), loop
+            ))
+
+        key = None
+        if use_cache:
+            key = LLMCache.make_key(self.model, temperature, prompt, options)
+            # Mongo lookups are blocking; keep them off the event loop
+            cached = await loop.run_in_executor(None, self.cache.get, key)
+            if cached is not None and self._valid(validate, cached):
+                return AIMessage(content=cached)
+
+        response = await self._call(prompt, temperature, limiter, **options)
+        if key and self._valid(validate, response.content):
+            await loop.run_in_executor(None, self.cache.set, key, response.content, self.model)
+        return response
+
+    @staticmethod
+    def _valid(validate, text):
+        if validate is None:
+            return True
+        try:
+            return bool(validate(text))
+        except Exception:
+            return False
+
+    async def _call(self, prompt, temperature, limiter=None, **options):
+        if limiter is None:
+            return await self._call_pooled(prompt, temperature, **options)
+
+        await limiter.acquire()
+        timing = {}
+        ok = False
+        try:
+            response = await self._call_pooled(prompt, temperature, timing=timing, **options)
+            ok = True
+            return response
+        finally:
+            # Only Ollama's time counts, not the wait for the global limit
+            limiter.release(timing.get('seconds', 0.0), ok)
+
+    async def _call_pooled(self, prompt, temperature, timing=None, **options):
+        llm = self.chat_model(temperature, **options)
+        self._waiting += 1
+        async with self._semaphore:
+            self._waiting -= 1
+            self._in_flight += 1
+            started = time.monotonic()
+            try:
+                return await asyncio.wait_for(llm.ainvoke(prompt), self.timeout)
+            except asyncio.TimeoutError:
+                self._timeouts += 1
+                raise
+            except Exception:
+                self._errors += 1
+                raise
+            finally:
+                elapsed = time.monotonic() - started
+                self._in_flight -= 1
+                self._calls += 1
+                self._total_latency += elapsed
+                if timing is not None:
+                    timing['seconds'] = elapsed
+
+    async def astream(self, prompt, temperature=0.7, use_cache=True, **options):
+        """
+        Streams response text chunks as Ollama generates them. Must run on the
+        shared LLM loop (i.e. inside a coroutine passed to run()). A cached
+        response is yielded as a single chunk.
+        """
+        key = None
+        if use_cache:
+            key = LLMCache.make_key(self.model, temperature, prompt, options)
+            cached = await self._loop.run_in_executor(None, self.cache.get, key)
+            if cached is not None:
+                yield cached
+                return
+
+        llm = self.chat_model(temperature, **options)
+        parts = []
+        self._waiting += 1
+        async with self._semaphore:
+            self._waiting -= 1
+            self._in_flight += 1
+            started = time.monotonic()
+            try:
+                async for chunk in llm.astream(prompt):
+                    if chunk.content:
+                        parts.append(chunk.content)
+                        yield chunk.content
+            except Exception:
+                self._errors += 1
+                raise
+            finally:
+                self._in_flight -= 1
+                self._calls += 1
+                self._total_latency += time.monotonic() - started
+
+        if key:
+            await self._loop.run_in_executor(None, self.cache.set, key, ''.join(parts), self.model)
+
+    def stream(self, prompt, temperature=0.7, use_cache=True, **options):
+        """Blocking generator over astream() for synchronous callers."""
+        loop = self._ensure_loop()
+        items = queue.Queue()
+        finished = object()
+
+        async def pump():
+            try:
+                async for part in self.astream(prompt, temperature, use_cache, **options):
+                    items.put(part)
+            except Exception as e:
+                items.put(e)
+            finally:
+                items.put(finished)
+
+        asyncio.run_coroutine_threadsafe(pump(), loop)
+        while True:
+            item = items.get()
+            if item is finished:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+    def invoke(self, prompt, temperature=0.7, use_cache=True, validate=None, **options):
+        """Blocking variant of ainvoke() for synchronous callers."""
+        return self.run(self.ainvoke(prompt, temperature, use_cache, validate=validate, **options))
+
+    def stats(self):
+        """Returns pool utilisation and call metrics."""
+        return {
+            'model': self.model,
+            'max_concurrency': self.max_concurrency,
+            'context_tokens': self.context_tokens,
+            'pool_connections': self.pool_size,
+            'clients': len(self._models),
+            'in_flight': self._in_flight,
+            'waiting': self._waiting,
+            'utilisation': round(self._in_flight / self.max_concurrency, 2) if self.max_concurrency else 0,
+            'calls': self._calls,
+            'errors': self._errors,
+            'timeouts': self._timeouts,
+            'avg_latency_seconds': round(self._total_latency / self._calls, 3) if self._calls else 0,
+            'cache': self.cache.stats()
+        }
+
+
+# Shared instance used by home.py and the services
+llm_client = LLMClient()
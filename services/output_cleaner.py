@@ -1,32 +1,144 @@
 """
 Output Cleaner Service
 Strips markdown artifacts and normalizes LLM output into clean structured data.
+Cleaning is a single line-by-line pass with module-level compiled patterns; it
+reproduces the original chain of whole-text regex substitutions exactly,
+including how headings and bullets swallow the blank lines around them
+(see bench_output_cleaner.py for the equivalence check and benchmark).
 """
 import re
 import json
 
 
+_HEADING = re.compile(r'#{1,6}')
+_RULE = re.compile(r'-{3,}')
+_DASH = re.compile(r'\s*-')
+_BULLET_PREFIX = re.compile(r'^[•\-*\d.]+\s*')
+
+# Section headers like "Summary", "सारांश", "Key Takeaways", "मुख्य बिंदु".
+# The summary runs from its header to the first takeaways header (or the end)
+_SUMMARY_HEADER = re.compile(r'(?:Summary|सारांश|सारांश)\s*\n', re.IGNORECASE)
+_TAKEAWAYS_HEADER = re.compile(r'Key Takeaways|मुख्य बिंदु|मुख्य मुद्दे', re.IGNORECASE)
+_TAKEAWAYS_SECTION = re.compile(
+    r'(?:Key Takeaways|मुख्य बिंदु|मुख्य मुद्दे)\s*\n(.*)',
+    re.DOTALL | re.IGNORECASE
+)
+_SECTION_MARKERS = ('### Summary', '### Key Takeaways', '### सारांश', '### मुख्य', 'Summary', 'Key Takeaways')
+
+
+def _strip_headings(lines):
+    """
+    Removes 1-6 leading '#' and the whitespace after them. A heading with
+    nothing after it also swallows the line break, any blank lines and the
+    next line's indentation, as `^#{1,6}\\s*` does on the whole text.
+    """
+    swallowing = False
+    for line in lines:
+        if swallowing:
+            rest = line.lstrip()
+            if not rest:
+                continue
+            swallowing = False
+            if len(rest) < len(line):
+                # Ended inside indentation: not a line start, so no heading here
+                yield rest
+                continue
+        match = _HEADING.match(line)
+        if not match:
+            yield line
+            continue
+        rest = line[match.end():].lstrip()
+        if rest:
+            yield rest
+        else:
+            swallowing = True
+    if swallowing:
+        yield ''
+
+
+def _normalize_bullets(lines):
+    """
+    Turns '-' bullets into '• ', as `^[\\s]*[-*]\\s+` does on the whole text:
+    blank lines directly above a bullet are swallowed, and a bullet with
+    nothing after it joins the next line.
+    """
+    blank = []      # whitespace-only lines a bullet below would swallow
+    joined = None   # bullet text waiting for the next line's content
+    held = None     # (prefix, blank, line) ending in a bare '-': a bullet if a line follows
+    for line in lines:
+        if held is not None:
+            joined, held = held[0] + '• ', None
+
+        prefix = ''
+        if joined is not None:
+            rest = line.lstrip()
+            if not rest:
+                continue
+            prefix, joined = joined, None
+            if len(rest) < len(line):
+                yield prefix + rest
+                continue
+
+        if not prefix and not line.strip():
+            blank.append(line)
+            continue
+
+        match = _DASH.match(line)
+        if match:
+            after = line[match.end():]
+            if not after:
+                held, blank = (prefix, blank, line), []
+                continue
+            if after[0].isspace():
+                blank = []
+                rest = after.lstrip()
+                if rest:
+                    yield prefix + '• ' + rest
+                else:
+                    joined = prefix + '• '
+                continue
+
+        yield from blank
+        blank = []
+        yield prefix + line
+
+    if held is not None:
+        yield from held[1]
+        yield held[0] + held[2]
+    if joined is not None:
+        yield joined
+    yield from blank
+
+
 def clean_text(text):
     """Remove markdown symbols and normalize whitespace."""
     if not text:
         return text
 
-    # Remove bold/italic markers
-    text = re.sub(r'\*{1,3}', '', text)
-    # Remove heading markers
-    text = re.sub(r'^#{1,6}\s*', '', text, flags=re.MULTILINE)
-    # Remove horizontal rules
-    text = re.sub(r'^-{3,}$', '', text, flags=re.MULTILINE)
-    # Remove inline code backticks
-    text = re.sub(r'`+', '', text)
-    # Normalize bullet characters to •
-    text = re.sub(r'^[\s]*[-*]\s+', '• ', text, flags=re.MULTILINE)
-    # Remove excessive blank lines
-    text = re.sub(r'\n{3,}', '\n\n', text)
-    # Strip leading/trailing whitespace per line
-    lines = [line.strip() for line in text.split('\n')]
-    text = '\n'.join(lines)
-    return text.strip()
+    # Bold/italic markers go first so "**# Title**" still reads as a heading;
+    # horizontal rules are dropped before inline code backticks are removed
+    lines = _strip_headings(text.replace('*', '').split('\n'))
+    lines = _normalize_bullets('' if _RULE.fullmatch(line) else line.replace('`', '') for line in lines)
+
+    # Runs of blank lines collapse to one; then each line is trimmed
+    cleaned = []
+    blank = False
+    for line in lines:
+        if not line:
+            blank = True
+            continue
+        if blank and cleaned:
+            cleaned.append('')
+        blank = False
+        cleaned.append(line.strip())
+
+    # Lines that were only whitespace are empty now; trim them at either end
+    start, end = 0, len(cleaned)
+    while start < end and not cleaned[start]:
+        start += 1
+    while end > start and not cleaned[end - 1]:
+        end -= 1
+    return '\n'.join(cleaned[start:end])
 
 
 def parse_summary_sections(raw_text):
@@ -46,34 +158,23 @@ def parse_summary_sections(raw_text):
     summary_part = ''
     keypoints = []
 
-    # Try to split by known section headers
-    # Match headers like "Summary", "सारांश", "Key Takeaways", "मुख्य बिंदु", etc.
-    summary_pattern = re.compile(
-        r'(?:Summary|सारांश|सारांश)\s*\n(.*?)(?=(?:Key Takeaways|मुख्य बिंदु|मुख्य मुद्दे|$))',
-        re.DOTALL | re.IGNORECASE
-    )
-    takeaways_pattern = re.compile(
-        r'(?:Key Takeaways|मुख्य बिंदु|मुख्य मुद्दे)\s*\n(.*)',
-        re.DOTALL | re.IGNORECASE
-    )
-
-    summary_match = summary_pattern.search(cleaned)
-    takeaways_match = takeaways_pattern.search(cleaned)
+    summary_match = _SUMMARY_HEADER.search(cleaned)
+    takeaways_match = _TAKEAWAYS_SECTION.search(cleaned)
 
     if summary_match:
-        summary_part = summary_match.group(1).strip()
+        end = _TAKEAWAYS_HEADER.search(cleaned, summary_match.end())
+        summary_part = cleaned[summary_match.end():end.start() if end else len(cleaned)].strip()
     elif not takeaways_match:
         # No headers found — treat everything as summary
         summary_part = cleaned
 
     if takeaways_match:
-        takeaway_text = takeaways_match.group(1).strip()
-        for line in takeaway_text.split('\n'):
+        for line in takeaways_match.group(1).strip().split('\n'):
             line = line.strip()
             if not line:
                 continue
             # Remove bullet prefix
-            line = re.sub(r'^[•\-*\d.]+\s*', '', line).strip()
+            line = _BULLET_PREFIX.sub('', line, count=1).strip()
             if line and len(line) > 3:
                 keypoints.append(line)
 
@@ -84,6 +185,22 @@ def parse_summary_sections(raw_text):
     }
 
 
+def summary_sections(summary):
+    """
+    The summary paragraph and key takeaways of a stored summary, as shown in
+    the PDF report. Computed once when the summary is saved.
+    Returns: {'summary': str, 'keypoints': list[str]}
+    """
+    text = clean_text(summary)
+    summary_part = text
+    keypoints = []
+    if any(marker in text for marker in _SECTION_MARKERS):
+        parsed = parse_summary_sections(text)
+        summary_part = parsed['summary']
+        keypoints = parsed['keypoints']
+    return {'summary': summary_part or text, 'keypoints': keypoints}
+
+
 def build_clean_response(summary_text, sentiment_data=None, language='en'):
     """
     Build a structured response dict for the frontend.
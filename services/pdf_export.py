@@ -0,0 +1,122 @@
+"""
+PDF Export Service
+Bulk export of many videos' PDF reports as one streamed ZIP archive. Reports
+are normally pre-rendered when analysis completes; missing ones are rendered
+by a small thread pool straight into the PDF cache. The archive is written to
+the response in small blocks as each report is ready, so memory stays bounded
+by the number of renders in flight, not the batch.
+"""
+import os
+import zipfile
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+
+BLOCK_SIZE = 64 * 1024
+
+
+class _ZipStream:
+    """Write-only file object for zipfile; collects written bytes until drained."""
+
+    def __init__(self):
+        self._parts = []
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        """Returns: the bytes written since the last drain, as a list of zero or one block"""
+        if not self._parts:
+            return []
+        data = b''.join(self._parts)
+        self._parts = []
+        return [data]
+
+
+class PdfExporter:
+    """
+    Streams ZIP archives of cached PDF reports.
+    Reports are added in the order requested; at most `window` renders are
+    queued ahead of the one being written.
+    """
+
+    def __init__(self, cache, workers=None, window=None):
+        self.cache = cache
+        self.workers = workers or int(os.getenv("PDF_EXPORT_WORKERS", str(min(4, os.cpu_count() or 1))))
+        self.window = window or self.workers * 2
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _executor(self):
+        with self._lock:
+            if self._pool is None:
+                # Threads, not processes: forking the multithreaded server (and
+                # its MongoClient) isn't safe, and spawned children would
+                # re-import the app and start its job workers
+                self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="pdf-export")
+            return self._pool
+
+    def _submit(self, video_id, record):
+        """Returns: a future for the report's path, or None if already cached"""
+        if record is None or 'summary' not in record or self.cache.has(video_id, record):
+            return None
+        return self._executor().submit(self.cache.render, video_id, record)
+
+    def stream_zip(self, video_ids, load_records, filename=None):
+        """
+        Yields a ZIP archive of the reports for `video_ids`, block by block.
+        `load_records(video_ids)` returns {video_id: summary record} for a
+        slice of the list. Videos without a summary, or whose report fails to
+        render, are listed in missing.txt inside the archive.
+        """
+        filename = filename or (lambda video_id: f"podcast_summary_{video_id}.pdf")
+        out = _ZipStream()
+        missing = []
+        pending = deque()
+        remaining = iter(video_ids)
+
+        def fill():
+            # Records are loaded a window at a time, never the whole list
+            ids = [video_id for _, video_id in zip(range(self.window - len(pending)), remaining)]
+            if not ids:
+                return
+            records = load_records(ids)
+            for video_id in ids:
+                record = records.get(video_id)
+                pending.append((video_id, record, self._submit(video_id, record)))
+
+        # PDFs are already compressed; storing them keeps the stream cheap
+        with zipfile.ZipFile(out, 'w', compression=zipfile.ZIP_STORED) as archive:
+            fill()
+            while pending:
+                video_id, record, future = pending.popleft()
+                fill()
+                if record is None or 'summary' not in record:
+                    missing.append(f"{video_id}\tno summary")
+                    continue
+                try:
+                    if future is not None:
+                        future.result()
+                    pdf_file = self.cache.open(video_id, record)
+                except Exception as e:
+                    print(f"[PodcastAI] [{video_id}] PDF export error: {e}")
+                    missing.append(f"{video_id}\t{e}")
+                    continue
+
+                with pdf_file, archive.open(filename(video_id), 'w') as entry:
+                    while True:
+                        block = pdf_file.read(BLOCK_SIZE)
+                        if not block:
+                            break
+                        entry.write(block)
+                        yield from out.drain()
+                yield from out.drain()
+
+            if missing:
+                archive.writestr('missing.txt', '\n'.join(missing) + '\n')
+        yield from out.drain()
@@ -0,0 +1,239 @@
+"""
+PDF Report Service
+Renders the downloadable podcast report with ReportLab and keeps rendered
+reports on disk. Styles are built once at import. Each cached file is named by
+the video and a hash of the fields the report shows, so a record updated by
+analysis no longer matches its old file and downloads just stream the bytes.
+"""
+import os
+import re
+import json
+import hashlib
+import threading
+from datetime import datetime
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import inch
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+from reportlab.lib import colors
+from services.output_cleaner import summary_sections
+
+
+# -------------------- Styles --------------------
+
+STYLES = getSampleStyleSheet()
+
+TITLE_STYLE = ParagraphStyle(
+    'CustomTitle',
+    parent=STYLES['Heading1'],
+    fontSize=24,
+    textColor=colors.HexColor('#4E7FFF'),
+    spaceAfter=30,
+    alignment=1  # center
+)
+
+HEADING_STYLE = ParagraphStyle(
+    'CustomHeading',
+    parent=STYLES['Heading2'],
+    fontSize=14,
+    textColor=colors.HexColor('#1F2937'),
+    spaceAfter=12,
+    spaceBefore=12
+)
+
+BULLET_STYLE = ParagraphStyle(
+    'BulletStyle',
+    parent=STYLES['BodyText'],
+    bulletIndent=18,
+    leftIndent=36,
+    spaceBefore=4,
+    spaceAfter=4
+)
+
+CELL_STYLE = ParagraphStyle('CellStyle', parent=STYLES['Normal'], fontSize=9, alignment=1)
+HEADER_CELL_STYLE = ParagraphStyle('HeaderCellStyle', parent=STYLES['Normal'], fontSize=10,
+                                   alignment=1, textColor=colors.whitesmoke)
+
+TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#4E7FFF')),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('TOPPADDING', (0, 0), (-1, -1), 8),
+    ('BOTTOMPADDING', (0, 1), (-1, -1), 8),
+    ('LEFTPADDING', (0, 0), (-1, -1), 6),
+    ('RIGHTPADDING', (0, 0), (-1, -1), 6),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black)
+])
+
+# Page width minus the left and right margins (72 + 72)
+AVAILABLE_WIDTH = letter[0] - 144
+
+# Record fields shown in the report; a change to any of them is a new version
+REPORT_FIELDS = (
+    'video_url', 'summary', 'summary_sections', 'transcript_sentiment', 'summary_sentiment',
+    'transcription_confidence', 'summary_confidence'
+)
+# Bump when the layout changes so previously cached reports are re-rendered
+LAYOUT_VERSION = 1
+
+
+def _escape(text):
+    # Clean HTML-unsafe characters for ReportLab
+    return text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+
+
+def _table(rows):
+    # Cell content is wrapped in Paragraphs so long values wrap
+    wrapped = [
+        [Paragraph(str(cell), HEADER_CELL_STYLE if row_idx == 0 else CELL_STYLE) for cell in row]
+        for row_idx, row in enumerate(rows)
+    ]
+    col_count = len(rows[0])
+    table = Table(wrapped, colWidths=[AVAILABLE_WIDTH / col_count] * col_count)
+    table.setStyle(TABLE_STYLE)
+    return table
+
+
+def generate_pdf(record, output):
+    """
+    Writes the report (summary, sentiment analysis and accuracy scores) for a
+    summary record to the binary file object `output`.
+    """
+    doc = SimpleDocTemplate(output, pagesize=letter,
+                            rightMargin=72, leftMargin=72,
+                            topMargin=72, bottomMargin=18)
+    elements = [Paragraph("Podcast Summary Report", TITLE_STYLE), Spacer(1, 0.3*inch)]
+
+    video_url = record.get('video_url', '')
+    if video_url:
+        elements.append(Paragraph(f"<b>Podcast URL:</b> {video_url}", STYLES['Normal']))
+
+    date_str = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    elements.append(Paragraph(f"<b>Generated:</b> {date_str}", STYLES['Normal']))
+    elements.append(Spacer(1, 0.3*inch))
+
+    # Summary and key takeaways, parsed when the summary was saved
+    sections = record.get('summary_sections') or summary_sections(record.get('summary', 'N/A'))
+    elements.append(Paragraph("Summary", HEADING_STYLE))
+    elements.append(Paragraph(_escape(sections['summary']), STYLES['BodyText']))
+    elements.append(Spacer(1, 0.3*inch))
+
+    if sections['keypoints']:
+        elements.append(Paragraph("Key Takeaways", HEADING_STYLE))
+        for takeaway in sections['keypoints']:
+            elements.append(Paragraph(f"• {_escape(takeaway)}", BULLET_STYLE))
+        elements.append(Spacer(1, 0.3*inch))
+
+    trans_sent = record.get('transcript_sentiment', {})
+    summary_sent = record.get('summary_sentiment', {})
+    if trans_sent or summary_sent:
+        elements.append(Paragraph("Sentiment &amp; Emotion Analysis", HEADING_STYLE))
+        rows = [['Type', 'Sentiment', 'Score', 'Emotion']]
+        for label, sentiment in (('Transcript', trans_sent), ('Summary', summary_sent)):
+            if sentiment:
+                rows.append([
+                    label,
+                    sentiment.get('sentiment', 'N/A'),
+                    f"{sentiment.get('sentiment_score', 0)}%",
+                    sentiment.get('emotion', 'N/A')
+                ])
+        elements.append(_table(rows))
+        elements.append(Spacer(1, 0.3*inch))
+
+    trans_acc = record.get('transcription_confidence', 0)
+    summary_acc = record.get('summary_confidence', 0)
+    if trans_acc or summary_acc:
+        elements.append(Paragraph("Analysis Accuracy", HEADING_STYLE))
+        elements.append(_table([
+            ['Type', 'Confidence'],
+            ['Transcription', f"{trans_acc}%"],
+            ['Summary', f"{summary_acc}%"]
+        ]))
+
+    doc.build(elements)
+
+
+def report_version(record):
+    """Returns: short hash of the report fields of a summary record"""
+    fields = {field: record.get(field) for field in REPORT_FIELDS}
+    fields['layout'] = LAYOUT_VERSION
+    payload = json.dumps(fields, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+
+
+# -------------------- Cache --------------------
+
+class PdfCache:
+    """
+    Rendered reports in PDF_CACHE_DIR/<video_id>-<version>.pdf. Writing a
+    new version removes the video's older ones.
+    """
+
+    def __init__(self, directory=None):
+        self.directory = directory or os.getenv("PDF_CACHE_DIR", os.path.join("data", "pdfs"))
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.renders = 0
+
+    @staticmethod
+    def _name(video_id):
+        return re.sub(r'[^A-Za-z0-9_-]', '_', video_id)
+
+    def _path(self, video_id, version):
+        return os.path.join(self.directory, f"{self._name(video_id)}-{version}.pdf")
+
+    def has(self, video_id, record):
+        return os.path.exists(self._path(video_id, report_version(record)))
+
+    def render(self, video_id, record):
+        """Renders and stores the report for the record's current fields. Returns: file path"""
+        version = report_version(record)
+        path = self._path(video_id, version)
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                generate_pdf(record, f)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        with self._lock:
+            self.renders += 1
+        self._prune(video_id, keep=path)
+        return path
+
+    def _prune(self, video_id, keep):
+        prefix = f"{self._name(video_id)}-"
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return
+        for name in names:
+            path = os.path.join(self.directory, name)
+            if name.startswith(prefix) and name.endswith('.pdf') and path != keep:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def open(self, video_id, record):
+        """
+        Returns: the cached report as an open binary file, rendering it first
+        if the record has changed since it was cached
+        """
+        path = self._path(video_id, report_version(record))
+        try:
+            f = open(path, 'rb')
+        except FileNotFoundError:
+            return open(self.render(video_id, record), 'rb')
+        with self._lock:
+            self.hits += 1
+        return f
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'renders': self.renders}
@@ -0,0 +1,83 @@
+"""
+Progress Watcher Service
+Turns analysis progress updates on the summaries collection into events on
+the in-process EventBroker. Uses a MongoDB change stream when the deployment
+supports one (replica set / Atlas), so progress made by workers in any process
+reaches every SSE subscriber. On a standalone server the watcher stays
+inactive and callers publish their own updates locally instead.
+"""
+import os
+import time
+import threading
+
+
+class ProgressWatcher:
+    """
+    Background change-stream consumer.
+    `active` is True while the change stream is open; while it is False,
+    writers are expected to publish progress to the broker themselves.
+    """
+
+    def __init__(self, collection, broker, channel_for, retry_seconds=30):
+        self.collection = collection
+        self.broker = broker
+        self.channel_for = channel_for
+        self.retry_seconds = retry_seconds
+        self.enabled = os.getenv("PROGRESS_CHANGE_STREAMS", "1") != "0"
+        self.active = False
+        self._resume_token = None
+        self._thread = None
+
+    def start(self):
+        if not self.enabled or self._thread:
+            return
+        self._thread = threading.Thread(target=self._run, name="progress-watcher", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        # Every finished analysis step sets analysis_updated_at, even when
+        # analysis_progress itself doesn't change
+        pipeline = [{'$match': {
+            'operationType': 'update',
+            '$or': [
+                {'updateDescription.updatedFields.analysis_progress': {'$exists': True}},
+                {'updateDescription.updatedFields.analysis_updated_at': {'$exists': True}}
+            ]
+        }}]
+        while True:
+            try:
+                with self.collection.watch(
+                    pipeline,
+                    full_document='updateLookup',
+                    resume_after=self._resume_token
+                ) as stream:
+                    if not self.active:
+                        print("[PodcastAI] Progress watcher: listening on MongoDB change stream.")
+                    self.active = True
+                    for change in stream:
+                        self._resume_token = stream.resume_token
+                        self._dispatch(change)
+            except Exception as e:
+                if not self.active:
+                    # Standalone server (or driver without change streams): not worth retrying
+                    print(f"[PodcastAI] Progress watcher: change streams unavailable ({e}), publishing locally.")
+                    return
+                print(f"[PodcastAI] Progress watcher: change stream closed ({e}), retrying in {self.retry_seconds}s.")
+                self.active = False
+                self._resume_token = None
+                time.sleep(self.retry_seconds)
+
+    def _dispatch(self, change):
+        document = change.get('fullDocument') or {}
+        video_id = document.get('video_id')
+        if not video_id:
+            return
+        fields = change['updateDescription']['updatedFields']
+        self.publish(video_id, fields)
+
+    def publish(self, video_id, fields):
+        """Publishes one progress update; the channel closes once analysis is complete."""
+        channel = self.channel_for(video_id)
+        self.broker.publish(channel, 'progress', fields)
+        if fields.get('analysis_progress') == 'complete':
+            self.broker.close(channel)
@@ -0,0 +1,87 @@
+"""
+Transcript Segments Service
+Compact, array-backed caption timing. A transcript's caption segments are kept
+as three parallel NumPy arrays (start seconds, durations, and each segment's
+character offset in the joined transcript text), so any span of the text maps
+back to a time range with a binary search and chunking can cut on segment
+boundaries (the offsets) without re-reading the captions.
+"""
+import numpy as np
+
+
+def format_timestamp(seconds):
+    """Formats seconds as m:ss, or h:mm:ss from an hour up."""
+    seconds = int(seconds or 0)
+    hours, rest = divmod(seconds, 3600)
+    minutes, secs = divmod(rest, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{secs:02d}"
+    return f"{minutes}:{secs:02d}"
+
+
+class SegmentIndex:
+    """
+    Timing for a transcript whose text is its segments joined with newlines
+    (as TranscriptFetcher builds it). Segment i covers
+    text[offsets[i]:offsets[i + 1] - 1].
+    """
+
+    VERSION = 1
+
+    def __init__(self, starts, durations, offsets, length):
+        self.starts = np.asarray(starts, dtype=np.float64)
+        self.durations = np.asarray(durations, dtype=np.float64)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.length = int(length)
+
+    @classmethod
+    def from_segments(cls, segments):
+        """Builds the index from [{'text', 'start', 'duration'}] caption segments."""
+        lengths = np.fromiter((len(s['text']) + 1 for s in segments), dtype=np.int64, count=len(segments))
+        offsets = np.zeros(len(segments), dtype=np.int64)
+        if len(segments) > 1:
+            np.cumsum(lengths[:-1], out=offsets[1:])
+        return cls(
+            [float(s['start']) for s in segments],
+            [float(s.get('duration', 0)) for s in segments],
+            offsets,
+            max(int(lengths.sum()) - 1, 0)
+        )
+
+    def __len__(self):
+        return len(self.offsets)
+
+    @property
+    def duration(self):
+        if not len(self):
+            return 0.0
+        return float(self.starts[-1] + self.durations[-1])
+
+    def segment_at(self, offset):
+        """Index of the segment containing character `offset`."""
+        i = int(np.searchsorted(self.offsets, offset, side='right')) - 1
+        return min(max(i, 0), len(self) - 1)
+
+    def time_range(self, char_start, char_end):
+        """Returns: (start_seconds, end_seconds) of the text span [char_start, char_end)"""
+        if not len(self):
+            return 0.0, 0.0
+        first = self.segment_at(char_start)
+        last = self.segment_at(max(char_end - 1, char_start))
+        return float(self.starts[first]), float(self.starts[last] + self.durations[last])
+
+    def to_dict(self):
+        return {
+            'version': self.VERSION,
+            'starts': np.round(self.starts, 3).tolist(),
+            'durations': np.round(self.durations, 3).tolist(),
+            'offsets': self.offsets.tolist(),
+            'length': self.length
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Returns the index, or None if missing or stored in an older format."""
+        if not data or data.get('version') != cls.VERSION:
+            return None
+        return cls(data['starts'], data['durations'], data['offsets'], data['length'])
@@ -0,0 +1,181 @@
+"""
+Single-Flight Service
+Ensures only one summarization pipeline runs per video_id. The first caller
+atomically upserts an "in progress" lease on the summary record; concurrent
+callers attach to that lease and wait for its result instead of recomputing.
+"""
+import os
+import time
+import uuid
+import threading
+from datetime import datetime, timedelta
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+
+IN_PROGRESS = 'summarizing'
+
+
+class SingleFlight:
+    """
+    Lease-based single-flight keyed by video_id on the summaries collection.
+    Requires a unique index on video_id so the lease upsert is atomic.
+    """
+
+    def __init__(self, collection, lease_seconds=None, wait_timeout=None):
+        self.collection = collection
+        self.lease_seconds = lease_seconds or int(os.getenv("SUMMARY_LEASE_SECONDS", "120"))
+        self.wait_timeout = wait_timeout or int(os.getenv("SUMMARY_WAIT_TIMEOUT", "1800"))
+        self.poll_interval = 1.0
+        # In-process waiters are woken directly instead of waiting for the next poll
+        self._events = {}
+        self._lock = threading.Lock()
+
+    def run(self, video_id, compute, placeholder=None):
+        """
+        Returns (status, record) where status is one of:
+          'cached'   - a summary already existed
+          'computed' - this caller ran compute() and stored its result
+          'joined'   - another caller's in-flight pipeline produced the result
+          'failed'   - the in-flight pipeline this caller waited on failed
+        compute() must return the fields to store on the record; exceptions it
+        raises release the lease and propagate to the owner.
+        """
+        deadline = time.monotonic() + self.wait_timeout
+        token = uuid.uuid4().hex
+        joined = False
+
+        while True:
+            existing = self._try_acquire(video_id, token, placeholder or {})
+            if existing is None:
+                return 'computed', self._compute(video_id, token, compute)
+
+            if not existing:
+                continue
+
+            if 'summary' in existing:
+                return ('joined' if joined else 'cached'), existing
+
+            if self._lease_expired(existing) and self._try_steal(video_id, token):
+                return 'computed', self._compute(video_id, token, compute)
+
+            joined = True
+            result = self._wait(video_id, deadline)
+            if result is not None:
+                return result
+
+            if time.monotonic() >= deadline:
+                return 'failed', None
+
+    # -------------------- Lease handling --------------------
+
+    def _lease_fields(self, token):
+        return {
+            'lease_owner': token,
+            'lease_expires': datetime.utcnow() + timedelta(seconds=self.lease_seconds)
+        }
+
+    def _try_acquire(self, video_id, token, placeholder):
+        """Upserts the lease. Returns None if acquired, otherwise the existing record."""
+        fields = dict(placeholder)
+        fields.update(self._lease_fields(token))
+        fields['analysis_progress'] = IN_PROGRESS
+        try:
+            return self.collection.find_one_and_update(
+                {'video_id': video_id},
+                {'$setOnInsert': fields},
+                projection={'summary': 1, 'analysis_progress': 1, 'lease_expires': 1},
+                upsert=True,
+                return_document=ReturnDocument.BEFORE
+            )
+        except DuplicateKeyError:
+            # Another caller inserted between our match and insert; read theirs
+            return self.collection.find_one(
+                {'video_id': video_id},
+                {'summary': 1, 'analysis_progress': 1, 'lease_expires': 1}
+            ) or {}
+
+    def _try_steal(self, video_id, token):
+        """Takes over an expired lease, or a reserved record nobody has leased yet."""
+        fields = self._lease_fields(token)
+        fields['analysis_progress'] = IN_PROGRESS
+        res = self.collection.update_one(
+            {
+                'video_id': video_id,
+                'summary': {'$exists': False},
+                '$or': [
+                    {'lease_expires': {'$lt': datetime.utcnow()}},
+                    {'lease_expires': {'$exists': False}}
+                ]
+            },
+            {'$set': fields}
+        )
+        return res.modified_count == 1
+
+    def _lease_expired(self, record):
+        expires = record.get('lease_expires')
+        return expires is None or expires < datetime.utcnow()
+
+    def _renew_until(self, video_id, token, stop):
+        interval = max(1.0, self.lease_seconds / 3)
+        while not stop.wait(interval):
+            self.collection.update_one(
+                {'video_id': video_id, 'lease_owner': token},
+                {'$set': {'lease_expires': datetime.utcnow() + timedelta(seconds=self.lease_seconds)}}
+            )
+
+    # -------------------- Owner --------------------
+
+    def _compute(self, video_id, token, compute):
+        event = self._event(video_id)
+        stop = threading.Event()
+        renewer = threading.Thread(target=self._renew_until, args=(video_id, token, stop), daemon=True)
+        renewer.start()
+        try:
+            fields = compute()
+            self.collection.update_one(
+                {'video_id': video_id, 'lease_owner': token},
+                {'$set': fields, '$unset': {'lease_owner': '', 'lease_expires': ''}}
+            )
+            record = dict(fields)
+            record['video_id'] = video_id
+            return record
+        except Exception:
+            # Drop the placeholder so waiters fail fast and the next submit can retry
+            self.collection.delete_one({
+                'video_id': video_id,
+                'lease_owner': token,
+                'summary': {'$exists': False}
+            })
+            raise
+        finally:
+            stop.set()
+            with self._lock:
+                self._events.pop(video_id, None)
+            event.set()
+
+    # -------------------- Waiters --------------------
+
+    def _event(self, video_id):
+        with self._lock:
+            return self._events.setdefault(video_id, threading.Event())
+
+    def _wait(self, video_id, deadline):
+        """
+        Waits for the in-flight pipeline. Returns a final (status, record), or
+        None when the lease expired and the caller should try to take it over.
+        """
+        event = self._event(video_id)
+        while time.monotonic() < deadline:
+            event.wait(self.poll_interval)
+            record = self.collection.find_one(
+                {'video_id': video_id},
+                {'summary': 1, 'analysis_progress': 1, 'lease_expires': 1}
+            )
+            if record is None:
+                return 'failed', None
+            if 'summary' in record:
+                return 'joined', record
+            if self._lease_expired(record):
+                return None
+        return None
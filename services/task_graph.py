@@ -0,0 +1,81 @@
+"""
+Task Graph Service
+Runs a small set of named async tasks with dependencies on one event loop.
+Each task starts as soon as everything it depends on has finished, so
+independent tasks (e.g. separate LLM calls) overlap and the whole graph takes
+roughly as long as its slowest path rather than the sum of its tasks.
+"""
+import time
+import asyncio
+
+
+class TaskGraph:
+    """
+    Dependency-aware async task runner.
+    Tasks must be added after their dependencies, so the graph can't cycle.
+    """
+
+    def __init__(self):
+        self._tasks = {}
+
+    def add(self, name, func, after=()):
+        """Adds a task; `func` is a no-argument coroutine function."""
+        for dep in after:
+            if dep not in self._tasks:
+                raise ValueError(f"Task '{name}' depends on unknown task '{dep}'")
+        self._tasks[name] = (func, tuple(after))
+
+    @property
+    def names(self):
+        return list(self._tasks)
+
+    async def run(self, done=(), on_done=None):
+        """
+        Runs every task not listed in `done` (those count as already finished).
+        on_done(name, result, seconds) is called in a worker thread, one call at
+        a time in completion order, so it may block (e.g. write to MongoDB).
+        If a task fails its dependents are skipped, the others still finish and
+        the first error is raised afterwards.
+        Returns: {name: result} for the tasks that ran
+        """
+        loop = asyncio.get_running_loop()
+        finished = {name: asyncio.Event() for name in self._tasks}
+        failed = set()
+        results = {}
+        callback_lock = asyncio.Lock()
+
+        for name in done:
+            if name in finished:
+                finished[name].set()
+
+        async def run_task(name, func, after):
+            try:
+                for dep in after:
+                    await finished[dep].wait()
+                if failed.intersection(after):
+                    failed.add(name)
+                    return
+
+                started = time.monotonic()
+                try:
+                    result = await func()
+                    results[name] = result
+                    if on_done:
+                        async with callback_lock:
+                            await loop.run_in_executor(
+                                None, on_done, name, result, time.monotonic() - started
+                            )
+                except Exception:
+                    failed.add(name)
+                    raise
+            finally:
+                finished[name].set()
+
+        outcomes = await asyncio.gather(
+            *(run_task(name, func, after) for name, (func, after) in self._tasks.items() if name not in done),
+            return_exceptions=True
+        )
+        for outcome in outcomes:
+            if isinstance(outcome, BaseException):
+                raise outcome
+        return results
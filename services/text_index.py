@@ -0,0 +1,152 @@
+"""
+Text Index Service
+Tokenization (case-folded words in any script; stopword removal and light
+suffix stemming for English words) and a compact BM25 inverted index over a
+list of text chunks. Indexes serialize to plain dicts so they can be stored in
+MongoDB and rebuilt without re-tokenizing.
+"""
+import re
+import math
+import unicodedata
+from collections import Counter
+
+
+def _combining_marks():
+    """Returns: regex class ranges covering the combining marks (category M*) of the BMP"""
+    ranges = []
+    for code in range(0x300, 0x10000):
+        if unicodedata.category(chr(code)).startswith('M'):
+            if ranges and ranges[-1][1] == code - 1:
+                ranges[-1][1] = code
+            else:
+                ranges.append([code, code])
+    return ''.join(f"\\U{start:08x}-\\U{end:08x}" for start, end in ranges)
+
+
+# Words in any script. \w alone stops at combining marks, which would cut
+# Devanagari words at every vowel sign (भारत -> भ, रत)
+_WORD_CHARS = rf"[\w{_combining_marks()}]"
+TOKEN_RE = re.compile(rf"{_WORD_CHARS}+(?:'{_WORD_CHARS}+)?")
+
+STOPWORDS = frozenset("""
+a about above after again against all am an and any are aren't as at be because been before being
+below between both but by can can't cannot could couldn't did didn't do does doesn't doing don't down
+during each few for from further had hadn't has hasn't have haven't having he he'd he'll he's her here
+here's hers herself him himself his how how's i i'd i'll i'm i've if in into is isn't it it's its itself
+just let's like me more most mustn't my myself no nor not of off on once only or other ought our ours
+ourselves out over own really same shan't she she'd she'll she's should shouldn't so some such than that
+that's the their theirs them themselves then there there's these they they'd they'll they're they've
+this those through to too under until up us very was wasn't we we'd we'll we're we've were weren't what
+what's when when's where where's which while who who's whom why why's will with won't would wouldn't
+yeah you you'd you'll you're you've your yours yourself yourselves um uh okay oh gonna got get
+""".split())
+
+# (suffix, replacement) tried in order; the first match that leaves a stem
+# of at least three characters wins
+_SUFFIXES = (
+    ('ational', 'ate'), ('ization', 'ize'), ('fulness', 'ful'), ('ousness', 'ous'),
+    ('iveness', 'ive'), ('ements', ''), ('ement', ''), ('ments', ''), ('ment', ''),
+    ('ities', ''), ('ity', ''), ('ingly', ''), ('edly', ''), ('ies', 'y'), ('ied', 'y'),
+    ('ing', ''), ('ers', ''), ('er', ''), ('ed', ''), ('ly', ''), ('es', ''), ('s', '')
+)
+
+
+def stem(word):
+    """Light suffix-stripping stemmer (a cut-down Porter step 1/2)."""
+    if len(word) <= 3 or word.isdigit():
+        return word
+    for suffix, replacement in _SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) + len(replacement) >= 3:
+            if suffix == 's' and word.endswith('ss'):
+                return word
+            base = word[:len(word) - len(suffix)] + replacement
+            # running -> runn -> run, stopped -> stopp -> stop
+            if suffix in ('ing', 'ed', 'er', 'ers') and len(base) > 3 \
+                    and base[-1] == base[-2] and base[-1] not in 'aeioulsz':
+                base = base[:-1]
+            return base
+    return word
+
+
+def tokenize(text):
+    """
+    Returns the terms of `text`: English words are stemmed, with stopwords
+    and single letters dropped; words in other scripts are kept as they are.
+    """
+    terms = []
+    for token in TOKEN_RE.findall(unicodedata.normalize('NFC', text).casefold()):
+        if not token.isascii():
+            terms.append(token)
+        elif token not in STOPWORDS and len(token) > 1:
+            terms.append(stem(token.split("'")[0]))
+    return terms
+
+
+class BM25Index:
+    """
+    Okapi BM25 over a fixed list of chunks.
+    postings: term -> [[chunk_index, term_frequency], ...]
+    times: optional [[start_seconds, end_seconds], ...] per chunk
+    """
+
+    VERSION = 3
+
+    def __init__(self, chunks, postings, lengths, k1=1.5, b=0.75, times=None):
+        self.chunks = chunks
+        self.postings = postings
+        self.lengths = lengths
+        self.times = times
+        self.k1 = k1
+        self.b = b
+        self.avg_length = (sum(lengths) / len(lengths)) if lengths else 0.0
+
+    @classmethod
+    def build(cls, chunks, times=None):
+        postings = {}
+        lengths = []
+        for i, chunk in enumerate(chunks):
+            terms = tokenize(chunk)
+            lengths.append(len(terms))
+            for term, tf in Counter(terms).items():
+                postings.setdefault(term, []).append([i, tf])
+        return cls(chunks, postings, lengths, times=times)
+
+    def search(self, query, k=4):
+        """
+        Ranks chunks against the query.
+        Returns: [(score, chunk_index)] best first, only chunks with a match
+        """
+        n = len(self.chunks)
+        if not n:
+            return []
+
+        scores = {}
+        for term in set(tokenize(query)):
+            posting = self.postings.get(term)
+            if not posting:
+                continue
+            idf = math.log(1 + (n - len(posting) + 0.5) / (len(posting) + 0.5))
+            for i, tf in posting:
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[i] / (self.avg_length or 1))
+                scores[i] = scores.get(i, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return [(score, i) for i, score in ranked[:k]]
+
+    def to_dict(self):
+        data = {
+            'version': self.VERSION,
+            'chunks': self.chunks,
+            'postings': self.postings,
+            'lengths': self.lengths
+        }
+        if self.times is not None:
+            data['times'] = self.times
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        """Returns the index, or None if it was stored in an older format."""
+        if not data or data.get('version') != cls.VERSION:
+            return None
+        return cls(data['chunks'], data['postings'], data['lengths'], times=data.get('times'))
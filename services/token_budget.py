@@ -0,0 +1,183 @@
+"""
+Token Budget Service
+Sizes LLM inputs in tokens instead of characters. Counts come from the
+model's tokenizer family through tiktoken when it is installed
+(TOKENIZER_ENCODING, o200k_base by default, as used by gpt-oss), otherwise from
+a script-aware approximation. Either way counts are cached per word, so
+measuring a transcript again costs one dictionary lookup per word. Text is
+packed into chunks that fill a token budget (the model context minus prompt
+and output reserves): English transcripts get fewer, fuller calls and
+Devanagari ones, at several tokens per word, no longer overflow the context.
+"""
+import os
+import re
+import math
+from functools import lru_cache
+import numpy as np
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+
+_WORD = re.compile(r"\S+")
+# Chunks preferably start after a line break or a sentence end (incl. the danda)
+_UNIT_START = re.compile(r"(?<=\n)|(?<=[.!?।॥])\s+")
+
+
+class TokenCounter:
+    """
+    Cached token counts for the configured model.
+    count(text) is exact per word with tiktoken; the fallback estimate
+    errs high, so budgets computed from it stay within the context.
+    """
+
+    def __init__(self, encoding=None, cache_size=None):
+        self.encoding_name = encoding if encoding is not None else os.getenv("TOKENIZER_ENCODING", "o200k_base")
+        self._encoding = None
+        self._loaded = False
+        self.word_tokens = lru_cache(maxsize=cache_size or int(os.getenv("TOKENIZER_CACHE_WORDS", "200000")))(
+            self._word_tokens
+        )
+
+    def _encoder(self):
+        if not self._loaded:
+            self._loaded = True
+            if tiktoken is not None and self.encoding_name:
+                try:
+                    self._encoding = tiktoken.get_encoding(self.encoding_name)
+                except Exception as e:
+                    print(f"[PodcastAI] Tokenizer '{self.encoding_name}' unavailable ({e}); estimating token counts.")
+        return self._encoding
+
+    @property
+    def exact(self):
+        """True when counts come from a real tokenizer rather than the estimate."""
+        return self._encoder() is not None
+
+    @staticmethod
+    def _estimate(word):
+        # ~4 characters per token for Latin-script words, each punctuation mark
+        # on its own, and close to one token per character for other scripts
+        non_ascii = len(word) - len(word.encode('ascii', 'ignore'))
+        ascii_chars = len(word) - non_ascii
+        punctuation = sum(1 for c in word if c.isascii() and not c.isalnum())
+        return max(1, math.ceil((ascii_chars - punctuation) / 4) + punctuation + math.ceil(non_ascii * 0.8))
+
+    def _word_tokens(self, word):
+        encoding = self._encoder()
+        if encoding is None:
+            return self._estimate(word)
+        # Tokenizers attach the preceding space to the word
+        return len(encoding.encode_ordinary(" " + word))
+
+    def count(self, text):
+        """Returns: estimated number of tokens in `text`"""
+        if not text:
+            return 0
+        return sum(map(self.word_tokens, _WORD.findall(text))) + text.count("\n")
+
+    def stats(self):
+        info = self.word_tokens.cache_info()
+        lookups = info.hits + info.misses
+        return {
+            'encoding': self.encoding_name if self.exact else 'estimate',
+            'cached_words': info.currsize,
+            'hit_rate': round(info.hits / lookups, 3) if lookups else 0
+        }
+
+    # -------------------- Chunking --------------------
+
+    def _units(self, text, boundaries, max_tokens):
+        """
+        Returns: (starts, sizes), the start offsets and token counts of the
+        units chunks are built from
+        """
+        if boundaries is None:
+            starts = [0] + [m.end() for m in _UNIT_START.finditer(text)]
+        else:
+            starts = [0] + [int(b) for b in boundaries if 0 < b < len(text)]
+        starts = sorted(set(starts))
+
+        unit_starts, sizes = [], []
+        for start, end in zip(starts, starts[1:] + [len(text)]):
+            size = self.count(text[start:end])
+            if size <= max_tokens:
+                unit_starts.append(start)
+                sizes.append(size)
+                continue
+            # Too big for one chunk on its own: split it between words
+            words = [m.start() for m in _WORD.finditer(text, start, end) if m.start() > start]
+            for piece_start, piece_end in zip([start] + words, words + [end]):
+                size = self.count(text[piece_start:piece_end])
+                if size <= max_tokens:
+                    unit_starts.append(piece_start)
+                    sizes.append(size)
+                    continue
+                for piece in self._hard_split(text, piece_start, piece_end, size, max_tokens):
+                    unit_starts.append(piece[0])
+                    sizes.append(piece[1])
+        return unit_starts, sizes
+
+    def _hard_split(self, text, start, end, size, max_tokens):
+        """
+        Cuts a run with no whitespace (unspaced scripts, run-together captions)
+        into pieces of at most `max_tokens`, sized by characters per token.
+        Returns: [(start, tokens)]
+        """
+        step = max(1, (end - start) * max_tokens // size)
+        pieces = []
+        while start < end:
+            stop = min(start + step, end)
+            tokens = self.count(text[start:stop])
+            while tokens > max_tokens and stop - start > 1:
+                # Denser than average here: shrink in proportion
+                stop = start + max(1, min(stop - start - 1, (stop - start) * max_tokens // tokens))
+                tokens = self.count(text[start:stop])
+            pieces.append((start, tokens))
+            start = stop
+        return pieces
+
+    def chunk_bounds(self, text, max_tokens, overlap_tokens=0, boundaries=None):
+        """
+        Splits text into spans of at most `max_tokens` that start on a unit
+        boundary: `boundaries` (character offsets, e.g. caption segment starts)
+        or else line and sentence breaks. Units too big for a span are split
+        between words, and words too big between characters. Each span after
+        the first repeats about `overlap_tokens` from the end of the previous one.
+        Returns: [(char_start, char_end)]
+        """
+        if not text.strip():
+            return []
+        starts, sizes = self._units(text, boundaries, max_tokens)
+        ends = starts[1:] + [len(text)]
+        # cumulative[i] = tokens before unit i
+        cumulative = np.zeros(len(starts) + 1, dtype=np.int64)
+        np.cumsum(np.asarray(sizes, dtype=np.int64), out=cumulative[1:])
+
+        bounds = []
+        n = len(starts)
+        first = 0
+        while True:
+            # Units first..stop-1 fit in the budget
+            stop = int(np.searchsorted(cumulative, cumulative[first] + max_tokens, side='right')) - 1
+            stop = max(stop, first + 1)
+            end = ends[stop - 1]
+            while end > starts[first] and text[end - 1].isspace():
+                end -= 1
+            bounds.append((starts[first], end))
+            if stop >= n:
+                return bounds
+            # Back up whole units to overlap the previous span
+            overlap_start = int(np.searchsorted(cumulative, cumulative[stop] - overlap_tokens, side='left'))
+            first = min(max(overlap_start, first + 1), stop)
+
+
+def context_budget(context_tokens, reserve_tokens, floor=256):
+    """Tokens left for content once the prompt and output reserve are taken."""
+    return max(context_tokens - reserve_tokens, floor)
+
+
+# Shared instance; its word cache is reused by every chunking call
+token_counter = TokenCounter()
@@ -0,0 +1,266 @@
+"""
+Transcript Fetcher Service
+Fetches YouTube captions with segment timings and caches them in MongoDB,
+keyed by video_id + language, independently of the summary record. Network
+calls reuse a pooled HTTP session per thread and are rate limited
+process-wide; warm() fills the cache ahead of a summary (the app runs it as
+queued prefetch jobs).
+Set TRANSCRIPT_SERVER_URL to fetch from a stand-in transcript server instead
+of YouTube (GET <url>/transcript/<video_id>?langs=en,de&translate=fr returning
+{"language_code", "is_generated", "segments": [{"text", "start", "duration"}]}).
+"""
+import os
+import time
+import threading
+from datetime import datetime
+import requests
+from requests.adapters import HTTPAdapter
+from pymongo.errors import PyMongoError
+from youtube_transcript_api import YouTubeTranscriptApi
+from youtube_transcript_api.proxies import WebshareProxyConfig, GenericProxyConfig
+
+
+class RateLimiter:
+    """Thread-safe token bucket: at most `rate` acquisitions per second on average."""
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.capacity = burst or max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def _proxy_config():
+    if os.getenv("PROXY_USERNAME") and os.getenv("PROXY_PASSWORD"):
+        return WebshareProxyConfig(
+            proxy_username=os.getenv("PROXY_USERNAME"),
+            proxy_password=os.getenv("PROXY_PASSWORD")
+        )
+    if os.getenv("PROXY_URL"):
+        return GenericProxyConfig(
+            http_url=os.getenv("PROXY_URL"),
+            https_url=os.getenv("PROXY_URL")
+        )
+    return None
+
+
+class TranscriptFetcher:
+    """
+    Cached, rate-limited caption fetcher.
+    fetch() returns {'video_id', 'language_code', 'is_generated', 'segments',
+    'text'} or None; segments are [{'text', 'start', 'duration'}].
+    """
+
+    def __init__(self, cache_collection=None):
+        self.collection = cache_collection
+        self.server_url = os.getenv("TRANSCRIPT_SERVER_URL", "").rstrip("/")
+        self.preferred_langs = [
+            l.strip() for l in os.getenv("TRANSCRIPT_LANGS", "en").split(",") if l.strip()
+        ]
+        self.translate_to = os.getenv("TRANSCRIPT_TRANSLATE_TO", "").strip()
+        self.pool_size = int(os.getenv("TRANSCRIPT_POOL_CONNECTIONS", "8"))
+        self.limiter = RateLimiter(float(os.getenv("TRANSCRIPT_RATE_PER_SECOND", "2")))
+        self.proxy_config = _proxy_config()
+
+        self._local = threading.local()
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    # -------------------- HTTP --------------------
+
+    def _session(self):
+        """Per-thread pooled session (YouTubeTranscriptApi isn't thread-safe)."""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            self._local.session = session
+        return session
+
+    def _api(self):
+        api = getattr(self._local, 'api', None)
+        if api is None:
+            api = YouTubeTranscriptApi(proxy_config=self.proxy_config, http_client=self._session())
+            self._local.api = api
+        return api
+
+    # -------------------- Cache --------------------
+
+    def _cache_get(self, video_id):
+        if self.collection is None:
+            return None
+        langs = [self.translate_to] if self.translate_to else self.preferred_langs
+        try:
+            for lang in langs:
+                doc = self.collection.find_one({'_id': f"{video_id}:{lang}"})
+                if doc:
+                    return doc
+            # Whatever language was picked as a fallback last time
+            return self.collection.find_one({'video_id': video_id})
+        except PyMongoError as e:
+            print(f"[PodcastAI] Transcript cache read error: {e}")
+            return None
+
+    def _cache_set(self, result):
+        if self.collection is None:
+            return
+        try:
+            self.collection.replace_one(
+                {'_id': f"{result['video_id']}:{result['language_code']}"},
+                {
+                    'video_id': result['video_id'],
+                    'language_code': result['language_code'],
+                    'is_generated': result['is_generated'],
+                    'segments': result['segments'],
+                    'fetched_at': datetime.utcnow()
+                },
+                upsert=True
+            )
+        except PyMongoError as e:
+            print(f"[PodcastAI] Transcript cache write error: {e}")
+
+    @staticmethod
+    def _result(video_id, language_code, is_generated, segments):
+        return {
+            'video_id': video_id,
+            'language_code': language_code,
+            'is_generated': is_generated,
+            'segments': segments,
+            # Same text TextFormatter produces: one caption line per row
+            'text': "\n".join(s['text'] for s in segments)
+        }
+
+    # -------------------- Fetching --------------------
+
+    def fetch(self, video_id):
+        """Returns the cached transcript, fetching it on a miss; None if unavailable."""
+        return self._fetch(video_id)[1]
+
+    def _fetch(self, video_id):
+        """Returns: (status, transcript) with status cached/fetched/unavailable/error"""
+        cached = self._cache_get(video_id)
+        if cached:
+            self.hits += 1
+            return 'cached', self._result(
+                video_id, cached['language_code'], cached['is_generated'], cached['segments']
+            )
+
+        self.misses += 1
+        self.limiter.acquire()
+        try:
+            result = self._fetch_remote(video_id)
+        except Exception as e:
+            self.errors += 1
+            print("Caption error:", e)
+            return 'error', None
+
+        if not result:
+            return 'unavailable', None
+        self._cache_set(result)
+        return 'fetched', result
+
+    def _fetch_remote(self, video_id):
+        if self.server_url:
+            return self._fetch_from_server(video_id)
+        return self._fetch_from_youtube(video_id)
+
+    def _fetch_from_server(self, video_id):
+        response = self._session().get(
+            f"{self.server_url}/transcript/{video_id}",
+            params={'langs': ",".join(self.preferred_langs), 'translate': self.translate_to},
+            timeout=30
+        )
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        data = response.json()
+        segments = [
+            {'text': s['text'], 'start': float(s['start']), 'duration': float(s.get('duration', 0))}
+            for s in data.get('segments', [])
+        ]
+        return self._result(video_id, data.get('language_code', ''), bool(data.get('is_generated')), segments)
+
+    def _fetch_from_youtube(self, video_id):
+        transcripts = list(self._api().list(video_id))
+
+        transcript = None
+
+        for lang in self.preferred_langs:
+            transcript = next(
+                (t for t in transcripts if (not t.is_generated) and t.language_code == lang),
+                None
+            )
+            if transcript:
+                break
+
+        if not transcript:
+            for lang in self.preferred_langs:
+                transcript = next(
+                    (t for t in transcripts if t.is_generated and t.language_code == lang),
+                    None
+                )
+                if transcript:
+                    break
+
+        if not transcript:
+            transcript = next((t for t in transcripts if not t.is_generated), None)
+
+        if not transcript and transcripts:
+            transcript = transcripts[0]
+
+        if not transcript:
+            return None
+
+        if (
+            self.translate_to
+            and getattr(transcript, "is_translatable", False)
+            and transcript.language_code != self.translate_to
+        ):
+            try:
+                transcript = transcript.translate(self.translate_to)
+            except Exception:
+                pass
+
+        fetched = transcript.fetch()
+        segments = [
+            {'text': s.text, 'start': s.start, 'duration': s.duration}
+            for s in fetched
+        ]
+        return self._result(video_id, fetched.language_code, fetched.is_generated, segments)
+
+    def warm(self, video_id):
+        """
+        Caches a video's transcript if it isn't already.
+        Returns: 'cached' | 'fetched' | 'unavailable' | 'error'
+        """
+        return self._fetch(video_id)[0]
+
+    def is_cached(self, video_id):
+        return self._cache_get(video_id) is not None
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'errors': self.errors,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0
+        }
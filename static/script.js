@@ -284,9 +284,17 @@ function createCommentElement(comment) {
 function escapeHtml(text) {
     const div = document.createElement('div');
     div.textContent = text;
-    return div.innerHTML;
+    // innerHTML leaves quotes alone; escape them for use in attributes
+    return div.innerHTML.replace(/"/g, '&quot;').replace(/'/g, '&#39;');
 }
 
+// Fixed class per sentiment label, so model output never reaches the markup
+const TIMELINE_CLASSES = {
+    positive: 'timeline-positive',
+    negative: 'timeline-negative',
+    neutral: 'timeline-neutral'
+};
+
 function submitComment(videoId) {
     const input = document.getElementById('comment-input');
     const text = input.value.trim();
@@ -380,7 +388,7 @@ function loadChatHistory(videoId, chatWindow) {
                     // User question
                     addChatMessage(chatWindow, entry.question, 'user');
                     // Bot answer with confidence
-                    addChatMessage(chatWindow, entry.answer, 'bot', entry.confidence_score);
+                    addChatMessage(chatWindow, entry.answer, 'bot', entry.confidence_score, entry.sources, videoId);
                 });
 
                 // Add separator for new conversation
@@ -398,7 +406,7 @@ function loadChatHistory(videoId, chatWindow) {
 }
 
 // ==================== Add Chat Message Helper ====================
-function addChatMessage(chatWindow, text, sender, confidenceScore) {
+function addChatMessage(chatWindow, text, sender, confidenceScore, sources, videoId) {
     const msgDiv = document.createElement("div");
     msgDiv.className = `chat-message ${sender}`;
 
@@ -426,10 +434,65 @@ function addChatMessage(chatWindow, text, sender, confidenceScore) {
         msgDiv.appendChild(badge);
     }
 
+    // Links to the parts of the video the answer was drawn from
+    if (sender === 'bot' && sources && sources.length > 0 && videoId) {
+        const links = document.createElement('div');
+        links.className = 'chat-sources';
+        for (const source of sources) {
+            const link = document.createElement('a');
+            link.href = youtubeAt(videoId, source.start);
+            link.target = '_blank';
+            link.rel = 'noopener';
+            link.textContent = `\u25B6 ${formatTimestamp(source.start)}`;
+            links.appendChild(link);
+        }
+        msgDiv.appendChild(links);
+    }
+
     chatWindow.appendChild(msgDiv);
     chatWindow.scrollTop = chatWindow.scrollHeight;
 }
 
+// ==================== Timestamps ====================
+function formatTimestamp(seconds) {
+    seconds = Math.floor(seconds || 0);
+    const h = Math.floor(seconds / 3600);
+    const m = Math.floor((seconds % 3600) / 60);
+    const s = String(seconds % 60).padStart(2, '0');
+    return h ? `${h}:${String(m).padStart(2, '0')}:${s}` : `${m}:${s}`;
+}
+
+function youtubeAt(videoId, seconds) {
+    return `https://www.youtube.com/watch?v=${encodeURIComponent(videoId)}&t=${Math.floor(seconds || 0)}s`;
+}
+
+// ==================== SSE over fetch ====================
+// EventSource only supports GET, so POST streams are parsed by hand
+async function readEventStream(response, onEvent) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const frame = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+            let event = 'message';
+            let data = '';
+            frame.split('\n').forEach(line => {
+                if (line.startsWith('event: ')) event = line.slice(7);
+                else if (line.startsWith('data: ')) data += line.slice(6);
+            });
+            if (data) onEvent(event, JSON.parse(data));
+        }
+    }
+}
+
 // ==================== Suggested Questions ====================
 function askSuggested(btn) {
     const question = btn.dataset.question;
@@ -461,6 +524,7 @@ document.addEventListener('DOMContentLoaded', function () {
         const formattedSummary = formatSummary(rawSummary);
         summaryElement.innerHTML = formattedSummary;
     }
+    const isStreaming = !!(summaryElement && summaryElement.dataset.streamUrl);
 
     // Load voices for TTS
     if (window.speechSynthesis) {
@@ -547,20 +611,37 @@ document.addEventListener('DOMContentLoaded', function () {
             chatWindow.scrollTop = chatWindow.scrollHeight;
 
             try {
-                const response = await fetch('/chat', {
+                const response = await fetch('/chat-stream', {
                     method: 'POST',
                     headers: { 'Content-Type': 'application/json' },
                     body: JSON.stringify({ message: message, video_id: videoId })
                 });
-                const data = await response.json();
+                if (!response.ok || !response.body) {
+                    const data = await response.json();
+                    throw new Error(data.response || 'Chat request failed');
+                }
+
+                // Show answer tokens in the loading bubble as they arrive
+                let answer = '';
+                let finalData = null;
+                await readEventStream(response, (event, data) => {
+                    if (event === 'token') {
+                        answer += data.text;
+                        loadBubble.textContent = answer;
+                        chatWindow.scrollTop = chatWindow.scrollHeight;
+                    } else if (event === 'done') {
+                        finalData = data;
+                    }
+                });
+
                 chatWindow.removeChild(loadingDiv);
-                if (data.response) {
-                    addChatMessage(chatWindow, data.response, 'bot', data.confidence_score);
+                if (finalData && finalData.response) {
+                    addChatMessage(chatWindow, finalData.response, 'bot', finalData.confidence_score, finalData.sources, videoId);
                 } else {
                     addChatMessage(chatWindow, "Sorry, something went wrong.", 'bot');
                 }
             } catch (error) {
-                chatWindow.removeChild(loadingDiv);
+                if (loadingDiv.parentNode) chatWindow.removeChild(loadingDiv);
                 addChatMessage(chatWindow, "Error connecting to server.", 'bot');
                 console.error(error);
             } finally {
@@ -576,50 +657,120 @@ document.addEventListener('DOMContentLoaded', function () {
         });
     }
 
-    // ==================== Progressive Analysis Polling ====================
+    // ==================== Progressive Analysis Updates ====================
     const resultsPage = document.querySelector('.results-page');
     if (resultsPage) {
         const videoId = resultsPage.dataset.videoId;
         const progress = resultsPage.dataset.progress;
 
-        // Only poll if analysis is not yet complete
-        if (progress && progress !== 'complete') {
-            pollAnalysisStatus(videoId);
+        if (isStreaming) {
+            // Summary still generating: stream it, then follow the analysis
+            streamSummary(summaryElement, () => followAnalysis(videoId));
+        } else if (progress && progress !== 'complete') {
+            // Only subscribe if analysis is not yet complete
+            followAnalysis(videoId);
         }
     }
 });
 
-// ==================== Analysis Status Polling ====================
-function pollAnalysisStatus(videoId) {
-    let pollInterval = setInterval(async () => {
-        try {
-            const res = await fetch(`/analysis-status/${videoId}`);
-            const data = await res.json();
+// ==================== Summary Streaming ====================
+function streamSummary(summaryElement, onDone) {
+    const statusEl = document.getElementById('summary-stream-status');
+    const statusText = statusEl ? statusEl.querySelector('span') : null;
+    const notesEl = document.getElementById('summary-stream-notes');
+    const draftEl = document.getElementById('summary-stream-draft');
+    const finalEl = document.getElementById('summary-stream-final');
+    const source = new EventSource(summaryElement.dataset.streamUrl);
+    let finalText = '';
+
+    const setStatus = (text) => { if (statusText) statusText.textContent = text; };
+
+    source.addEventListener('status', (e) => {
+        const data = JSON.parse(e.data);
+        if (data.stage === 'fetching') setStatus('Fetching transcript...');
+        else if (data.stage === 'summarizing') setStatus(`Summarizing ${data.chunks} sections...`);
+        else if (data.stage === 'reducing') setStatus(`Combining notes (pass ${data.level})...`);
+        else if (data.stage === 'finalizing') setStatus('Writing final summary...');
+        else if (data.stage === 'retrying') setStatus('Ollama is unavailable, retrying shortly...');
+    });
 
-            // Update sentiment section
-            if (data.sentiment && data.sentiment.transcript && Object.keys(data.sentiment.transcript).length > 0) {
-                renderSentimentSection(data.sentiment);
-            }
+    // Extractive pre-summary, shown until the real summary arrives
+    source.addEventListener('draft', (e) => {
+        const list = draftEl.querySelector('ul');
+        list.innerHTML = '';
+        for (const sentence of JSON.parse(e.data).sentences) {
+            const li = document.createElement('li');
+            li.textContent = sentence;
+            list.appendChild(li);
+        }
+        draftEl.style.display = '';
+    });
 
-            // Update accuracy section
-            if (data.accuracy && (data.accuracy.transcription_confidence || data.accuracy.summary_confidence)) {
-                renderAccuracySection(data.accuracy);
-            }
+    // Per-chunk bullet notes, kept in transcript order
+    source.addEventListener('chunk', (e) => {
+        const data = JSON.parse(e.data);
+        if (notesEl.querySelector(`[data-index="${data.index}"]`)) return;
+        const li = document.createElement('li');
+        li.dataset.index = data.index;
+        const at = data.start !== undefined ? ` (${formatTimestamp(data.start)})` : '';
+        li.textContent = `Part ${data.index + 1}/${data.total}${at}: ${data.text.replace(/\s+/g, ' ').trim()}`;
+        const next = Array.from(notesEl.children).find(el => Number(el.dataset.index) > data.index);
+        notesEl.insertBefore(li, next || null);
+    });
 
-            // Update topics section
-            if (data.topics && data.topics.length > 0) {
-                renderTopicsSection(data.topics);
-            }
+    // Final summary tokens
+    source.addEventListener('token', (e) => {
+        finalText += JSON.parse(e.data).text;
+        finalEl.textContent = finalText;
+        notesEl.style.display = 'none';
+        draftEl.style.display = 'none';
+    });
 
-            // Stop polling when complete
-            if (data.progress === 'complete') {
-                clearInterval(pollInterval);
-                console.log('[PodcastAI] All analysis steps complete.');
-            }
-        } catch (err) {
-            console.error('Polling error:', err);
+    source.addEventListener('done', (e) => {
+        source.close();
+        const data = JSON.parse(e.data);
+        summaryElement.dataset.rawSummary = data.summary;
+        summaryElement.innerHTML = formatSummary(data.summary);
+        if (onDone) onDone();
+    });
+
+    source.addEventListener('error', (e) => {
+        // Server-sent error events carry data; dropped connections don't (EventSource reconnects)
+        if (!e.data) return;
+        source.close();
+        summaryElement.innerHTML = `<p class="stream-error">${escapeHtml(JSON.parse(e.data).message)}</p>`;
+    });
+}
+
+// ==================== Analysis Progress Stream ====================
+function followAnalysis(videoId) {
+    const source = new EventSource(`/analysis-stream/${videoId}`);
+
+    // Each event carries only the sections that changed
+    source.addEventListener('progress', (e) => {
+        const data = JSON.parse(e.data);
+
+        // Update sentiment section
+        if (data.sentiment && data.sentiment.transcript && Object.keys(data.sentiment.transcript).length > 0) {
+            renderSentimentSection(data.sentiment);
+        }
+
+        // Update accuracy section
+        if (data.accuracy && (data.accuracy.transcription_confidence || data.accuracy.summary_confidence)) {
+            renderAccuracySection(data.accuracy);
+        }
+
+        // Update topics section
+        if (data.topics && data.topics.length > 0) {
+            renderTopicsSection(data.topics, videoId);
         }
-    }, 3000); // Poll every 3 seconds
+
+        // Stop listening when complete
+        if (data.progress === 'complete' || data.progress === 'not_found') {
+            source.close();
+            console.log('[PodcastAI] All analysis steps complete.');
+        }
+    });
 }
 
 function renderSentimentSection(sentiment) {
@@ -637,12 +788,29 @@ function renderSentimentSection(sentiment) {
             }
             html += '</tr></thead><tbody><tr>';
             for (const val of Object.values(data)) {
-                html += `<td>${val}</td>`;
+                html += `<td>${escapeHtml(String(val))}</td>`;
             }
             html += '</tr></tbody></table></div>';
         }
     }
-    html += '</div></div>';
+    html += '</div>';
+
+    // Per-segment sentiment across the episode
+    if (sentiment.timeline && sentiment.timeline.length > 1) {
+        html += '<div class="sentiment-timeline-wrap"><h4>Sentiment Across the Episode</h4><div class="sentiment-timeline">';
+        for (const seg of sentiment.timeline) {
+            const grow = Math.max(seg.end - seg.start, 1);
+            const opacity = 0.35 + 0.65 * seg.sentiment_score / 100;
+            const span = seg.start_time !== undefined
+                ? `${formatTimestamp(seg.start_time)}-${formatTimestamp(seg.end_time)}`
+                : `${seg.start}-${seg.end}%`;
+            const cls = TIMELINE_CLASSES[String(seg.sentiment).toLowerCase()] || TIMELINE_CLASSES.neutral;
+            html += `<div class="timeline-segment ${cls}" style="flex-grow: ${grow}; opacity: ${opacity}"
+                title="${span}: ${escapeHtml(String(seg.sentiment))} (${escapeHtml(String(seg.sentiment_score))}), ${escapeHtml(String(seg.emotion))}"></div>`;
+        }
+        html += '</div></div>';
+    }
+    html += '</div>';
 
     loading.remove();
     section.querySelector('.results-card-header').insertAdjacentHTML('afterend', html);
@@ -686,7 +854,7 @@ function renderAccuracySection(accuracy) {
     section.querySelector('.results-card-header').insertAdjacentHTML('afterend', html);
 }
 
-function renderTopicsSection(topics) {
+function renderTopicsSection(topics, videoId) {
     const loading = document.getElementById('topics-loading');
     if (!loading) return;
 
@@ -704,6 +872,7 @@ function renderTopicsSection(topics) {
                     </svg>
                     ${topic.topic}
                 </span>
+                ${topic.start !== undefined ? `<a class="topic-timestamp" href="${youtubeAt(videoId, topic.start)}" target="_blank" rel="noopener" onclick="event.stopPropagation()">\u25B6 ${formatTimestamp(topic.start)}</a>` : ''}
                 <svg class="topic-chevron" width="16" height="16" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2">
                     <polyline points="6 9 12 15 18 9"></polyline>
                 </svg>
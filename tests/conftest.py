@@ -0,0 +1,25 @@
+import os
+import sys
+import pytest
+from pymongo import UpdateOne
+
+# Tests import the app's modules (services.*) from the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def mongo_db(monkeypatch):
+    """An in-memory MongoDB database (mongomock)."""
+    mongomock = pytest.importorskip('mongomock')
+    db = mongomock.MongoClient().db
+
+    def bulk_write(collection, requests, ordered=True):
+        # mongomock's bulk_write lags behind pymongo's operation classes; the
+        # app only sends UpdateOne (library search document frequencies)
+        for op in requests:
+            if not isinstance(op, UpdateOne):
+                pytest.skip(f"mongomock bulk_write shim doesn't support {type(op).__name__}")
+            collection.update_one(op._filter, op._doc, upsert=op._upsert)
+
+    monkeypatch.setattr(mongomock.Collection, 'bulk_write', bulk_write)
+    return db
@@ -0,0 +1,35 @@
+import asyncio
+from services.adaptive_limiter import AdaptiveLimiter
+
+
+def _run(limiter, samples):
+    async def go():
+        for latency, ok in samples:
+            await limiter.acquire()
+            limiter.release(latency, ok)
+    asyncio.run(go())
+
+
+def test_limit_grows_on_steady_latency():
+    limiter = AdaptiveLimiter(initial=2, maximum=4)
+    _run(limiter, [(1.0, True)] * 20)
+    assert limiter.limit == 4
+
+
+def test_lasting_slowdown_becomes_the_new_baseline():
+    limiter = AdaptiveLimiter(initial=4, maximum=8, window=5)
+    _run(limiter, [(1.0, True)] * 5)
+    # The server gets slower for good: a few calls count as spikes...
+    _run(limiter, [(5.0, True)] * 5)
+    assert limiter.baseline == 5.0
+    low = limiter.limit
+    # ...then the baseline has caught up and the limit grows again
+    _run(limiter, [(5.0, True)] * 10)
+    assert limiter.limit > low
+
+
+def test_errors_back_off_and_start_is_capped():
+    limiter = AdaptiveLimiter(initial=10, maximum=4)
+    assert limiter.limit == 4
+    _run(limiter, [(1.0, False)])
+    assert limiter.limit == 2
@@ -0,0 +1,24 @@
+import pytest
+from services.batch_ingest import BatchIngest
+
+
+@pytest.fixture
+def batches(mongo_db):
+    return BatchIngest(mongo_db.batches, mongo_db.summaries, submit=lambda video_id, url: True)
+
+
+def test_progress_is_visible_to_the_creator_only(batches):
+    batch_id = batches.create(['abcdefghijk', 'bad'], lambda v: v if len(v) == 11 else None, user_id='u1')['batch_id']
+
+    report = batches.progress(batch_id, user_id='u1')
+    assert report['total'] == 1 and report['invalid'] == ['bad']
+    assert batches.progress(batch_id, user_id='u2') is None
+    assert batches.get(batch_id, user_id='u2') is None
+    # The CLI reads batches without a user
+    assert batches.progress(batch_id)['batch_id'] == batch_id
+
+
+def test_cli_batches_are_not_visible_to_web_users(batches):
+    batch_id = batches.create(['abcdefghijk'], lambda v: v)['batch_id']
+    assert batches.get(batch_id, user_id='u1') is None
+    assert batches.get(batch_id)['video_ids'] == ['abcdefghijk']
@@ -0,0 +1,32 @@
+import pytest
+from services.chat_service import ChatService, ConfidenceStripper
+
+
+def _stream(text, size):
+    stripper = ConfidenceStripper()
+    return ''.join(stripper.feed(text[i:i + size]) for i in range(0, len(text), size))
+
+
+@pytest.mark.parametrize('size', [1, 2, 3, 7, 100])
+def test_stream_matches_stored_answer(size):
+    for text in [
+        "Rates went up.\n\nCONFIDENCE: 85",
+        "Their confidence: high, they said.\nCONFIDENCE: 90",
+        "The CONFIDENCE:  level was low\nconfidence:72 trailing",
+        "No rating at all.",
+        "Ends with a mention of confidence: ",
+    ]:
+        stored = ChatService()._parse_response(text)['answer']
+        streamed = _stream(text, size)
+        # Held-back whitespace or an unconfirmed marker may still be pending at the end
+        assert stored.startswith(streamed.rstrip())
+        assert 'CONFIDENCE: 85' not in streamed and 'confidence:72' not in streamed
+        if text.rstrip()[-1].isdigit():
+            assert streamed == stored
+
+
+def test_mention_is_not_cut_off():
+    assert _stream("Their confidence: high.\nCONFIDENCE: 90", 1) == "Their confidence: high."
+    assert ChatService()._parse_response("Their confidence: high.\nCONFIDENCE: 90") == {
+        'answer': "Their confidence: high.", 'confidence_score': 90
+    }
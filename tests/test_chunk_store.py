@@ -0,0 +1,18 @@
+from services.chunk_store import ChunkSummaryStore
+
+
+def test_saved_notes_are_reused_per_video(mongo_db):
+    store = ChunkSummaryStore(mongo_db.chunk_summaries, model='m', prompt='Summarize {text}')
+    hashes = [store.chunk_hash('first chunk'), store.chunk_hash('second chunk')]
+    store.save('video000001', hashes[0], 0, '- first notes')
+    store.save('video000002', hashes[0], 0, '- other video')
+
+    assert store.load('video000001', hashes) == {hashes[0]: '- first notes'}
+    assert store.load('video000002', hashes) == {hashes[0]: '- other video'}
+
+
+def test_hash_depends_on_model_and_map_prompt():
+    base = ChunkSummaryStore(model='a', prompt='Summarize {text}').chunk_hash('text')
+    assert ChunkSummaryStore(model='b', prompt='Summarize {text}').chunk_hash('text') != base
+    assert ChunkSummaryStore(model='a', prompt='List points in {text}').chunk_hash('text') != base
+    assert ChunkSummaryStore(model='a', prompt='Summarize {text}').chunk_hash('text') == base
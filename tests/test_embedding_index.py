@@ -0,0 +1,47 @@
+import numpy as np
+from services.embedding_index import EmbeddingStore
+
+
+def _store(tmp_path, monkeypatch):
+    store = EmbeddingStore(str(tmp_path), model='test-embed')
+
+    def embed(texts):
+        # One-hot on the text length keeps rows distinct and unit-length
+        vectors = np.zeros((len(texts), 64), dtype=np.float32)
+        for row, text in enumerate(texts):
+            vectors[row, len(text) % 64] = 1.0
+        return vectors
+    monkeypatch.setattr(store, 'embed', embed)
+    return store
+
+
+def test_similarities_match_built_chunks(tmp_path, monkeypatch):
+    store = _store(tmp_path, monkeypatch)
+    chunks = ['a', 'bb', 'ccc']
+    store.build('vid', chunks)
+
+    assert store.has('vid', chunks)
+    assert store.similarities('vid', 'xx', chunks).tolist() == [0.0, 1.0, 0.0]
+
+
+def test_rechunked_video_is_stale(tmp_path, monkeypatch):
+    store = _store(tmp_path, monkeypatch)
+    store.build('vid', ['a', 'bb', 'ccc'])
+    # Same number of chunks, different boundaries
+    rechunked = ['ab', 'b', 'ccc']
+
+    assert not store.has('vid', rechunked)
+    assert store.similarities('vid', 'xx', rechunked) is None
+
+    store.build('vid', rechunked)
+    assert store.has('vid', rechunked)
+    assert not store.has('vid', ['a', 'bb', 'ccc'])
+
+
+def test_matrix_without_hash_is_rebuilt(tmp_path, monkeypatch):
+    store = _store(tmp_path, monkeypatch)
+    chunks = ['a', 'bb']
+    store.build('vid', chunks)
+    (tmp_path / 'test-embed' / 'vid.sha1').unlink()
+
+    assert not EmbeddingStore(str(tmp_path), model='test-embed').has('vid', chunks)
@@ -0,0 +1,32 @@
+from services.event_broker import EventBroker
+
+
+def _drain(broker, name, last_seq=0):
+    return [item for item in broker.listen(name, last_seq, timeout=0.01) if item is not None]
+
+
+def test_closed_channel_replays_to_late_subscribers():
+    broker = EventBroker()
+    broker.publish('summary:x', 'error', {'message': 'failed'})
+    broker.close('summary:x')
+    assert _drain(broker, 'summary:x') == [(1, 'error', {'message': 'failed'})]
+
+
+def test_reopen_drops_previous_run():
+    broker = EventBroker()
+    broker.publish('summary:x', 'error', {'message': 'failed'})
+    broker.close('summary:x')
+
+    broker.reopen('summary:x')
+    broker.publish('summary:x', 'done', {'summary': 'new'})
+    broker.close('summary:x')
+    # Sequence numbers continue, so reconnecting clients resume correctly
+    assert _drain(broker, 'summary:x') == [(2, 'done', {'summary': 'new'})]
+
+
+def test_reopen_keeps_running_channel():
+    broker = EventBroker()
+    broker.publish('summary:x', 'status', {'stage': 'retrying'})
+    broker.reopen('summary:x')
+    broker.close('summary:x')
+    assert _drain(broker, 'summary:x') == [(1, 'status', {'stage': 'retrying'})]
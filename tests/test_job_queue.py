@@ -0,0 +1,104 @@
+import time
+import threading
+from services.job_queue import JobQueue, WorkerPool, JOB_DONE, JOB_FAILED
+
+
+def _local_queue(lease_seconds=1, max_attempts=2):
+    queue = JobQueue(None)
+    queue.lease_seconds = lease_seconds
+    queue.max_attempts = max_attempts
+    return queue
+
+
+def _job(queue, job_id):
+    return queue.local._jobs[job_id]
+
+
+def test_running_job_keeps_its_lease():
+    queue = _local_queue(lease_seconds=0.3)
+    pool = WorkerPool(queue, concurrency=1)
+    started, release = threading.Event(), threading.Event()
+    runs = []
+
+    def handler(payload):
+        runs.append(payload)
+        started.set()
+        release.wait(5)
+
+    pool.register('slow', handler)
+    job_id, _ = queue.enqueue('slow', {'n': 1})
+    worker = threading.Thread(target=pool._execute, args=(queue.claim(),))
+    worker.start()
+    assert started.wait(5)
+
+    # Well past the original lease, the job is still held by its worker
+    time.sleep(1.0)
+    assert queue.claim() is None
+
+    release.set()
+    worker.join(5)
+    assert runs == [{'n': 1}]
+    assert _job(queue, job_id)['status'] == JOB_DONE
+
+
+def test_expired_job_on_its_last_attempt_is_failed_not_rerun():
+    queue = _local_queue(lease_seconds=0.05, max_attempts=2)
+    pool = WorkerPool(queue, concurrency=1)
+    runs, given_up = [], []
+    pool.register('crashy', runs.append, on_give_up=lambda payload, error: given_up.append(payload))
+    job_id, _ = queue.enqueue('crashy', {'n': 1})
+
+    # Two workers die mid-job: each claim uses up an attempt
+    for _ in range(2):
+        assert queue.claim() is not None
+        time.sleep(0.1)
+
+    job = queue.claim()
+    assert job['attempts'] == 3
+    pool._execute(job)
+    assert runs == []
+    assert given_up == [{'n': 1}]
+    assert _job(queue, job_id)['status'] == JOB_FAILED
+    assert queue.claim() is None
+
+
+def test_failed_job_is_retried_then_given_up():
+    queue = _local_queue(max_attempts=2)
+    queue.backoff_seconds = 0
+    pool = WorkerPool(queue, concurrency=1)
+    given_up = []
+
+    def handler(payload):
+        raise ValueError("boom")
+
+    pool.register('bad', handler, on_give_up=lambda payload, error: given_up.append(str(error)))
+    job_id, _ = queue.enqueue('bad', {})
+    pool._execute(queue.claim())
+    assert given_up == []
+    pool._execute(queue.claim())
+    assert given_up == ['boom']
+    assert _job(queue, job_id)['status'] == JOB_FAILED
+
+
+def test_mongo_lease_renewal_stops_once_reclaimed(mongo_db):
+    queue = JobQueue(mongo_db.jobs)
+    queue.enqueue('slow', {})
+    job = queue.claim()
+    assert job['_backend'] == 'mongo'
+    assert queue.extend_lease(job)
+
+    # Another worker took the job over after the lease lapsed
+    mongo_db.jobs.update_one({'_id': job['_id']}, {'$inc': {'attempts': 1}})
+    assert not queue.extend_lease(job)
+
+
+def test_is_active_until_the_job_finishes():
+    queue = _local_queue()
+    pool = WorkerPool(queue, concurrency=1)
+    pool.register('prefetch', lambda payload: None)
+    queue.enqueue('prefetch', {'video_id': 'abc'}, key='prefetch:abc')
+
+    assert queue.is_active('prefetch:abc')
+    assert not queue.is_active('prefetch:other')
+    pool._execute(queue.claim())
+    assert not queue.is_active('prefetch:abc')
@@ -0,0 +1,58 @@
+import pytest
+from services.library_search import LibrarySearch
+
+
+@pytest.fixture
+def library(mongo_db):
+    search = LibrarySearch(mongo_db.search_postings, mongo_db.search_terms, mongo_db.summaries)
+    videos = {
+        'hindi000001': '### सारांश\nक्रिकेट मैच में भारत ने जीत हासिल की। खिलाड़ियों ने अच्छा खेला।',
+        'french00001': '### Summary\nA conversation about café culture and the résumé of a chef.',
+        'english0001': '### Summary\nThe guest explains how interest rates move markets.',
+    }
+    for video_id, summary in videos.items():
+        mongo_db.summaries.insert_one({'video_id': video_id, 'summary': summary})
+        search.index_video(video_id, summary)
+    return search
+
+
+def test_english_query(library):
+    result = library.search('market rates')
+    assert [r['video_id'] for r in result['results']] == ['english0001']
+
+
+def test_hindi_query(library):
+    result = library.search('क्रिकेट')
+    assert [r['video_id'] for r in result['results']] == ['hindi000001']
+    assert result['results'][0]['snippet'] == 'क्रिकेट मैच में भारत ने जीत हासिल की।'
+
+
+def test_accented_query(library):
+    result = library.search('CAFÉ')
+    assert [r['video_id'] for r in result['results']] == ['french00001']
+
+
+def test_reindexing_is_tracked_by_version(library, mongo_db):
+    assert library.stale_video_ids() == []
+    mongo_db.summaries.insert_one({'video_id': 'new00000001', 'summary': 'New'})
+    assert library.stale_video_ids() == ['new00000001']
+
+
+def test_duplicate_records_are_all_stamped(library, mongo_db):
+    mongo_db.summaries.insert_many([
+        {'video_id': 'dup00000001', 'summary': 'Duplicate one'},
+        {'video_id': 'dup00000001', 'summary': 'Duplicate one'},
+    ])
+    assert library.stale_video_ids() == ['dup00000001']
+    assert not library.is_current('dup00000001')
+
+    library.index_video('dup00000001', 'Duplicate one')
+    assert library.stale_video_ids() == []
+    assert library.is_current('dup00000001')
+
+
+def test_stale_video_ids_pages_forward(library, mongo_db):
+    mongo_db.summaries.insert_many([{'video_id': f'new{i:08d}', 'summary': 'New'} for i in range(5)])
+    first = library.stale_video_ids(limit=3)
+    assert first == ['new00000000', 'new00000001', 'new00000002']
+    assert library.stale_video_ids(limit=3, after=first[-1]) == ['new00000003', 'new00000004']
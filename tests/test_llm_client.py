@@ -0,0 +1,70 @@
+import json
+import asyncio
+import httpx
+import pytest
+from langchain_core.messages import AIMessage
+from services.llm_cache import LLMCache
+from services.llm_client import LLMClient, llm_unavailable
+
+
+def is_json(text):
+    json.loads(text)
+    return True
+
+
+@pytest.fixture
+def client():
+    client = LLMClient()
+    client.cache = LLMCache()
+    client.cache.enabled = True
+    client.replies = []
+    client.prompts = []
+
+    async def fake_call(prompt, temperature, limiter=None, **options):
+        client.prompts.append(prompt)
+        return AIMessage(content=client.replies.pop(0))
+
+    client._call = fake_call
+    return client
+
+
+def test_malformed_response_is_not_cached_so_a_retry_recovers(client):
+    client.replies = ['Sure! {"sentiment": ', '{"sentiment": "Positive"}']
+
+    assert client.invoke('rate this', validate=is_json).content == 'Sure! {"sentiment": '
+    # The retry reaches the model instead of replaying the bad answer
+    assert client.invoke('rate this', validate=is_json).content == '{"sentiment": "Positive"}'
+    # and the good answer is what gets cached
+    assert client.invoke('rate this', validate=is_json).content == '{"sentiment": "Positive"}'
+    assert len(client.prompts) == 2
+
+
+def test_cached_response_failing_validation_is_ignored(client):
+    key = LLMCache.make_key(client.model, 0.7, 'rate this', {})
+    client.cache.set(key, 'not json', client.model)
+    client.replies = ['{"ok": true}']
+
+    assert client.invoke('rate this', validate=is_json).content == '{"ok": true}'
+    assert client.invoke('rate this').content == '{"ok": true}'
+    assert len(client.prompts) == 1
+
+
+def test_responses_are_cached_without_a_validator(client):
+    client.replies = ['plain text']
+    assert client.invoke('summarize').content == 'plain text'
+    assert client.invoke('summarize').content == 'plain text'
+    assert len(client.prompts) == 1
+
+
+def test_unavailable_errors_are_told_apart_from_bad_requests():
+    class ResponseError(Exception):
+        def __init__(self, status_code):
+            super().__init__('error')
+            self.status_code = status_code
+
+    assert llm_unavailable(httpx.ConnectError('refused'))
+    assert llm_unavailable(ConnectionError('Failed to connect to Ollama'))
+    assert llm_unavailable(asyncio.TimeoutError())
+    assert llm_unavailable(ResponseError(503))
+    assert not llm_unavailable(ResponseError(400))
+    assert not llm_unavailable(ValueError('bad format'))
@@ -0,0 +1,27 @@
+import random
+import pytest
+from bench_output_cleaner import (
+    random_case, synthetic_summary,
+    reference_clean_text, reference_parse_summary_sections, reference_summary_sections
+)
+from services.output_cleaner import clean_text, parse_summary_sections, summary_sections
+
+
+def _cases():
+    rng = random.Random(0)
+    return [random_case(rng) for _ in range(3000)] + [synthetic_summary(rng, sections=10) for _ in range(20)]
+
+
+@pytest.mark.parametrize('func, reference', [
+    (clean_text, reference_clean_text),
+    (parse_summary_sections, reference_parse_summary_sections),
+])
+def test_matches_reference(func, reference):
+    for text in _cases():
+        assert func(text) == reference(text), text
+
+
+def test_summary_sections_match_reference():
+    for text in _cases():
+        if text:
+            assert summary_sections(text) == reference_summary_sections(text), text
@@ -0,0 +1,49 @@
+import io
+import zipfile
+from services.pdf_report import PdfCache
+from services.pdf_export import PdfExporter
+
+
+def _record(video_id):
+    return {
+        'video_id': video_id,
+        'video_url': f'https://youtu.be/{video_id}',
+        'summary': '### Summary\nA & B <talk>.\n\n### Key Takeaways\n- First point here',
+        'transcription_confidence': 90,
+        'summary_confidence': 80
+    }
+
+
+def test_stream_zip_renders_missing_reports(tmp_path):
+    cache = PdfCache(str(tmp_path))
+    exporter = PdfExporter(cache, workers=2)
+    records = {f'video{i:06d}': _record(f'video{i:06d}') for i in range(7)}
+    loaded = []
+
+    def load_records(ids):
+        loaded.append(len(ids))
+        return {video_id: records[video_id] for video_id in ids if video_id in records}
+
+    parts = list(exporter.stream_zip(list(records) + ['nosummary01'], load_records))
+    archive = zipfile.ZipFile(io.BytesIO(b''.join(parts)))
+
+    assert archive.testzip() is None
+    assert archive.namelist() == [f'podcast_summary_{video_id}.pdf' for video_id in records] + ['missing.txt']
+    assert archive.read('podcast_summary_video000000.pdf').startswith(b'%PDF-')
+    assert archive.read('missing.txt') == b'nosummary01\tno summary\n'
+    # Records are read a window at a time
+    assert max(loaded) <= exporter.window
+    assert cache.stats()['renders'] == 7
+
+
+def test_report_cache_follows_record_changes(tmp_path):
+    cache = PdfCache(str(tmp_path))
+    record = _record('video000001')
+    with cache.open('video000001', record) as f:
+        assert f.read(5) == b'%PDF-'
+    assert cache.has('video000001', record)
+
+    record['summary_confidence'] = 60
+    assert not cache.has('video000001', record)
+    cache.open('video000001', record).close()
+    assert len(list(tmp_path.iterdir())) == 1
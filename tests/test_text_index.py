@@ -0,0 +1,31 @@
+from services.text_index import tokenize, BM25Index
+
+
+def test_tokenize_english_stems_and_drops_stopwords():
+    assert tokenize("The runners were running, and they stopped") == ['run', 'run', 'stop']
+
+
+def test_tokenize_keeps_devanagari_words_whole():
+    assert tokenize('भारत की अर्थव्यवस्था तेजी से बढ़ रही है') == [
+        'भारत', 'की', 'अर्थव्यवस्था', 'तेजी', 'से', 'बढ़', 'रही', 'है'
+    ]
+
+
+def test_tokenize_keeps_accented_words_whole():
+    assert tokenize('Café naïve RÉSUMÉ') == ['café', 'naïve', 'résumé']
+
+
+def test_bm25_hindi_query():
+    index = BM25Index.build(['भारत की अर्थव्यवस्था', 'क्रिकेट मैच'])
+    assert [i for _, i in index.search('क्रिकेट')] == [1]
+
+
+def test_bm25_accented_query():
+    index = BM25Index.build(['the résumé of the guest', 'a café in Paris'])
+    assert [i for _, i in index.search('CAFÉ')] == [1]
+
+
+def test_bm25_round_trip():
+    index = BM25Index.build(['markets and policy', 'sleep and memory'], times=[[0, 5], [5, 9]])
+    restored = BM25Index.from_dict(index.to_dict())
+    assert restored.search('memory') == index.search('memory')
@@ -0,0 +1,55 @@
+from services.token_budget import TokenCounter, context_budget
+
+
+def _counter():
+    # Forced onto the estimate so results don't depend on tiktoken being installed
+    counter = TokenCounter(encoding='')
+    assert not counter.exact
+    return counter
+
+
+def _check_cover(text, bounds):
+    assert bounds[0][0] == 0 and bounds[-1][1] == len(text)
+    # Spans overlap or are separated by whitespace only
+    for (_, end), (start, _) in zip(bounds, bounds[1:]):
+        assert not text[end:start].strip()
+
+
+def test_chunks_fit_the_budget_and_cover_the_text():
+    counter = _counter()
+    text = ' '.join(f"Sentence number {i} talks about markets and policy." for i in range(400))
+    bounds = counter.chunk_bounds(text, 120, overlap_tokens=10)
+    assert len(bounds) > 1
+    assert all(counter.count(text[a:b]) <= 120 for a, b in bounds)
+    _check_cover(text, bounds)
+
+
+def test_run_without_whitespace_is_hard_split():
+    counter = _counter()
+    text = 'a' * 10000
+    bounds = counter.chunk_bounds(text, 100)
+    assert len(bounds) >= 25
+    assert all(counter.count(text[a:b]) <= 100 for a, b in bounds)
+    _check_cover(text, bounds)
+
+
+def test_unspaced_devanagari_is_hard_split():
+    counter = _counter()
+    text = 'भारतकीअर्थव्यवस्था' * 300
+    bounds = counter.chunk_bounds(text, 64, overlap_tokens=8)
+    assert all(counter.count(text[a:b]) <= 64 for a, b in bounds)
+    _check_cover(text, bounds)
+
+
+def test_chunks_start_on_given_boundaries():
+    counter = _counter()
+    segments = [f"caption line {i} with a few words" for i in range(100)]
+    text = '\n'.join(segments)
+    offsets = [sum(len(s) + 1 for s in segments[:i]) for i in range(len(segments))]
+    bounds = counter.chunk_bounds(text, 50, boundaries=offsets)
+    assert {a for a, _ in bounds} <= set(offsets)
+
+
+def test_context_budget_has_a_floor():
+    assert context_budget(8192, 600) == 7592
+    assert context_budget(1000, 2500) == 256